@@ -1,7 +1,42 @@
-from deuces import Evaluator
+import math
+import os
 
+from deuces import Deck
 
-def elegir_jugada(mano, cartas_en_mesa, otros_jugadores, pozo: int, num_fichas: int, situación: bool):
+from playerstrategyABC import PlayerStrategy
+from shared_evaluator import obtener_evaluador
+
+
+# Mazo completo en formato deuces. El índice de cada carta es rango * 4 + palo
+# (palos en orden s, h, d, c), y es la base del indexado combinatorio.
+MAZO = Deck.GetFullDeck()
+INDICE_CARTA = {carta: i for i, carta in enumerate(MAZO)}
+
+# Las 1326 manos iniciales en orden colexicográfico: el combo (a, b) con a < b
+# tiene índice b * (b - 1) // 2 + a.
+COMBOS = [(a, b) for b in range(52) for a in range(b)]
+
+# Umbrales de valor esperado de elegir_jugada: apostar todo, apostar el pozo e igualar
+UMBRALES = (1.8, 1.4, 1.1)
+
+# Sobre este número de evaluaciones estimadas se reparte el trabajo en procesos
+UMBRAL_PARALELO = 200_000
+
+_pool = None
+_pool_procesos = 0
+
+
+def indice_combo(a: int, b: int):
+    """
+    Índice colexicográfico (0-1325) de la mano formada por las cartas de índices a y b.
+    """
+    if a > b:
+        a, b = b, a
+    return b * (b - 1) // 2 + a
+
+
+def elegir_jugada(mano, cartas_en_mesa, otros_jugadores, pozo: int, num_fichas: int, situación: bool,
+                  umbrales=UMBRALES, rangos=None):
     """
     Elige una jugada basada en la mano del jugador, los otros jugadores y el pozo.
 
@@ -11,33 +46,359 @@ def elegir_jugada(mano, cartas_en_mesa, otros_jugadores, pozo: int, num_fichas:
     :param num_fichas: Número total de fichas actual de clanker.
     :return: Tupla con la jugada elegida (tipo, num_fichas).
     :param situación: Indica si alguien ha apostado antes o no.
+    :param umbrales: Valores esperados mínimos para apostar todo, apostar el pozo e igualar.
+    :param rangos: Pesos de los 1326 combos de cada oponente (opcional, ver ranges.py).
     """
     # Implementación de la lógica para elegir la jugada
-    EV = valor_esperado(mano, cartas_en_mesa, len(otros_jugadores), pozo)
+    EV = valor_esperado(mano, cartas_en_mesa, len(otros_jugadores), pozo, rangos=rangos)
+    umbral_todo, umbral_pozo, umbral_igualar = umbrales
 
     # Aquí se puede agregar la lógica específica del juego Clanker
     if situación:
-        if EV > 1.8:
+        if EV > umbral_todo:
             return "Apostar", num_fichas
-        elif EV > 1.4:
+        elif EV > umbral_pozo:
             return "Apostar", min(num_fichas, pozo)
-        elif EV > 1.1:
+        elif EV > umbral_igualar:
             return "Igualar", 0
         else:
             return "Retirarse", 0
     else:
-        if EV > 1.8:
+        if EV > umbral_todo:
             return "Apostar", num_fichas
-        elif EV > 1.4:
+        elif EV > umbral_pozo:
             return "Apostar", min(num_fichas, pozo)
         else:
             return "Pasar", 0
 
 
-def valor_esperado(mano, cartas_en_mesa, num_otros_jugadores: int, pozo: int):
-    return equity(mano, cartas_en_mesa, num_otros_jugadores) * (num_otros_jugadores + 1)
+def valor_esperado(mano, cartas_en_mesa, num_otros_jugadores: int, pozo: int, cartas_muertas=(), rangos=None):
+    # Con rangos de los rivales (ranges.py) la equity se calcula contra ellos
+    if rangos:
+        return equity_rangos(mano, cartas_en_mesa, rangos, cartas_muertas) * (num_otros_jugadores + 1)
+    # Pre-flop no hay mano de 5 cartas que evaluar: se usa el percentil de Chen
+    if not cartas_en_mesa:
+        from cfr_solver import percentil_chen
+
+        return percentil_chen(mano) * (num_otros_jugadores + 1)
+    return equity(mano, cartas_en_mesa, num_otros_jugadores, cartas_muertas) * (num_otros_jugadores + 1)
+
+
+def semilla_situacion(mano, cartas_en_mesa, cartas_muertas=()):
+    """
+    Semilla derivada de las cartas conocidas: las estimaciones Monte Carlo dan siempre lo mismo
+    para la misma situación, sin depender ni alterar el random global (repeticiones exactas y
+    números aleatorios comunes en tuner.py).
+    """
+    return hash((tuple(mano), tuple(cartas_en_mesa), tuple(sorted(cartas_muertas)))) & 0xFFFFFFFF
+
+
+def equity(mano, cartas_en_mesa, num_otros_jugadores: int = 1, cartas_muertas=(), rng=None):
+    """
+    Probabilidad (entre 0 y 1) de ganar el pozo post-flop contra manos aleatorias.
+
+    En el flop usa el EHS de hand_buckets (fuerza actual más potencial) contra un rival, elevado
+    al número de rivales; en el turn y el river las continuaciones son enumerables: equity exacta
+    hasta dos rivales (con más, la enumeración tarda de segundos a minutos) y, desde tres, la de
+    un rival elevada al número de rivales, como features.hand_strength.
+
+    :param rng: random.Random para el Monte Carlo del flop (por defecto, uno con semilla_situacion).
+    """
+    num_otros_jugadores = max(1, num_otros_jugadores)
+    if len(cartas_en_mesa) >= 4:
+        if num_otros_jugadores <= 2:
+            return equity_exacta(mano, cartas_en_mesa, num_otros_jugadores, cartas_muertas)
+        return equity_exacta(mano, cartas_en_mesa, 1, cartas_muertas) ** num_otros_jugadores
+    import random
+
+    from hand_buckets import metricas_situacion
+
+    rng = rng or random.Random(semilla_situacion(mano, cartas_en_mesa, cartas_muertas))
+    return metricas_situacion(mano, cartas_en_mesa, rng=rng)[0] ** num_otros_jugadores
+
+
+def equity_exacta(mano, cartas_en_mesa, num_otros_jugadores: int = 1, cartas_muertas=(), procesos=None):
+    """
+    Calcula la equity exacta de la mano enumerando todas las cartas restantes de la mesa
+    y todas las combinaciones de manos de los oponentes (sin cartas repetidas entre ellos).
+
+    Los empates reparten el pozo, así que el resultado es la fracción esperada del pozo.
+    Pensada para el turn y el river; en el flop también es exacta pero bastante más cara.
+
+    :param mano: Las dos cartas de clanker en formato deuces.
+    :param cartas_en_mesa: Cartas comunitarias (3 a 5) en formato deuces.
+    :param num_otros_jugadores: Número de oponentes que siguen en la mano.
+    :param cartas_muertas: Cartas conocidas fuera de juego (se quitan del mazo).
+    :param procesos: Número de procesos a usar. None decide según el tamaño del cálculo, 1 fuerza un solo proceso.
+    :return: Equity entre 0 y 1.
+    """
+    if not 3 <= len(cartas_en_mesa) <= 5:
+        raise ValueError("equity_exacta necesita entre 3 y 5 cartas en la mesa")
+    if num_otros_jugadores < 1:
+        return 1.0
+
+    usadas = set(mano) | set(cartas_en_mesa) | set(cartas_muertas)
+    vivas = [carta for carta in MAZO if carta not in usadas]
+    faltantes = 5 - len(cartas_en_mesa)
+    n = len(vivas) - faltantes
+    if 2 * num_otros_jugadores > n:
+        raise ValueError("No quedan cartas suficientes para tantos oponentes")
+
+    runouts = list(_combinaciones(vivas, faltantes))
+
+    # Costo estimado: evaluar todos los combos por runout más recorrer los prefijos de oponentes
+    combos_por_runout = n * (n - 1) // 2
+    costo = len(runouts) * (combos_por_runout + combos_por_runout **
+                            (num_otros_jugadores - 1) // math.factorial(num_otros_jugadores - 1))
+
+    if procesos is None:
+        procesos = (os.cpu_count() or 1) if costo > UMBRAL_PARALELO else 1
+
+    # Con pocos runouts y varios oponentes, se parte también el primer nivel de prefijos
+    partes = 1
+    if procesos > 1 and num_otros_jugadores > 1 and len(runouts) < 2 * procesos:
+        partes = math.ceil(2 * procesos / len(runouts))
+
+    tareas = [(tuple(mano), tuple(cartas_en_mesa) + runout, tuple(carta for carta in vivas if carta not in runout),
+               num_otros_jugadores, parte, partes)
+              for runout in runouts for parte in range(partes)]
+
+    if procesos > 1:
+        repartos = _obtener_pool(procesos).map(
+            _reparto_runout, tareas, chunksize=max(1, len(tareas) // (4 * procesos)))
+    else:
+        repartos = map(_reparto_runout, tareas)
+
+    # Cada conjunto de manos rivales se cuenta una vez por oponente que puede quedar al final
+    total = len(runouts) * num_otros_jugadores * \
+        _num_emparejamientos(n, num_otros_jugadores)
+    return sum(repartos) / total
+
+
+def equity_rangos(mano, cartas_en_mesa, rangos, cartas_muertas=(), muestras: int = 2000, rng=None):
+    """
+    Equity contra oponentes con rangos ponderados en vez de manos uniformes.
+
+    Con un solo oponente y 4 o 5 cartas en la mesa es exacta (se recorren todos los runouts y
+    combos); si no, se estima con Monte Carlo muestreando los combos de cada rango.
+
+    :param mano: Las dos cartas de clanker en formato deuces.
+    :param cartas_en_mesa: Cartas comunitarias (0 a 5) en formato deuces.
+    :param rangos: Pesos de los 1326 combos (orden de COMBOS) de cada oponente, como lista o diccionario.
+    :param cartas_muertas: Cartas conocidas fuera de juego.
+    :param muestras: Muestras Monte Carlo.
+    :param rng: np.random.Generator (por defecto, uno con semilla_situacion).
+    :return: Equity entre 0 y 1.
+    """
+    import numpy as np
+    from ranges import BLOQUEO
+
+    rangos = list(rangos.values()) if isinstance(rangos, dict) else list(rangos)
+    conocidas = list(mano) + list(cartas_en_mesa) + list(cartas_muertas)
+    bloqueados = BLOQUEO[[INDICE_CARTA[carta] for carta in conocidas]].any(axis=0)
+    pesos = []
+    for rango in rangos:
+        rango = np.where(bloqueados, 0.0, np.asarray(rango, dtype=float))
+        if rango.sum() <= 0:
+            rango = np.where(bloqueados, 0.0, 1.0)
+        pesos.append(rango / rango.sum())
+    if not pesos:
+        return 1.0
+
+    evaluador = obtener_evaluador()
+    vivas = [carta for carta in MAZO if carta not in set(conocidas)]
+    faltantes = 5 - len(cartas_en_mesa)
+
+    if len(pesos) == 1 and faltantes <= 1:
+        rango = pesos[0]
+        puntos = 0.0
+        peso_total = 0.0
+        for runout in ([(carta,) for carta in vivas] if faltantes else [()]):
+            tablero = list(cartas_en_mesa) + list(runout)
+            rango_clanker = evaluador.evaluate(list(mano), tablero)
+            for indice in np.flatnonzero(rango):
+                a, b = COMBOS[indice]
+                if MAZO[a] in runout or MAZO[b] in runout:
+                    continue
+                rival = evaluador.evaluate([MAZO[a], MAZO[b]], tablero)
+                puntos += rango[indice] * (1.0 if rango_clanker < rival else (0.5 if rango_clanker == rival else 0.0))
+                peso_total += rango[indice]
+        return puntos / peso_total
+
+    rng = rng or np.random.default_rng(semilla_situacion(mano, cartas_en_mesa, cartas_muertas))
+    # Combos candidatos de cada rango, sorteados de una vez; los que chocan se descartan
+    candidatos = [iter(rng.choice(len(COMBOS), size=8 * muestras, p=rango)) for rango in pesos]
+    puntos = 0.0
+    validas = 0
+    for _ in range(muestras):
+        usadas = set()
+        manos_rivales = []
+        for sorteo in candidatos:
+            for indice in sorteo:
+                a, b = COMBOS[indice]
+                if a not in usadas and b not in usadas:
+                    usadas.update((a, b))
+                    manos_rivales.append([MAZO[a], MAZO[b]])
+                    break
+            else:
+                break
+        if len(manos_rivales) < len(pesos):
+            break
+        resto = [carta for carta in vivas if INDICE_CARTA[carta] not in usadas]
+        tablero = list(cartas_en_mesa) + [resto[i] for i in rng.choice(len(resto), faltantes, replace=False)]
+        rango_clanker = evaluador.evaluate(list(mano), tablero)
+        mejores = [evaluador.evaluate(rival, tablero) for rival in manos_rivales]
+        mejor = min(mejores)
+        if rango_clanker < mejor:
+            puntos += 1.0
+        elif rango_clanker == mejor:
+            puntos += 1.0 / (1 + mejores.count(mejor))
+        validas += 1
+    return puntos / validas if validas else 0.0
+
+
+def _combinaciones(cartas, k):
+    if k == 0:
+        yield ()
+        return
+    for i in range(len(cartas) - k + 1):
+        for resto in _combinaciones(cartas[i + 1:], k - 1):
+            yield (cartas[i],) + resto
+
+
+def _num_emparejamientos(n, k):
+    """Número de formas de repartir k manos de dos cartas disjuntas entre n cartas."""
+    return math.factorial(n) // (2 ** k * math.factorial(k) * math.factorial(n - 2 * k))
+
+
+def _obtener_pool(procesos):
+    # El pool se mantiene vivo entre llamadas para no pagar el arranque en cada decisión
+    from concurrent.futures import ProcessPoolExecutor
+
+    global _pool, _pool_procesos
+    if _pool is None or _pool_procesos != procesos:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=procesos)
+        _pool_procesos = procesos
+    return _pool
+
+
+def _reparto_runout(tarea):
+    """
+    Suma de la fracción de pozo de clanker sobre todas las manos rivales para un runout completo.
+
+    Los oponentes se recorren como un prefijo de k-1 combos en orden creciente de índice más un
+    último combo libre, que no se enumera: se cuenta en O(1) con los grados de cada carta.
+    Así cada conjunto de k manos rivales aparece exactamente k veces.
+    """
+    mano, tablero, vivas, k, parte, partes = tarea
+    evaluador = obtener_evaluador()
+    rango_clanker = evaluador.evaluate(list(mano), list(tablero))
+    n = len(vivas)
+
+    # Clase de cada combo rival: 0 = clanker gana, 1 = empate, 2 = clanker pierde
+    clase = [[2] * n for _ in range(n)]
+    grado = [[0] * n, [0] * n]
+    totales = [0, 0]
+    candidatos = []
+    for b in range(1, n):
+        for a in range(b):
+            rango = evaluador.evaluate([vivas[a], vivas[b]], list(tablero))
+            c = 0 if rango > rango_clanker else (1 if rango == rango_clanker else 2)
+            clase[a][b] = clase[b][a] = c
+            if c < 2:
+                grado[c][a] += 1
+                grado[c][b] += 1
+                totales[c] += 1
+                candidatos.append((a, b, c))
+
+    if k == 1:
+        return totales[0] + totales[1] / 2 if parte == 0 else 0.0
+
+    reparto = 0.0
+    usadas = []
+
+    def prefijo(desde, restantes, empates, libres_gana, libres_empate):
+        # libres_*: combos de cada clase disjuntos de las cartas usadas, actualizados al agregar cada combo
+        nonlocal reparto
+        for idx in range(desde, len(candidatos)):
+            if restantes == k - 1 and idx % partes != parte:
+                continue
+            a, b, c = candidatos[idx]
+            if a in usadas or b in usadas:
+                continue
+            gana = libres_gana - grado[0][a] - grado[0][b]
+            empate = libres_empate - grado[1][a] - grado[1][b]
+            # Los combos con ambas cartas usadas se restaron dos veces
+            for x, y in [(a, b)] + [(z, y) for z in (a, b) for y in usadas]:
+                if clase[x][y] == 0:
+                    gana += 1
+                elif clase[x][y] == 1:
+                    empate += 1
+            if restantes == 1:
+                reparto += gana / (1 + empates + c) + empate / (2 + empates + c)
+            else:
+                usadas.append(a)
+                usadas.append(b)
+                prefijo(idx + 1, restantes - 1, empates + c, gana, empate)
+                usadas.pop()
+                usadas.pop()
+
+    prefijo(0, k - 1, 0, totales[0], totales[1])
+    return reparto
+
+
+class ClankerStrategy(PlayerStrategy):
+    """
+    Estrategia que juega con elegir_jugada.
+
+    Args:
+        name: Nombre del jugador
+        umbrales: Umbrales de valor esperado (apostar todo, apostar el pozo, igualar)
+        usar_rangos: Calcular la equity contra los rangos bayesianos de los rivales (ranges.py)
+    """
+
+    # Módulos que cambian sus decisiones (ver league.version_estrategia)
+    DEPENDENCIAS = ("cfr_solver", "hand_buckets", "ranges")
+
+    def __init__(self, name="CLANKER", umbrales=UMBRALES, usar_rangos=False):
+        self.name = name
+        self.umbrales = tuple(umbrales)
+        self.usar_rangos = usar_rangos
+
+    def get_name(self):
+        return self.name
+
+    def make_decision(self, game_state, available_actions, player_index):
+        from features import features_for
+
+        if not available_actions:
+            return None
+
+        f = features_for(game_state, player_index, available_actions)
+        acciones = {action_type: amount for action_type, description, amount in available_actions}
+        otros = [stack for i, stack in enumerate(game_state.stacks)
+                 if i != player_index and game_state.statuses[i]]
+        jugada, fichas = elegir_jugada(list(f.hole_cards), list(f.board_cards), otros, f.pot,
+                                       game_state.stacks[player_index], f.to_call > 0, self.umbrales,
+                                       f.opponent_ranges if self.usar_rangos else None)
 
+        if jugada == "Apostar":
+            # elegir_jugada indica cuánto agregar: se convierte en un "subir a" dentro de los límites
+            objetivo = max(game_state.bets) + fichas
+            if "allin" in acciones and objetivo >= acciones["allin"]:
+                return "allin", acciones["allin"]
+            for tipo in ("bet", "raise"):
+                if tipo in acciones:
+                    return tipo, max(acciones[tipo], min(objetivo, acciones.get("allin", objetivo)))
+            if "allin" in acciones:
+                return "allin", acciones["allin"]
+        if jugada in ("Apostar", "Igualar") and "call" in acciones:
+            return "call", acciones["call"]
+        if "check" in acciones:
+            return "check", 0
+        return "fold", 0
 
-def equity(mano, cartas_en_mesa):
-    evaluator = Evaluator()
-    return 1 - ((1 - evaluator.evaluate(mano, cartas_en_mesa))/7462)
+    def on_action_taken(self, player_index, action_type, amount, description):
+        print(f"🦾 {self.name} eligió: {description}")
@@ -0,0 +1,280 @@
+"""
+Agregación en streaming de los resultados por mano de cada estrategia, en memoria constante.
+
+InteractivePokerGame y repeated_hand_simulation aceptan un ResultsAggregator (parámetro
+aggregator). Al terminar cada mano se le pasa la ganancia de cada jugador y se actualizan, por
+estrategia (según get_name):
+
+- media y varianza con el algoritmo de Welford, en ciegas grandes y en fichas, de donde salen
+  los intervalos de confianza de bb/100 y del EV en fichas por mano
+- un sketch de cuantiles (DDSketch: histograma con buckets logarítmicos, error relativo acotado)
+  de la ganancia por mano
+
+Todo se puede combinar: los agregadores de varios procesos o máquinas se juntan con merge (o se
+serializan con to_dict / from_dict) y el resultado es el mismo que si una sola mesa hubiera
+jugado todas las manos.
+
+    aggregator = ResultsAggregator()
+    InteractivePokerGame.repeated_hand_simulation(strategies, max_hands=10000, aggregator=aggregator)
+    for line in aggregator.summary_lines():
+        print(line)
+"""
+import math
+
+
+class RunningStats:
+    """Media y varianza en una pasada (Welford), combinables entre workers (Chan et al.)."""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def stderr(self):
+        return math.sqrt(self.variance / self.count) if self.count > 1 else float("inf")
+
+    def confidence_interval(self, z=1.96):
+        """Intervalo (inferior, superior) para la media, por aproximación normal."""
+        margin = z * self.stderr
+        return self.mean - margin, self.mean + margin
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["count"], data["mean"], data["m2"])
+
+
+class QuantileSketch:
+    """
+    DDSketch: cuenta los valores en buckets de ancho logarítmico, separando positivos, negativos
+    y ceros, así que cualquier cuantil tiene error relativo menor a relative_accuracy. Combinar
+    dos sketches es sumar sus conteos por bucket.
+
+    Args:
+        relative_accuracy: Error relativo de los cuantiles
+        max_bins: Buckets máximos por signo; si se superan, se juntan los de menor magnitud
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_bins=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def _key(self, magnitude):
+        return math.ceil(math.log(magnitude) / self.log_gamma)
+
+    def _value(self, key):
+        # Punto medio (en error relativo) del bucket (gamma^(key-1), gamma^key]
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value):
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value == 0:
+            self.zeros += 1
+            return
+        store = self.positive if value > 0 else self.negative
+        key = self._key(abs(value))
+        store[key] = store.get(key, 0) + 1
+        if len(store) > self.max_bins:
+            self._collapse(store)
+
+    def _collapse(self, store):
+        keys = sorted(store)
+        excess = len(keys) - self.max_bins
+        target = keys[excess]
+        for key in keys[:excess]:
+            store[target] += store.pop(key)
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Solo se pueden combinar sketches con la misma precisión")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+            if len(store) > self.max_bins:
+                self._collapse(store)
+        self.zeros += other.zeros
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """Valor aproximado del cuantil q (0-1). None si el sketch está vacío."""
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = 0
+        # Del más negativo al más positivo: negativos por magnitud decreciente, ceros, positivos
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return max(-self._value(key), self.min)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self._value(key), self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "relative_accuracy": self.relative_accuracy, "max_bins": self.max_bins,
+            "positive": {str(key): count for key, count in self.positive.items()},
+            "negative": {str(key): count for key, count in self.negative.items()},
+            "zeros": self.zeros, "count": self.count,
+            "min": self.min if self.count else None, "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["relative_accuracy"], data["max_bins"])
+        sketch.positive = {int(key): count for key, count in data["positive"].items()}
+        sketch.negative = {int(key): count for key, count in data["negative"].items()}
+        sketch.zeros = data["zeros"]
+        sketch.count = data["count"]
+        if sketch.count:
+            sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
+
+
+class StrategyResults:
+    """Resultados acumulados de una estrategia: ganancia por mano en ciegas grandes y en fichas."""
+
+    def __init__(self, relative_accuracy=0.01):
+        self.big_blinds = RunningStats()
+        self.chips = RunningStats()
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, chips, big_blind):
+        won = chips / big_blind
+        self.big_blinds.add(won)
+        self.chips.add(chips)
+        self.sketch.add(won)
+
+    def merge(self, other):
+        self.big_blinds.merge(other.big_blinds)
+        self.chips.merge(other.chips)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def hands(self):
+        return self.big_blinds.count
+
+    @property
+    def bb_per_100(self):
+        return 100 * self.big_blinds.mean
+
+    def bb_per_100_interval(self, z=1.96):
+        low, high = self.big_blinds.confidence_interval(z)
+        return 100 * low, 100 * high
+
+    def chip_ev_interval(self, z=1.96):
+        return self.chips.confidence_interval(z)
+
+    def to_dict(self):
+        return {"big_blinds": self.big_blinds.to_dict(), "chips": self.chips.to_dict(),
+                "sketch": self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        results = cls.__new__(cls)
+        results.big_blinds = RunningStats.from_dict(data["big_blinds"])
+        results.chips = RunningStats.from_dict(data["chips"])
+        results.sketch = QuantileSketch.from_dict(data["sketch"])
+        return results
+
+
+class ResultsAggregator:
+    """Resultados por estrategia de todas las manos jugadas, combinables entre workers."""
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.results = {}
+        self.hands = 0
+
+    def strategy(self, name):
+        results = self.results.get(name)
+        if results is None:
+            results = self.results[name] = StrategyResults(self.relative_accuracy)
+        return results
+
+    def record_hand(self, names, starting_stacks, final_stacks, big_blind):
+        """Agrega una mano terminada (un valor por jugador, en el orden de la mesa)."""
+        self.hands += 1
+        for name, start, final in zip(names, starting_stacks, final_stacks):
+            self.strategy(name).add(final - start, big_blind)
+
+    def merge(self, other):
+        self.hands += other.hands
+        for name, results in other.results.items():
+            self.strategy(name).merge(results)
+        return self
+
+    def to_dict(self):
+        return {"relative_accuracy": self.relative_accuracy, "hands": self.hands,
+                "results": {name: results.to_dict() for name, results in self.results.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregator = cls(data["relative_accuracy"])
+        aggregator.hands = data["hands"]
+        aggregator.results = {name: StrategyResults.from_dict(results) for name, results in data["results"].items()}
+        return aggregator
+
+    def summary_lines(self, z=1.96, quantiles=(0.05, 0.5, 0.95)):
+        """Una línea por estrategia, de mayor a menor bb/100."""
+        lines = []
+        for name, results in sorted(self.results.items(), key=lambda item: item[1].bb_per_100, reverse=True):
+            low, high = results.bb_per_100_interval(z)
+            chips_low, chips_high = results.chip_ev_interval(z)
+            points = " ".join(f"p{round(q * 100)}={results.sketch.quantile(q):+.1f}" for q in quantiles)
+            lines.append(f"{name}: {results.hands:,} manos | {results.bb_per_100:+.1f} bb/100 "
+                         f"[{low:+.1f}, {high:+.1f}] | EV {results.chips.mean:+,.0f} fichas "
+                         f"[{chips_low:+,.0f}, {chips_high:+,.0f}] | bb/mano {points}")
+        return lines
@@ -0,0 +1,156 @@
+"""
+Micro-batching de decisiones para estrategias respaldadas por un modelo.
+
+Cuando varias mesas corren en hilos o tareas de asyncio, cada una pide una sola decisión por vez
+y el modelo evalúa lotes de tamaño 1. DecisionBroker junta las consultas de todas las mesas y
+llama al modelo con un lote cuando se juntan max_batch consultas o cuando la más antigua lleva
+max_latency segundos esperando, lo que ocurra primero. Cada consulta recibe un Future con su fila
+del resultado, así que la latencia extra de una decisión queda acotada por max_latency más lo que
+tarde el lote.
+
+    broker = DecisionBroker(model, max_batch=64, max_latency=0.002)
+    strategies = [BrokeredStrategy(f"Red {i}", broker) for i in range(6)]
+    # ... mesas en hilos ...
+    broker.close()
+
+model recibe un array (lote, len(dataset.FEATURE_NAMES)) y retorna uno (lote, len(dataset.ACTION_NAMES))
+con un puntaje por tipo de acción: el mismo formato de filas que exporta dataset.py.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from playerstrategyABC import PlayerStrategy
+
+
+class DecisionBroker:
+    """
+    Cola de consultas compartida por todas las mesas, con un hilo que arma y evalúa los lotes.
+
+    Args:
+        model: Función lote de entradas -> lote de salidas (arrays de numpy)
+        max_batch: Consultas por lote como máximo; al llegar a este número el lote sale enseguida
+        max_latency: Segundos que puede esperar la consulta más antigua antes de evaluar un lote incompleto
+    """
+
+    def __init__(self, model, max_batch=32, max_latency=0.002):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.batches = 0
+        self.requests = 0
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, inputs):
+        """Encola una fila de entrada y retorna el Future de su fila de salida."""
+        future = Future()
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("El broker está cerrado")
+            self.queue.append((time.monotonic(), inputs, future))
+            if len(self.queue) >= self.max_batch or len(self.queue) == 1:
+                # Se despierta al hilo al llenar un lote o al empezar uno (para que arranque el plazo)
+                self.condition.notify()
+        return future
+
+    def evaluate(self, inputs, timeout=None):
+        """Versión bloqueante de submit, para mesas en hilos."""
+        return self.submit(inputs).result(timeout)
+
+    async def evaluate_async(self, inputs):
+        """Versión para tareas de asyncio: espera sin bloquear el event loop."""
+        import asyncio
+
+        return await asyncio.wrap_future(self.submit(inputs))
+
+    @property
+    def mean_batch_size(self):
+        return self.requests / self.batches if self.batches else 0.0
+
+    def close(self):
+        """Evalúa las consultas pendientes y detiene el hilo."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _next_batch(self):
+        with self.condition:
+            while True:
+                if len(self.queue) >= self.max_batch or (self.closed and self.queue):
+                    break
+                if self.closed:
+                    return None
+                if self.queue:
+                    remaining = self.queue[0][0] + self.max_latency - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                else:
+                    self.condition.wait()
+            count = min(len(self.queue), self.max_batch)
+            return [self.queue.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            futures = [future for _, _, future in batch]
+            try:
+                outputs = self.model(np.stack([inputs for _, inputs, _ in batch]))
+                if len(outputs) != len(futures):
+                    # Con zip, las consultas sin fila quedarían esperando para siempre
+                    raise ValueError(f"El modelo retornó {len(outputs)} filas para un lote de {len(futures)}")
+            except Exception as error:
+                for future in futures:
+                    future.set_exception(error)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            for future, output in zip(futures, outputs):
+                future.set_result(output)
+
+
+class BrokeredStrategy(PlayerStrategy):
+    """
+    Estrategia que pide sus decisiones a un DecisionBroker compartido.
+
+    Usa las filas de dataset.feature_row como entrada (features baratas, las mismas con las que se
+    entrena, así que armar la consulta no frena a la mesa) y elige la acción legal con mayor
+    puntaje; los montos de apuesta son los que ofrece el simulador (mínimo para bet/raise, máximo
+    para allin).
+    """
+
+    def __init__(self, name, broker):
+        self.name = name
+        self.broker = broker
+
+    def get_name(self):
+        return self.name
+
+    def make_decision(self, game_state, available_actions, player_index):
+        from dataset import ACTION_INDEX, feature_row
+
+        if not available_actions:
+            return None
+        scores = self.broker.evaluate(feature_row(game_state, player_index, available_actions))
+        action_type, description, amount = max(available_actions,
+                                               key=lambda action: scores[ACTION_INDEX[action[0]]])
+        return action_type, amount
+
+    def on_action_taken(self, player_index, action_type, amount, description):
+        print(f"🧠 {self.name} eligió: {description}")
@@ -0,0 +1,467 @@
+"""
+Entrenador CFR+ (MCCFR con muestreo externo) para un juego heads-up NLHE abstraído, y la
+estrategia que juega la política resultante.
+
+Abstracción del juego:
+    - Acciones: retirarse, pasar/igualar, subir el tamaño del pozo y all-in, con un máximo
+      de subidas por calle.
+    - Cartas: cada jugador ve solo el bucket de su mano en la calle actual (ver AbstraccionCartas).
+
+Los regrets y las sumas de estrategia viven en arreglos NumPy de forma (conjuntos de información,
+acciones). En cada ronda se calcula la estrategia actual de todos los conjuntos a la vez, varios
+procesos recorren lotes de iteraciones con esa estrategia fija y sus deltas se suman al final
+(regrets truncados en cero como en CFR+, promedio ponderado linealmente).
+
+Uso:
+
+    python cfr_solver.py politica_hu --rondas 200 --iteraciones 2000
+"""
+import argparse
+import bisect
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from CLANKER import MAZO
+from shared_evaluator import obtener_evaluador
+from playerstrategyABC import PlayerStrategy
+
+
+# Acciones abstractas
+RETIRARSE, IGUALAR, SUBIR_POZO, ALL_IN = range(4)
+NUM_ACCIONES = 4
+
+_cache_trabajador = {}
+
+
+class ArbolApuestas:
+    """
+    Árbol de apuestas abstracto de heads-up. El jugador 0 es la ciega chica (actúa primero
+    pre-flop) y el jugador 1 la ciega grande (actúa primero post-flop). Las fichas se cuentan
+    en ciegas chicas: ciega chica = 1, ciega grande = 2.
+
+    Los nodos se guardan en listas paralelas indexadas por id de nodo; los nodos de decisión
+    tienen además un id compacto que, junto al bucket, da la fila de la tabla de regrets.
+    """
+
+    def __init__(self, stack: int = 200, max_subidas: int = 2):
+        self.stack = stack
+        self.max_subidas = max_subidas
+        self.jugador = []
+        self.calle = []
+        self.hijos = []
+        self.aportes = []
+        self.terminal = []
+        self.id_decision = []
+        self.nodos_decision = []
+        self._construir(0, (1, 2), 0, 0, 0)
+        self.mascara = np.array([[hijo >= 0 for hijo in self.hijos[nodo]] for nodo in self.nodos_decision],
+                                dtype=bool)
+
+    @property
+    def num_decisiones(self):
+        return len(self.nodos_decision)
+
+    def _nuevo_nodo(self, jugador, calle, aportes, terminal=None):
+        nodo = len(self.jugador)
+        self.jugador.append(jugador)
+        self.calle.append(calle)
+        self.hijos.append([-1] * NUM_ACCIONES)
+        self.aportes.append(aportes)
+        self.terminal.append(terminal)
+        if terminal is None:
+            self.id_decision.append(len(self.nodos_decision))
+            self.nodos_decision.append(nodo)
+        else:
+            self.id_decision.append(-1)
+        return nodo
+
+    def _fin_de_calle(self, calle, aportes):
+        # Si alguien está all-in o terminó el river, se reparten las cartas que faltan y hay showdown
+        if calle == 3 or max(aportes) >= self.stack:
+            return self._nuevo_nodo(-1, calle, aportes, "showdown")
+        return self._construir(calle + 1, aportes, 1, 0, 0)
+
+    def _construir(self, calle, aportes, jugador, subidas, actuaron):
+        nodo = self._nuevo_nodo(jugador, calle, aportes)
+        otro = 1 - jugador
+        a_igualar = aportes[otro] - aportes[jugador]
+
+        if a_igualar > 0:
+            self.hijos[nodo][RETIRARSE] = self._nuevo_nodo(-1, calle, aportes, ("fold", otro))
+
+        igualados = (aportes[otro], aportes[otro])
+        if actuaron + 1 >= 2:
+            self.hijos[nodo][IGUALAR] = self._fin_de_calle(calle, igualados)
+        else:
+            self.hijos[nodo][IGUALAR] = self._construir(calle, igualados, otro, subidas, actuaron + 1)
+
+        if aportes[otro] < self.stack:
+            pozo = sum(aportes) + a_igualar
+            subir_a = aportes[otro] + max(pozo, 2)
+            if subidas < self.max_subidas and subir_a < self.stack:
+                nuevos = (subir_a, aportes[1]) if jugador == 0 else (aportes[0], subir_a)
+                self.hijos[nodo][SUBIR_POZO] = self._construir(calle, nuevos, otro, subidas + 1, actuaron + 1)
+            nuevos = (self.stack, aportes[1]) if jugador == 0 else (aportes[0], self.stack)
+            self.hijos[nodo][ALL_IN] = self._construir(calle, nuevos, otro, subidas + 1, actuaron + 1)
+        return nodo
+
+    def utilidad(self, nodo, jugador, ganador_showdown):
+        """Fichas ganadas por el jugador en un nodo terminal (ganador_showdown None = empate)."""
+        aportes = self.aportes[nodo]
+        terminal = self.terminal[nodo]
+        ganador = terminal[1] if terminal != "showdown" else ganador_showdown
+        if ganador is None:
+            return 0.0
+        return aportes[1 - jugador] if ganador == jugador else -aportes[jugador]
+
+
+def puntaje_chen(mano):
+    """Puntaje de Chen de una mano inicial en formato deuces."""
+    rangos = sorted(((carta >> 8) & 0xF) + 2 for carta in mano)
+    bajo, alto = rangos
+    valores = {14: 10, 13: 8, 12: 7, 11: 6}
+    puntaje = valores.get(alto, alto / 2)
+    if alto == bajo:
+        return max(puntaje * 2, 5)
+    if mano[0] & mano[1] & 0xF000:
+        puntaje += 2
+    hueco = alto - bajo - 1
+    puntaje -= {0: 0, 1: 1, 2: 2, 3: 4}.get(hueco, 5)
+    if hueco <= 1 and alto < 12:
+        puntaje += 1
+    return puntaje
+
+
+# Puntajes de Chen de las 1326 manos, ordenados, para pasar de puntaje a percentil
+_CHEN_ORDENADO = sorted(puntaje_chen([MAZO[a], MAZO[b]]) for b in range(52) for a in range(b))
+
+
+def percentil_chen(mano):
+    """Fracción de las manos iniciales con puntaje de Chen menor al de la mano."""
+    return bisect.bisect_left(_CHEN_ORDENADO, puntaje_chen(mano)) / len(_CHEN_ORDENADO)
+
+
+class AbstraccionCartas:
+    """
+    Asigna a cada mano un bucket por calle.
+
+    Pre-flop usa el percentil del puntaje de Chen. En el flop y el turn usa las tablas de
+    hand_buckets si se indica un directorio (reescalando al número de buckets); si no, y
+    siempre en el river, usa el percentil del rango de deuces de la mejor mano.
+    """
+
+    def __init__(self, num_buckets: int = 10, directorio_tablas=None):
+        self.num_buckets = num_buckets
+        self.directorio_tablas = directorio_tablas
+        self._tabla = None
+        if directorio_tablas:
+            from hand_buckets import TablaBuckets
+            self._tabla = TablaBuckets(directorio_tablas)
+
+    def bucket(self, mano, mesa):
+        """Bucket de la mano (formato deuces) con las cartas de mesa visibles."""
+        if not mesa:
+            return min(self.num_buckets - 1, int(percentil_chen(mano) * self.num_buckets))
+        if self._tabla is not None:
+            bucket = self._tabla.bucket(mano, mesa)
+            if bucket is not None:
+                return bucket * self.num_buckets // self._tabla.num_buckets(len(mesa))
+        fuerza = 1 - (obtener_evaluador().evaluate(list(mano), list(mesa)) - 1) / 7462
+        return min(self.num_buckets - 1, int(fuerza * self.num_buckets))
+
+    def buckets_por_calle(self, mano, mesa_completa):
+        return [self.bucket(mano, mesa_completa[:cartas]) for cartas in (0, 3, 4, 5)]
+
+
+def _recorrer(arbol, nodo, objetivo, buckets, ganador, sigma, num_buckets, regrets, sumas, rng):
+    """Recorrido de MCCFR con muestreo externo. Devuelve la utilidad del jugador objetivo."""
+    if arbol.terminal[nodo] is not None:
+        return arbol.utilidad(nodo, objetivo, ganador)
+
+    jugador = arbol.jugador[nodo]
+    fila = arbol.id_decision[nodo] * num_buckets + buckets[jugador][arbol.calle[nodo]]
+    estrategia = sigma[fila]
+    hijos = arbol.hijos[nodo]
+
+    if jugador == objetivo:
+        valores = [0.0] * NUM_ACCIONES
+        valor = 0.0
+        for accion, hijo in enumerate(hijos):
+            if hijo >= 0:
+                valores[accion] = _recorrer(arbol, hijo, objetivo, buckets, ganador, sigma, num_buckets,
+                                            regrets, sumas, rng)
+                valor += estrategia[accion] * valores[accion]
+        acumulado = regrets.setdefault(fila, [0.0] * NUM_ACCIONES)
+        for accion, hijo in enumerate(hijos):
+            if hijo >= 0:
+                acumulado[accion] += valores[accion] - valor
+        return valor
+
+    acumulado = sumas.setdefault(fila, [0.0] * NUM_ACCIONES)
+    for accion in range(NUM_ACCIONES):
+        acumulado[accion] += estrategia[accion]
+    accion = rng.choices(range(NUM_ACCIONES), weights=estrategia)[0]
+    return _recorrer(arbol, hijos[accion], objetivo, buckets, ganador, sigma, num_buckets, regrets, sumas, rng)
+
+
+def _lote_iteraciones(tarea):
+    """Tarea de un proceso: un lote de iteraciones MCCFR con la estrategia fija de la ronda."""
+    stack, max_subidas, num_buckets, directorio_tablas, sigma, iteraciones, semilla = tarea
+    clave = (stack, max_subidas, num_buckets, directorio_tablas)
+    if clave not in _cache_trabajador:
+        _cache_trabajador.clear()
+        _cache_trabajador[clave] = (ArbolApuestas(stack, max_subidas),
+                                    AbstraccionCartas(num_buckets, directorio_tablas))
+    arbol, abstraccion = _cache_trabajador[clave]
+    evaluador = obtener_evaluador()
+    rng = random.Random(semilla)
+    sigma = sigma.tolist()
+    regrets, sumas = {}, {}
+
+    for _ in range(iteraciones):
+        cartas = rng.sample(MAZO, 9)
+        manos = (cartas[0:2], cartas[2:4])
+        mesa = cartas[4:]
+        buckets = [abstraccion.buckets_por_calle(mano, mesa) for mano in manos]
+        rangos = [evaluador.evaluate(mano, mesa) for mano in manos]
+        ganador = None if rangos[0] == rangos[1] else (0 if rangos[0] < rangos[1] else 1)
+        for objetivo in (0, 1):
+            _recorrer(arbol, 0, objetivo, buckets, ganador, sigma, num_buckets, regrets, sumas, rng)
+    return regrets, sumas
+
+
+class EntrenadorCFR:
+    """
+    Entrenador CFR+ con muestreo externo paralelizado por lotes.
+
+    Args:
+        stack: Profundidad de los stacks en ciegas chicas (200 = 100 ciegas grandes)
+        max_subidas: Subidas del tamaño del pozo permitidas por calle (el all-in siempre está)
+        num_buckets: Buckets por calle de la abstracción de cartas
+        directorio_tablas: Directorio con tablas de hand_buckets (opcional)
+    """
+
+    def __init__(self, stack: int = 200, max_subidas: int = 2, num_buckets: int = 10, directorio_tablas=None):
+        self.stack = stack
+        self.max_subidas = max_subidas
+        self.num_buckets = num_buckets
+        self.directorio_tablas = directorio_tablas
+        self.arbol = ArbolApuestas(stack, max_subidas)
+        filas = self.arbol.num_decisiones * num_buckets
+        self.mascara = np.repeat(self.arbol.mascara, num_buckets, axis=0)
+        self.regrets = np.zeros((filas, NUM_ACCIONES))
+        self.sumas_estrategia = np.zeros((filas, NUM_ACCIONES))
+        self.rondas = 0
+        self.iteraciones = 0
+
+    def estrategia_actual(self):
+        """Regret matching sobre todos los conjuntos de información a la vez."""
+        positivos = np.maximum(self.regrets, 0) * self.mascara
+        suma = positivos.sum(axis=1, keepdims=True)
+        uniforme = self.mascara / self.mascara.sum(axis=1, keepdims=True)
+        return np.where(suma > 0, positivos / np.where(suma > 0, suma, 1), uniforme)
+
+    def estrategia_promedio(self):
+        suma = self.sumas_estrategia.sum(axis=1, keepdims=True)
+        uniforme = self.mascara / self.mascara.sum(axis=1, keepdims=True)
+        return np.where(suma > 0, self.sumas_estrategia / np.where(suma > 0, suma, 1), uniforme)
+
+    def entrenar(self, rondas: int = 100, iteraciones_por_ronda: int = 1000, procesos=None, semilla: int = 0):
+        """
+        Ejecuta rondas de entrenamiento. En cada ronda las iteraciones se reparten entre los procesos.
+        """
+        procesos = procesos or 1
+        por_proceso = max(1, iteraciones_por_ronda // procesos)
+        pool = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
+        try:
+            for _ in range(rondas):
+                self.rondas += 1
+                sigma = self.estrategia_actual().astype(np.float32)
+                tareas = [(self.stack, self.max_subidas, self.num_buckets, self.directorio_tablas, sigma,
+                           por_proceso, semilla * 1_000_003 + self.rondas * 1_009 + i) for i in range(procesos)]
+                resultados = pool.map(_lote_iteraciones, tareas) if pool else map(_lote_iteraciones, tareas)
+                for regrets, sumas in resultados:
+                    self._sumar(self.regrets, regrets)
+                    # Promedio lineal: la ronda t pesa t
+                    self._sumar(self.sumas_estrategia, sumas, self.rondas)
+                np.maximum(self.regrets, 0, out=self.regrets)
+                self.iteraciones += por_proceso * procesos
+        finally:
+            if pool:
+                pool.shutdown()
+
+    @staticmethod
+    def _sumar(destino, deltas, peso=1.0):
+        if deltas:
+            filas = np.fromiter(deltas.keys(), dtype=np.int64, count=len(deltas))
+            destino[filas] += peso * np.array(list(deltas.values()))
+
+    def exportar(self, ruta):
+        """
+        Guarda la política promedio: <ruta>.npy con probabilidades cuantizadas a uint8 por
+        conjunto de información y <ruta>.json con los parámetros de la abstracción.
+        """
+        cuantizada = np.rint(self.estrategia_promedio() * 255).astype(np.uint8)
+        np.save(f"{ruta}.npy", cuantizada)
+        with open(f"{ruta}.json", "w") as archivo:
+            json.dump({
+                "stack": self.stack,
+                "max_subidas": self.max_subidas,
+                "num_buckets": self.num_buckets,
+                "directorio_tablas": self.directorio_tablas,
+                "rondas": self.rondas,
+                "iteraciones": self.iteraciones,
+            }, archivo, indent=2)
+
+
+class CFRPolicyStrategy(PlayerStrategy):
+    """
+    Estrategia heads-up que juega una política exportada por EntrenadorCFR.
+
+    La tabla se abre memory-mapped; cada decisión traduce la historia real al nodo del árbol
+    abstracto y lee la fila (nodo, bucket) directamente. Con más de dos jugadores, o si la
+    historia no encaja en el árbol, pasa o iguala.
+    """
+
+    def __init__(self, ruta_politica, name="Bot CFR"):
+        self.name = name
+        with open(f"{ruta_politica}.json") as archivo:
+            self.parametros = json.load(archivo)
+        self.politica = np.load(f"{ruta_politica}.npy", mmap_mode="r")
+        self.arbol = ArbolApuestas(self.parametros["stack"], self.parametros["max_subidas"])
+        self.abstraccion = AbstraccionCartas(self.parametros["num_buckets"], self.parametros["directorio_tablas"])
+
+    def get_name(self):
+        return self.name
+
+    def make_decision(self, game_state, available_actions, player_index):
+        if not available_actions:
+            return None
+
+        nodo, jugador = self.nodo_abstracto(game_state, player_index)
+        if game_state.player_count != 2 or nodo is None or self.arbol.jugador[nodo] != jugador:
+            return self._igualar(available_actions)
+
+        from pokerSimulator import convert_pokerkit_to_deuces_cards
+
+        mano = convert_pokerkit_to_deuces_cards(game_state.hole_cards[player_index])
+        mesa = convert_pokerkit_to_deuces_cards([carta for cartas in game_state.board_cards for carta in cartas])
+        fila = self.arbol.id_decision[nodo] * self.abstraccion.num_buckets + self.abstraccion.bucket(mano, mesa)
+        pesos = [float(p) * (hijo >= 0) for p, hijo in zip(self.politica[fila], self.arbol.hijos[nodo])]
+        if sum(pesos) <= 0:
+            return self._igualar(available_actions)
+        accion = random.choices(range(NUM_ACCIONES), weights=pesos)[0]
+        return self._traducir(accion, game_state, available_actions)
+
+    def nodo_abstracto(self, game_state, player_index):
+        """
+        Reproduce las operaciones del estado sobre el árbol abstracto.
+
+        Returns:
+            Tupla (nodo, jugador abstracto de player_index); nodo es None si la mano ya terminó en el árbol
+        """
+        arbol = self.arbol
+        ciegas = [op for op in game_state.operations if type(op).__name__ == "BlindOrStraddlePosting"]
+        if not ciegas:
+            return None, 0
+        ciega_chica = min(ciegas, key=lambda op: op.amount).player_index
+        comprometido = [0] * game_state.player_count
+        calles_anteriores = [0] * game_state.player_count
+        apuestas = [0] * game_state.player_count
+        calle_real = 0
+        nodo = 0
+
+        for op in game_state.operations:
+            nombre = type(op).__name__
+            if nombre == "BlindOrStraddlePosting":
+                apuestas[op.player_index] = op.amount
+                comprometido[op.player_index] += op.amount
+            elif nombre == "BetCollection":
+                calles_anteriores = list(comprometido)
+                apuestas = [0] * game_state.player_count
+            elif nombre == "BoardDealing":
+                calle_real += 1
+            elif nombre in ("Folding", "CheckingOrCalling", "CompletionBettingOrRaisingTo"):
+                if nombre == "CheckingOrCalling":
+                    apuestas[op.player_index] += op.amount
+                    comprometido[op.player_index] += op.amount
+                    accion = IGUALAR
+                elif nombre == "Folding":
+                    accion = RETIRARSE
+                else:
+                    apuestas[op.player_index] = op.amount
+                    comprometido[op.player_index] = calles_anteriores[op.player_index] + op.amount
+                    all_in = comprometido[op.player_index] >= game_state.starting_stacks[op.player_index]
+                    accion = ALL_IN if all_in else SUBIR_POZO
+
+                nodo = self._sincronizar(nodo, calle_real)
+                if nodo is None:
+                    return None, 0
+                if arbol.calle[nodo] > calle_real:
+                    continue
+                hijos = arbol.hijos[nodo]
+                if hijos[accion] < 0:
+                    # Subidas fuera del árbol: all-in si se puede, si no igualar
+                    accion = ALL_IN if accion == SUBIR_POZO and hijos[ALL_IN] >= 0 else IGUALAR
+                nodo = hijos[accion]
+
+        nodo = self._sincronizar(nodo, calle_real)
+        return nodo, 0 if player_index == ciega_chica else 1
+
+    def _sincronizar(self, nodo, calle_real):
+        # Si el árbol quedó atrasado respecto de la calle real, se completa la calle pasando
+        while self.arbol.terminal[nodo] is None and self.arbol.calle[nodo] < calle_real:
+            nodo = self.arbol.hijos[nodo][IGUALAR]
+        return None if self.arbol.terminal[nodo] is not None else nodo
+
+    @staticmethod
+    def _igualar(available_actions):
+        for action_type, description, amount in available_actions:
+            if action_type in ["check", "call"]:
+                return action_type, amount
+        return available_actions[0][0], available_actions[0][2]
+
+    def _traducir(self, accion, game_state, available_actions):
+        """Convierte una acción abstracta en una acción real de available_actions."""
+        disponibles = {action_type: amount for action_type, description, amount in available_actions}
+        if accion == RETIRARSE and "fold" in disponibles:
+            return "fold", 0
+        if accion in (SUBIR_POZO, ALL_IN):
+            tipo = "bet" if "bet" in disponibles else ("raise" if "raise" in disponibles else None)
+            if accion == ALL_IN and "allin" in disponibles:
+                return "allin", disponibles["allin"]
+            if tipo is not None:
+                maximo = game_state.max_completion_betting_or_raising_to_amount
+                if accion == ALL_IN:
+                    return tipo, maximo
+                pozo = sum(game_state.starting_stacks) - sum(game_state.stacks)
+                a_igualar = max(game_state.bets) - min(game_state.bets)
+                subir_a = max(game_state.bets) + pozo + a_igualar
+                return tipo, max(disponibles[tipo], min(subir_a, maximo))
+        return self._igualar(available_actions)
+
+    def on_action_taken(self, player_index, action_type, amount, description):
+        print(f"🧮 {self.name} eligió: {description}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entrena una política CFR+ heads-up")
+    parser.add_argument("salida", help="Ruta de la política sin extensión")
+    parser.add_argument("--stack", type=int, default=200, help="Stack en ciegas chicas")
+    parser.add_argument("--max-subidas", type=int, default=2)
+    parser.add_argument("--buckets", type=int, default=10)
+    parser.add_argument("--tablas", default=None, help="Directorio de tablas de hand_buckets")
+    parser.add_argument("--rondas", type=int, default=100)
+    parser.add_argument("--iteraciones", type=int, default=1000, help="Iteraciones por ronda")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    entrenador = EntrenadorCFR(args.stack, args.max_subidas, args.buckets, args.tablas)
+    print(f"🌳 Árbol abstracto con {entrenador.arbol.num_decisiones:,} nodos de decisión")
+    entrenador.entrenar(args.rondas, args.iteraciones, args.procesos, args.semilla)
+    entrenador.exportar(args.salida)
+    print(f"✅ Política guardada en {args.salida}.npy ({entrenador.iteraciones:,} iteraciones)")
@@ -0,0 +1,119 @@
+"""
+Checkpoints de simulaciones largas.
+
+Un checkpoint guarda, al comienzo de una mano, todo lo necesario para retomar la corrida
+exactamente en ese punto: stacks, asientos, manos jugadas, el estado de las estrategias y
+el estado de los generadores aleatorios (pokerkit baraja con el módulo random global) y, si
+hay uno, el del ResultsAggregator de la corrida y la posición del DatasetWriter (filas ya
+registradas, para descartar al retomar las de las manos que se vuelven a jugar).
+Se escribe comprimido en un archivo temporal y se renombra, así que un proceso que muere
+a mitad de escritura nunca deja un checkpoint corrupto.
+"""
+import os
+import pickle
+import random
+import sys
+import zlib
+
+
+CHECKPOINT_VERSION = 1
+
+
+def capture_rng_state():
+    """Estado de random y, si ya está importado, del generador global de numpy"""
+    state = {"random": random.getstate()}
+    if "numpy" in sys.modules:
+        state["numpy"] = sys.modules["numpy"].random.get_state()
+    return state
+
+
+def restore_rng_state(state):
+    random.setstate(state["random"])
+    if "numpy" in state:
+        import numpy
+
+        numpy.random.set_state(state["numpy"])
+
+
+def _pickle_strategy(strategy):
+    # Si una estrategia no se puede serializar se guarda None y al retomar se usa la que se pase
+    try:
+        return pickle.dumps(strategy, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return None
+
+
+def save_checkpoint(path, player_strategies, final_stacks, seats, table_stacks, hands_played, blinds,
+                    aggregator=None, dataset_rows=None):
+    """
+    Guarda un checkpoint de repeated_hand_simulation al comienzo de una mano
+
+    Args:
+        path: Archivo del checkpoint
+        player_strategies: Estrategias originales de la corrida
+        final_stacks: Fichas de cada jugador original
+        seats: Jugador original que ocupa cada asiento de la mesa actual
+        table_stacks: Fichas de cada asiento para la mano que va a empezar
+        hands_played: Manos ya jugadas
+        blinds: Tupla con (small blind, big blind)
+        aggregator: ResultsAggregator de la corrida (opcional)
+        dataset_rows: Filas registradas por el DatasetWriter de la corrida (opcional)
+    """
+    data = {
+        "version": CHECKPOINT_VERSION,
+        "player_names": [strategy.get_name() for strategy in player_strategies],
+        "strategies": [_pickle_strategy(strategy) for strategy in player_strategies],
+        "final_stacks": list(final_stacks),
+        "seats": list(seats),
+        "table_stacks": list(table_stacks),
+        "hands_played": hands_played,
+        "blinds": tuple(blinds),
+        "rng": capture_rng_state(),
+        "aggregator": aggregator.to_dict() if aggregator is not None else None,
+        "dataset_rows": dataset_rows,
+    }
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def load_checkpoint(path, player_strategies):
+    """
+    Carga un checkpoint y restaura los generadores aleatorios
+
+    Args:
+        path: Archivo del checkpoint
+        player_strategies: Estrategias de la corrida, para validar y como respaldo de las no serializables
+
+    Returns:
+        Diccionario del checkpoint con "strategies" ya deserializadas, o None si no existe
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as file:
+        data = pickle.loads(zlib.decompress(file.read()))
+
+    if data.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Versión de checkpoint no soportada: {data.get('version')}")
+    names = [strategy.get_name() for strategy in player_strategies]
+    if data["player_names"] != names:
+        raise ValueError(
+            f"El checkpoint es de otros jugadores: {data['player_names']} (se pasaron {names})")
+
+    # Los checkpoints anteriores al agregador y al dataset no los tienen
+    data.setdefault("aggregator", None)
+    data.setdefault("dataset_rows", None)
+    data["strategies"] = [pickle.loads(blob) if blob is not None else strategy
+                          for blob, strategy in zip(data["strategies"], player_strategies)]
+    restore_rng_state(data["rng"])
+    return data
+
+
+def clear_checkpoint(path):
+    """Borra el checkpoint de una corrida terminada"""
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,194 @@
+"""
+Renderizado de la mesa en consola para el modo en vivo.
+
+Los textos con estilo de las 52 cartas se calculan una sola vez. ConsoleRenderer compara
+cada cuadro con el anterior y reescribe solo las líneas que cambiaron (stacks, apuestas,
+mesa, indicador de turno), todo en una única escritura por cuadro. Mientras se dibuja,
+lo que impriman las estrategias se acumula en un registro que forma parte del cuadro.
+
+Para capturar lo impreso se instala una sola vez un sys.stdout que reparte cada escritura según
+el contexto (contextvars): dentro de ConsoleRenderer.capture va al registro de ese renderer y
+fuera, a la salida original. Así varias mesas en hilos o tareas de asyncio pueden capturar a la
+vez sin pisarse.
+"""
+import collections
+import contextlib
+import contextvars
+import sys
+import threading
+
+
+CURSOR_UP = "\x1b[{}F"
+CURSOR_NEXT_LINE = "\x1b[E"
+CLEAR_LINE = "\x1b[2K"
+
+_card_glyphs = None
+_deuces_cards = None
+
+# Registro que recibe lo impreso en el contexto actual (None = la salida original)
+_active_sink = contextvars.ContextVar("console_renderer_sink", default=None)
+_install_lock = threading.Lock()
+
+
+def _build_tables():
+    global _card_glyphs, _deuces_cards
+    from deuces import Card, Deck
+
+    glyphs, deuces_cards = {}, {}
+    for card in Deck.GetFullDeck():
+        short_form = Card.int_to_str(card)
+        glyphs[short_form] = Card.int_to_pretty_str(card)
+        deuces_cards[short_form] = card
+    _card_glyphs, _deuces_cards = glyphs, deuces_cards
+
+
+def card_short_form(card):
+    """Forma corta ("Ah") de una carta de pokerkit, de deuces (int) o de un string"""
+    if isinstance(card, int):
+        from deuces import Card
+
+        return Card.int_to_str(card)
+    card_str = repr(card) if not isinstance(card, str) else card
+    if len(card_str) != 2 and "(" in card_str and ")" in card_str:
+        # Representación larga: "SIX OF DIAMONDS (6d)"
+        card_str = card_str[card_str.find("(") + 1:card_str.find(")")]
+    return card_str
+
+
+def card_glyph(card):
+    """Texto con estilo de una carta, igual al de deuces, o None si no es una carta conocida"""
+    if _card_glyphs is None:
+        _build_tables()
+    return _card_glyphs.get(card_short_form(card))
+
+
+def deuces_card(card):
+    """Entero de deuces de una carta, o None si no es una carta conocida"""
+    if _deuces_cards is None:
+        _build_tables()
+    return _deuces_cards.get(card_short_form(card))
+
+
+def format_cards(cards):
+    """
+    Línea con las cartas en el mismo formato que Card.print_pretty_cards de deuces
+    (las que no se reconocen se muestran en forma corta)
+    """
+    parts = []
+    for card in cards:
+        glyph = card_glyph(card)
+        parts.append(glyph if glyph is not None else f" {card_short_form(card)} ")
+    return ",".join(parts).strip()
+
+
+class _StdoutRouter:
+    """sys.stdout que escribe en el registro activo del contexto o, si no hay, en la salida original"""
+
+    def __init__(self, original):
+        self.original = original
+
+    def _target(self):
+        sink = _active_sink.get()
+        return sink if sink is not None else self.original
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def isatty(self):
+        return self._target().isatty()
+
+    def __getattr__(self, name):
+        return getattr(self.original, name)
+
+
+def _install_router():
+    with _install_lock:
+        if not isinstance(sys.stdout, _StdoutRouter):
+            sys.stdout = _StdoutRouter(sys.stdout)
+
+
+class _CapturedOutput:
+    """Destino de las escrituras capturadas: guarda las líneas impresas en el registro del renderer"""
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.pending = ""
+
+    def write(self, text):
+        with self.renderer.lock:
+            self.pending += text
+            *lines, self.pending = self.pending.split("\n")
+            self.renderer.log.extend(line for line in lines if line.strip())
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+class ConsoleRenderer:
+    """
+    Dibuja cuadros de texto con redibujado diferencial.
+
+    Args:
+        stream: Salida donde dibujar (por defecto sys.stdout al crear el renderer)
+        log_lines: Cantidad de mensajes de las estrategias que se muestran bajo la mesa
+    """
+
+    def __init__(self, stream=None, log_lines=6):
+        stream = stream or sys.stdout
+        # Los cuadros van a la salida real aunque se cree el renderer con el router instalado
+        self.stream = stream.original if isinstance(stream, _StdoutRouter) else stream
+        self.log = collections.deque(maxlen=log_lines)
+        self.log_lines = log_lines
+        self.lock = threading.RLock()
+        self.previous = None
+        self.interactive = hasattr(self.stream, "isatty") and self.stream.isatty()
+
+    def reset(self):
+        """El próximo cuadro se dibuja completo, debajo de lo que haya en la consola"""
+        with self.lock:
+            self.previous = None
+
+    @contextlib.contextmanager
+    def capture(self):
+        """Mientras dura, lo que se imprima por sys.stdout en este hilo o tarea va al registro del cuadro"""
+        _install_router()
+        token = _active_sink.set(_CapturedOutput(self))
+        try:
+            yield self
+        finally:
+            _active_sink.reset(token)
+
+    def render(self, lines):
+        """Dibuja un cuadro con las líneas dadas más el registro de mensajes"""
+        with self.lock:
+            frame = list(lines)
+            if self.log_lines:
+                frame += [""] + list(self.log) + [""] * (self.log_lines - len(self.log))
+
+            if not self.interactive or self.previous is None:
+                # Sin terminal no se puede mover el cursor: el cuadro se escribe completo
+                output = "\n".join(frame) + "\n"
+            else:
+                parts = [CURSOR_UP.format(len(self.previous))]
+                for i, line in enumerate(frame):
+                    if i < len(self.previous) and self.previous[i] == line:
+                        parts.append(CURSOR_NEXT_LINE)
+                    else:
+                        parts.append(CLEAR_LINE + line + "\n")
+                # Si el cuadro nuevo es más corto se limpian las líneas sobrantes
+                extra = len(self.previous) - len(frame)
+                if extra > 0:
+                    parts.append((CLEAR_LINE + "\n") * extra)
+                    parts.append(CURSOR_UP.format(extra))
+                output = "".join(parts)
+
+            self.stream.write(output)
+            self.stream.flush()
+            self.previous = frame
@@ -0,0 +1,302 @@
+"""
+Exportador de puntos de decisión a shards .npy para entrenar bots.
+
+InteractivePokerGame acepta un DatasetWriter (parámetro recorder, también en
+repeated_hand_simulation). Por cada decisión de get_player_action se prepara una fila de ancho
+fijo en un buffer de NumPy preasignado (features, acciones legales y acción elegida), que queda
+confirmada recién cuando execute_action ejecuta la acción; al terminar la mano se completa su
+resultado. Cuando un buffer se llena se le pasa a un hilo de fondo que lo guarda como shard
+mientras la mesa sigue escribiendo en el otro buffer.
+
+    with DatasetWriter("datos/") as recorder:
+        InteractivePokerGame.repeated_hand_simulation(strategies, max_hands=10000, recorder=recorder)
+
+    for shard in iter_shards("datos/"):  # arrays estructurados abiertos con mmap
+        x, y = shard["features"], shard["action"]
+
+Cada shard es un array estructurado (ver ROW_DTYPE) y manifest.json lista los shards, sus filas
+y los nombres de las columnas, así que el entrenamiento puede leerlos de a uno sin cargar todo.
+
+Las features son baratas a propósito (microsegundos por fila): la fuerza de mano es el percentil
+de Chen pre-flop y el percentil del rango de deuces después. Las cartas quedan en cada fila, así
+que las métricas caras (equity exacta, EHS) se pueden calcular offline sobre los shards.
+"""
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+
+FEATURE_NAMES = [
+    "pot", "to_call", "pot_odds", "effective_stack", "spr", "street", "board_card_count",
+    "active_opponents", "position", "hand_strength",
+    "paired", "flush_draw", "connectedness", "high_card",
+]
+# Tipos de acción del simulador, en el orden de la máscara de acciones legales
+ACTION_NAMES = ["fold", "check", "call", "bet", "raise", "allin"]
+ACTION_INDEX = {name: index for index, name in enumerate(ACTION_NAMES)}
+
+ROW_DTYPE = np.dtype([
+    ("info_set", np.uint64),
+    ("player", np.int8),
+    ("hole", np.int8, (2,)),
+    ("board", np.int8, (5,)),  # -1 = carta todavía no repartida
+    ("features", np.float32, (len(FEATURE_NAMES),)),
+    ("legal", np.bool_, (len(ACTION_NAMES),)),
+    ("legal_amounts", np.float32, (len(ACTION_NAMES),)),
+    ("action", np.int8),
+    ("amount", np.float32),
+    ("outcome", np.float32),  # fichas ganadas o perdidas en la mano, en ciegas grandes
+])
+
+# Margen del buffer sobre shard_rows para la mano en curso (play_hand corta a las 1000 acciones);
+# si una mano lo supera, el buffer crece
+MAX_HAND_ROWS = 1000
+SPR_CAP = 100.0
+
+
+def quick_strength(hole, board):
+    """
+    Fuerza de mano barata entre 0 y 1: percentil de Chen pre-flop y, con mesa, percentil del
+    rango de deuces de la mejor mano (1 = escalera real).
+    """
+    if len(hole) != 2:
+        return 0.0
+    if not board:
+        from cfr_solver import percentil_chen
+
+        return percentil_chen(hole)
+    from shared_evaluator import obtener_evaluador
+
+    return 1 - (obtener_evaluador().evaluate(list(hole), list(board)) - 1) / 7462
+
+
+def feature_row(game_state, player_index, available_actions=None):
+    """Vector float32 con FEATURE_NAMES de una decisión (montos en ciegas grandes)."""
+    from features import features_for
+
+    bb = max(game_state.blinds_or_straddles) or 1
+    f = features_for(game_state, player_index, available_actions)
+    texture = f.board_texture
+    return np.array((
+        f.pot / bb, f.to_call / bb, f.pot_odds, f.effective_stack / bb, min(f.spr, SPR_CAP),
+        f.street, f.board_card_count, f.active_opponents, f.position, quick_strength(f.hole_cards, f.board_cards),
+        texture["paired"], texture["flush_draw"], texture["connectedness"], texture["high_card"],
+    ), dtype=np.float32)
+
+
+def iter_shards(directory, mmap_mode="r"):
+    """Shards del manifest en orden, abiertos con np.load (por defecto con mmap)."""
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as manifest:
+        shards = json.load(manifest)["shards"]
+    for shard in shards:
+        yield np.load(os.path.join(directory, shard["file"]), mmap_mode=mmap_mode)
+
+
+class DatasetWriter:
+    """
+    Escribe filas de decisión en buffers preasignados y los guarda como shards en segundo plano.
+
+    Args:
+        directory: Carpeta de los shards y el manifest
+        shard_rows: Filas por shard (un shard se cierra al terminar la mano que lo llena)
+        buffers: Buffers preasignados; con 2, la mesa escribe en uno mientras se guarda el otro
+    """
+
+    def __init__(self, directory, shard_rows=1 << 18, buffers=2):
+        self.directory = directory
+        self.shard_rows = shard_rows
+        os.makedirs(directory, exist_ok=True)
+
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.shards = []
+        if os.path.exists(self.manifest_path):
+            # Se agregan shards a un dataset existente
+            with open(self.manifest_path, encoding="utf-8") as manifest:
+                self.shards = json.load(manifest)["shards"]
+        # Filas de manos terminadas ya mandadas a guardar (incluidas las de shards anteriores)
+        self.sent_rows = sum(shard["rows"] for shard in self.shards)
+
+        self.buffer_rows = shard_rows + MAX_HAND_ROWS
+        self.free = queue.Queue()
+        for _ in range(buffers):
+            self.free.put(np.zeros(self.buffer_rows, dtype=ROW_DTYPE))
+        self.pending = queue.Queue()
+        self.buffer = self.free.get()
+        self.rows = 0
+        self.hand_start = 0
+        self.staged = False
+        self.error = None
+        self.writer = threading.Thread(target=self._write_shards, daemon=True)
+        self.writer.start()
+
+    def record(self, game_state, available_actions, player_index, decision):
+        """
+        Prepara la fila de una decisión en el próximo lugar libre. Solo cuenta después de commit();
+        si la acción se rechaza, la siguiente decisión escribe encima.
+        """
+        from features import features_for
+        from zobrist import card_index
+
+        self.staged = False
+        if decision is None:
+            return
+        if self.rows == len(self.buffer):
+            self._grow()
+        bb = max(game_state.blinds_or_straddles) or 1
+        row = self.buffer[self.rows]
+        row["info_set"] = features_for(game_state, player_index, available_actions).info_set_hash
+        row["player"] = player_index
+        row["hole"] = [card_index(card) for card in game_state.hole_cards[player_index]]
+        board = [card_index(card) for cards in game_state.board_cards for card in cards]
+        row["board"] = board + [-1] * (5 - len(board))
+        row["features"] = feature_row(game_state, player_index, available_actions)
+        legal = np.zeros(len(ACTION_NAMES), dtype=bool)
+        amounts = np.zeros(len(ACTION_NAMES), dtype=np.float32)
+        for action_type, description, amount in available_actions:
+            legal[ACTION_INDEX[action_type]] = True
+            amounts[ACTION_INDEX[action_type]] = amount / bb
+        row["legal"] = legal
+        row["legal_amounts"] = amounts
+        row["action"] = ACTION_INDEX[decision[0]]
+        row["amount"] = decision[1] / bb
+        row["outcome"] = 0.0
+        self.staged = True
+
+    def commit(self):
+        """Confirma la fila preparada (InteractivePokerGame lo llama cuando la acción se ejecutó)."""
+        if self.staged:
+            self.rows += 1
+            self.staged = False
+
+    def _grow(self):
+        # Una mano más larga que el margen: se agranda este buffer (los demás siguen igual). Al
+        # volver a la lista de libres se reemplaza por uno del tamaño normal (ver _write_shards)
+        grown = np.zeros(2 * len(self.buffer), dtype=ROW_DTYPE)
+        grown[:self.rows] = self.buffer[:self.rows]
+        self.buffer = grown
+
+    def finish_hand(self, game_state):
+        """Completa el resultado de las filas de la mano y, si el buffer se llenó, lo manda a guardar."""
+        bb = max(game_state.blinds_or_straddles) or 1
+        hand = self.buffer[self.hand_start:self.rows]
+        results = np.array([(stack - start) / bb for stack, start in
+                            zip(game_state.stacks, game_state.starting_stacks)], dtype=np.float32)
+        hand["outcome"] = results[hand["player"]]
+        self.staged = False
+        self.hand_start = self.rows
+        if self.rows >= self.shard_rows:
+            self.flush()
+
+    @property
+    def committed_rows(self):
+        """Filas de manos terminadas, guardadas o en buffer (la posición que guarda un checkpoint)."""
+        return self.sent_rows + self.hand_start
+
+    def rewind(self, rows):
+        """
+        Deja el dataset en sus primeras rows filas de manos terminadas, borrando o recortando los
+        shards posteriores. repeated_hand_simulation lo llama al retomar un checkpoint para que las
+        manos que se vuelven a jugar no queden duplicadas. Si hay menos filas (el proceso murió con
+        un buffer sin guardar), esas manos no se recuperan.
+        """
+        self.pending.join()
+        if self.error is not None:
+            raise self.error
+        self.staged = False
+        saved = sum(shard["rows"] for shard in self.shards)
+        if rows >= saved:
+            self.rows = self.hand_start = min(self.hand_start, rows - saved)
+            self.sent_rows = saved
+            return
+        self.rows = self.hand_start = 0
+        while saved > rows:
+            shard = self.shards[-1]
+            path = os.path.join(self.directory, shard["file"])
+            keep = shard["rows"] - (saved - rows)
+            if keep <= 0:
+                os.remove(path)
+                self.shards.pop()
+                saved -= shard["rows"]
+            else:
+                np.save(path, np.load(path)[:keep])
+                shard["rows"] = keep
+                saved = rows
+        self.sent_rows = saved
+        self._write_manifest()
+
+    def discard_hand(self):
+        """Descarta las filas de una mano que se cortó sin resultado."""
+        self.rows = self.hand_start
+        self.staged = False
+
+    def flush(self):
+        """Manda el buffer actual (hasta la última mano terminada) al hilo de escritura."""
+        if self.error is not None:
+            raise self.error
+        if self.hand_start == 0:
+            return
+        full, rows = self.buffer, self.hand_start
+        leftover = self.rows - rows
+        # Se espera un buffer libre: si el disco va más lento que la mesa, la mesa se frena aquí
+        self.buffer = self.free.get()
+        # Las filas de una mano sin terminar pasan al buffer nuevo
+        if leftover > len(self.buffer):
+            # No entran: el buffer libre vuelve a la lista y esta vez se usa uno más grande
+            self.free.put(self.buffer)
+            self.buffer = np.zeros(2 * leftover, dtype=ROW_DTYPE)
+        self.buffer[:leftover] = full[rows:self.rows]
+        self.rows, self.hand_start = leftover, 0
+        self.sent_rows += rows
+        self.pending.put((full, rows))
+
+    def close(self):
+        """Guarda lo que quede y espera al hilo de escritura."""
+        self.flush()
+        self.pending.put(None)
+        self.writer.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write_shards(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            buffer, rows = item
+            try:
+                name = f"shard_{len(self.shards):05d}.npy"
+                np.save(os.path.join(self.directory, name), buffer[:rows])
+                self.shards.append({"file": name, "rows": int(rows)})
+                self._write_manifest()
+            except Exception as error:
+                self.error = error
+            finally:
+                # Los buffers agrandados no se reciclan, así la memoria queda en buffers * buffer_rows
+                if len(buffer) > self.buffer_rows:
+                    buffer = np.zeros(self.buffer_rows, dtype=ROW_DTYPE)
+                self.free.put(buffer)
+                self.pending.task_done()
+
+    def _write_manifest(self):
+        manifest = {
+            "rows": sum(shard["rows"] for shard in self.shards),
+            "feature_names": FEATURE_NAMES,
+            "action_names": ACTION_NAMES,
+            "dtype": [list(field) if len(field) == 2 else [field[0], field[1], list(field[2])]
+                      for field in ROW_DTYPE.descr],
+            "shards": self.shards,
+        }
+        # Se reemplaza de una vez para que un lector nunca vea el manifest a medio escribir
+        temporary = self.manifest_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(temporary, self.manifest_path)
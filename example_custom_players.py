@@ -1,10 +1,22 @@
 """
 Ejemplo de cómo crear jugadores personalizados para el simulador de poker
 """
+from features import features_for
 from playerstrategyABC import PlayerStrategy
 import random
 
 
+def action_weight(action_type, weights):
+    """Peso de una acción según su tipo, con pesos {"fold", "check_call", "bet_raise", "all_in"}"""
+    if action_type == "fold":
+        return weights["fold"]
+    elif action_type in ["check", "call"]:
+        return weights["check_call"]
+    elif action_type in ["bet", "raise"]:
+        return weights["bet_raise"]
+    return weights["all_in"]
+
+
 class SimpleAIStrategy(PlayerStrategy):
     """Estrategia de IA simple con comportamiento aleatorio"""
 
@@ -141,20 +153,8 @@ class CardCountingStrategy(PlayerStrategy):
         if not available_actions:
             return None
 
-        # Simular conteo de cartas básico
-        # En una implementación real, analizaríamos las cartas comunitarias
-        # y ajustaríamos las probabilidades
-
-        # Obtener información del estado
-        community_cards = []
-        try:
-            for cards in game_state.board_cards:
-                community_cards.extend(cards)
-        except (TypeError, AttributeError):
-            pass
-
-        # Estrategia basada en número de cartas comunitarias
-        num_community = len(community_cards)
+        # Las features de la mesa se comparten con las demás estrategias
+        num_community = features_for(game_state, player_index, available_actions).board_card_count
 
         action_weights = []
         for action_type, description, amount in available_actions:
@@ -183,9 +183,12 @@ class CardCountingStrategy(PlayerStrategy):
 class BluffingStrategy(PlayerStrategy):
     """Estrategia que incluye bluffs ocasionales"""
 
-    def __init__(self, name="Bluffer"):
+    DEFAULT_WEIGHTS = {"fold": 0.15, "check_call": 0.5, "bet_raise": 0.3, "all_in": 0.05}
+
+    def __init__(self, name="Bluffer", weights=None, bluff_frequency=0.2):
         self.name = name
-        self.bluff_frequency = 0.2  # 20% de las veces
+        self.weights = dict(self.DEFAULT_WEIGHTS, **(weights or {}))
+        self.bluff_frequency = bluff_frequency  # 20% de las veces por defecto
         self.last_bluff_round = -1
 
     def get_name(self):
@@ -209,16 +212,7 @@ class BluffingStrategy(PlayerStrategy):
         # Comportamiento normal - similar a SimpleAI pero más agresivo
         action_weights = []
         for action_type, description, amount in available_actions:
-            if action_type == "fold":
-                weight = 0.15
-            elif action_type in ["check", "call"]:
-                weight = 0.5
-            elif action_type in ["bet", "raise"]:
-                weight = 0.3
-            else:  # all-in
-                weight = 0.05
-
-            action_weights.append(weight)
+            action_weights.append(action_weight(action_type, self.weights))
 
         selected_action = random.choices(
             available_actions, weights=action_weights)[0]
@@ -280,8 +274,11 @@ class DataCollectionStrategy(PlayerStrategy):
 class SimpleAIStrategy(PlayerStrategy):
     """Estrategia de IA simple con comportamiento aleatorio"""
 
-    def __init__(self, name="Bot"):
+    DEFAULT_WEIGHTS = {"fold": 0.2, "check_call": 0.6, "bet_raise": 0.15, "all_in": 0.05}
+
+    def __init__(self, name="Bot", weights=None):
         self.name = name
+        self.weights = dict(self.DEFAULT_WEIGHTS, **(weights or {}))
 
     def get_name(self):
         return self.name
@@ -297,16 +294,7 @@ class SimpleAIStrategy(PlayerStrategy):
         action_weights = []
 
         for action_type, description, amount in available_actions:
-            if action_type == "fold":
-                weight = 0.2  # 20% probabilidad de fold
-            elif action_type in ["check", "call"]:
-                weight = 0.6  # 60% probabilidad de check/call
-            elif action_type in ["bet", "raise"]:
-                weight = 0.15  # 15% probabilidad de apostar/subir
-            else:  # all-in
-                weight = 0.05  # 5% probabilidad de all-in
-
-            action_weights.append(weight)
+            action_weights.append(action_weight(action_type, self.weights))
 
         # Seleccionar acción basada en probabilidades
         selected_action = random.choices(
@@ -322,8 +310,11 @@ class SimpleAIStrategy(PlayerStrategy):
 class AggressiveAIStrategy(PlayerStrategy):
     """Estrategia de IA más agresiva"""
 
-    def __init__(self, name="Bot Agresivo"):
+    DEFAULT_WEIGHTS = {"fold": 0.1, "check_call": 0.3, "bet_raise": 0.5, "all_in": 0.1}
+
+    def __init__(self, name="Bot Agresivo", weights=None):
         self.name = name
+        self.weights = dict(self.DEFAULT_WEIGHTS, **(weights or {}))
 
     def get_name(self):
         return self.name
@@ -338,16 +329,7 @@ class AggressiveAIStrategy(PlayerStrategy):
         action_weights = []
 
         for action_type, description, amount in available_actions:
-            if action_type == "fold":
-                weight = 0.1  # 10% probabilidad de fold
-            elif action_type in ["check", "call"]:
-                weight = 0.3  # 30% probabilidad de check/call
-            elif action_type in ["bet", "raise"]:
-                weight = 0.5  # 50% probabilidad de apostar/subir
-            else:  # all-in
-                weight = 0.1  # 10% probabilidad de all-in
-
-            action_weights.append(weight)
+            action_weights.append(action_weight(action_type, self.weights))
 
         selected_action = random.choices(
             available_actions, weights=action_weights)[0]
@@ -397,3 +379,38 @@ class ConservativeAIStrategy(PlayerStrategy):
 
     def on_action_taken(self, player_index, action_type, amount, description):
         print(f"🛡️ {self.name} eligió: {description}")
+
+
+class MCTSStrategy(PlayerStrategy):
+    """
+    Estrategia de búsqueda: IS-MCTS con un tiempo fijo por decisión (ver mcts.py). El árbol se
+    reutiliza entre las decisiones de una misma mano.
+    """
+
+    # Módulos que cambian sus decisiones (ver league.version_estrategia)
+    DEPENDENCIAS = ("mcts", "rollout")
+    # Piensa tiempo segundos por decisión: league.agregar_ejemplos no la registra sola
+    BUSQUEDA = True
+
+    def __init__(self, name="Bot MCTS", tiempo=1.0, procesos=1, exploracion=1.0, pesos_rollout=None):
+        from mcts import BuscadorMCTS
+
+        self.name = name
+        self.buscador = BuscadorMCTS(tiempo=tiempo, exploracion=exploracion, pesos_rollout=pesos_rollout,
+                                     procesos=procesos)
+
+    def get_name(self):
+        return self.name
+
+    def make_decision(self, game_state, available_actions, player_index):
+        if not available_actions:
+            return None
+
+        tipo, monto = self.buscador.decidir(game_state, player_index)
+        for action_type, description, amount in available_actions:
+            if action_type == tipo:
+                return action_type, amount
+        return available_actions[0][0], available_actions[0][2]
+
+    def on_action_taken(self, player_index, action_type, amount, description):
+        print(f"🌳 {self.name} eligió: {description} ({self.buscador.iteraciones:,} iteraciones)")
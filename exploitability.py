@@ -0,0 +1,352 @@
+"""
+Explotabilidad aproximada de cualquier PlayerStrategy en heads-up, con una mejor respuesta sobre
+el juego abstracto de cfr_solver (ArbolApuestas y AbstraccionCartas).
+
+1. Política del bot: para cada nodo de decisión del árbol donde actúa el bot, se reproduce el
+   camino de acciones abstractas en una mesa real del simulador con cartas al azar, se le pide la
+   decisión al bot y se la traduce a la acción abstracta. Las frecuencias por (nodo, bucket de su
+   mano) estiman su política. Los nodos se reparten entre procesos y los conteos se guardan en
+   disco por versión del bot (league.version_estrategia): correr de nuevo suma muestras en vez de
+   repetir consultas.
+2. Mejor respuesta: con repartos de cartas al azar (buckets de los dos jugadores en cada calle y
+   ganador del showdown), se recorre el árbol con vectores de NumPy sobre todos los repartos a la
+   vez. En cada nodo de la mejor respuesta se elige, por bucket, la acción con mayor valor
+   ponderado por la probabilidad de que el bot llegue ahí.
+3. La política de mejor respuesta se elige con la mitad de los repartos y se evalúa con la otra
+   mitad, así el valor no está inflado por el sobreajuste a los repartos.
+
+La mejor respuesta solo ve el bucket de su mano y juega las acciones del árbol, así que el
+resultado es una cota inferior de la explotabilidad real. Se reporta en mbb/mano (milésimas de
+ciega grande por mano), promediando los dos asientos.
+
+Uso:
+
+    python exploitability.py CLANKER:ClankerStrategy --muestras 20 --repartos 40000 --procesos 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from CLANKER import MAZO
+from cfr_solver import ALL_IN, IGUALAR, NUM_ACCIONES, RETIRARSE, SUBIR_POZO, AbstraccionCartas, ArbolApuestas
+from league import cargar_clase, version_estrategia
+
+
+class _Relleno:
+    """Asiento de la mejor respuesta en la mesa real: sus acciones las dicta el camino abstracto."""
+
+    def get_name(self):
+        return "Mejor respuesta"
+
+    def on_action_taken(self, player_index, action_type, amount, description):
+        pass
+
+
+def caminos(arbol):
+    """Camino de acciones abstractas desde la raíz hasta cada nodo del árbol."""
+    resultado = [None] * len(arbol.jugador)
+    resultado[0] = ()
+    # Los hijos siempre tienen un id mayor que el padre
+    for nodo, hijos in enumerate(arbol.hijos):
+        for accion, hijo in enumerate(hijos):
+            if hijo >= 0:
+                resultado[hijo] = resultado[nodo] + (accion,)
+    return resultado
+
+
+def _aplicar(juego, arbol, nodo, accion, escala):
+    """Ejecuta una acción abstracta en la mesa real. Retorna False si no es legal ahí."""
+    disponibles = {tipo: monto for tipo, descripcion, monto in juego.get_available_actions()}
+    if accion == RETIRARSE:
+        return "fold" in disponibles and juego.execute_action("fold", 0)
+    if accion == IGUALAR:
+        tipo = "check" if "check" in disponibles else "call"
+        return tipo in disponibles and juego.execute_action(tipo, disponibles[tipo])
+    tipo = "bet" if "bet" in disponibles else "raise"
+    if tipo not in disponibles:
+        return False
+    maximo = juego.state.max_completion_betting_or_raising_to_amount
+    if accion == ALL_IN:
+        return juego.execute_action("allin" if "allin" in disponibles else tipo, maximo)
+    actor = arbol.jugador[nodo]
+    hijo = arbol.hijos[nodo][accion]
+    # Los aportes del árbol son de toda la mano; pokerkit sube "a" un monto de la calle
+    indice = 1 - actor
+    subir_a = juego.state.bets[indice] + (arbol.aportes[hijo][actor] - arbol.aportes[nodo][actor]) * escala
+    return juego.execute_action(tipo, max(disponibles[tipo], min(subir_a, maximo)))
+
+
+def _abstraer(arbol, nodo, decision, game_state):
+    """Traduce la decisión real del bot a una acción abstracta disponible en el nodo."""
+    tipo, monto = decision
+    if tipo == "fold":
+        accion = RETIRARSE
+    elif tipo in ("check", "call"):
+        accion = IGUALAR
+    elif tipo == "allin" or monto >= (game_state.max_completion_betting_or_raising_to_amount or 0):
+        accion = ALL_IN
+    else:
+        accion = SUBIR_POZO
+    hijos = arbol.hijos[nodo]
+    if hijos[accion] < 0:
+        # Igual que CFRPolicyStrategy.nodo_abstracto: subidas fuera del árbol van al all-in
+        accion = ALL_IN if accion == SUBIR_POZO and hijos[ALL_IN] >= 0 else IGUALAR
+    return accion
+
+
+def _muestrear_nodos(tarea):
+    """
+    Tarea de un proceso: consulta al bot en los nodos dados y retorna los conteos
+    {fila (nodo de decisión, bucket): [conteo por acción]}.
+    """
+    (ruta_clase, kwargs, stack, max_subidas, num_buckets, directorio_tablas,
+     nodos, muestras, escala, semilla) = tarea
+    from pokerSimulator import InteractivePokerGame, convert_pokerkit_to_deuces_cards
+
+    arbol = ArbolApuestas(stack, max_subidas)
+    abstraccion = AbstraccionCartas(num_buckets, directorio_tablas)
+    rutas = caminos(arbol)
+    bot = cargar_clase(ruta_clase)(name="Bot", **kwargs)
+    relleno = _Relleno()
+    # pokerkit baraja con el módulo random al crear la mesa
+    random.seed(semilla)
+    conteos = {}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for nodo in nodos:
+            jugador = arbol.jugador[nodo]
+            # Abstracto 0 = ciega chica = índice 1 de pokerkit en heads-up
+            indice = 1 - jugador
+            estrategias = [relleno, relleno]
+            estrategias[indice] = bot
+            for _ in range(muestras):
+                juego = InteractivePokerGame(estrategias, [stack * escala] * 2, (escala, 2 * escala))
+                actual = 0
+                for accion in rutas[nodo]:
+                    if not _aplicar(juego, arbol, actual, accion, escala):
+                        break
+                    actual = arbol.hijos[actual][accion]
+                if actual != nodo or not juego.state.actor_indices or juego.state.actor_indices[0] != indice:
+                    continue
+                try:
+                    decision = bot.make_decision(juego.state, juego.get_available_actions(), indice)
+                except Exception:
+                    continue
+                if decision is None:
+                    continue
+                mano = convert_pokerkit_to_deuces_cards(juego.state.hole_cards[indice])
+                mesa = convert_pokerkit_to_deuces_cards([carta for cartas in juego.state.board_cards
+                                                         for carta in cartas])
+                fila = arbol.id_decision[nodo] * num_buckets + abstraccion.bucket(mano, mesa)
+                conteos.setdefault(fila, [0] * NUM_ACCIONES)[_abstraer(arbol, nodo, decision, juego.state)] += 1
+    return conteos
+
+
+def _repartos(tarea):
+    """Tarea de un proceso: buckets (repartos, jugador, calle) y ganador (-1 = empate) de repartos al azar."""
+    num_buckets, directorio_tablas, cantidad, semilla = tarea
+    from shared_evaluator import obtener_evaluador
+
+    abstraccion = AbstraccionCartas(num_buckets, directorio_tablas)
+    evaluador = obtener_evaluador()
+    rng = random.Random(semilla)
+    buckets = np.empty((cantidad, 2, 4), dtype=np.int16)
+    ganador = np.empty(cantidad, dtype=np.int8)
+    for i in range(cantidad):
+        cartas = rng.sample(MAZO, 9)
+        manos = (cartas[0:2], cartas[2:4])
+        mesa = cartas[4:]
+        for jugador, mano in enumerate(manos):
+            buckets[i, jugador] = abstraccion.buckets_por_calle(mano, mesa)
+        rangos = [evaluador.evaluate(mano, mesa) for mano in manos]
+        ganador[i] = -1 if rangos[0] == rangos[1] else (0 if rangos[0] < rangos[1] else 1)
+    return buckets, ganador
+
+
+def valor_mejor_respuesta(arbol, sigma, buckets, ganador, jugador, num_buckets, politica_fija=None):
+    """
+    Valor medio (en ciegas chicas) del jugador que responde contra sigma, sobre los repartos dados.
+
+    Args:
+        sigma: Política del bot, (decisiones * buckets, acciones)
+        buckets, ganador: Repartos de _repartos
+        jugador: Asiento abstracto de la mejor respuesta (0 = ciega chica)
+        politica_fija: Acción por (nodo de decisión, bucket) a jugar; None = elegir la mejor
+
+    Returns:
+        Tupla (valor medio, política por (nodo de decisión, bucket); -1 donde no se decidió)
+    """
+    bot = 1 - jugador
+    politica = np.full((arbol.num_decisiones, num_buckets), -1, dtype=np.int8)
+    sd_gana = ganador == jugador
+    sd_pierde = ganador == bot
+
+    def recorrer(nodo, alcance):
+        terminal = arbol.terminal[nodo]
+        if terminal is not None:
+            aportes = arbol.aportes[nodo]
+            if terminal == "showdown":
+                return np.where(sd_gana, aportes[bot], np.where(sd_pierde, -aportes[jugador], 0.0))
+            return np.full(len(alcance), aportes[bot] if terminal[1] == jugador else -aportes[jugador], dtype=float)
+        if not alcance.any():
+            return np.zeros(len(alcance))
+
+        calle = arbol.calle[nodo]
+        decision = arbol.id_decision[nodo]
+        hijos = arbol.hijos[nodo]
+        if arbol.jugador[nodo] == bot:
+            probabilidades = sigma[decision * num_buckets + buckets[:, bot, calle]]
+            valor = np.zeros(len(alcance))
+            for accion, hijo in enumerate(hijos):
+                if hijo >= 0:
+                    p = probabilidades[:, accion]
+                    valor += p * recorrer(hijo, alcance * p)
+            return valor
+
+        propios = buckets[:, jugador, calle]
+        acciones = [accion for accion, hijo in enumerate(hijos) if hijo >= 0]
+        valores = np.stack([recorrer(hijos[accion], alcance) for accion in acciones])
+        if politica_fija is not None:
+            elegidas = politica_fija[decision]
+            # Buckets que no aparecieron al elegir la política: se iguala
+            elegidas = np.where(elegidas >= 0, elegidas, IGUALAR)
+            eleccion = np.array([acciones.index(a) if a in acciones else acciones.index(IGUALAR)
+                                 for a in elegidas])
+        else:
+            # Valor de cada acción sumado por bucket, ponderado por el alcance del bot
+            sumas = np.stack([np.bincount(propios, weights=alcance * v, minlength=num_buckets) for v in valores])
+            eleccion = sumas.argmax(axis=0)
+            vistos = np.bincount(propios, weights=alcance, minlength=num_buckets) > 0
+            politica[decision] = np.where(vistos, np.array(acciones)[eleccion], -1)
+        return valores[eleccion[propios], np.arange(len(alcance))]
+
+    valor = recorrer(0, np.ones(len(ganador)))
+    return float(valor.mean()), politica
+
+
+class EvaluadorExplotabilidad:
+    """
+    Explotabilidad aproximada de una estrategia heads-up.
+
+    Args:
+        ruta_clase: Clase de la estrategia como "modulo:Clase"
+        kwargs: Argumentos de la estrategia (además de name)
+        stack: Profundidad en ciegas chicas (como en cfr_solver)
+        max_subidas, num_buckets, directorio_tablas: Abstracción (como en cfr_solver)
+        procesos: Procesos del pool
+        directorio_cache: Carpeta donde se guardan los conteos de consultas al bot (None = sin caché)
+        escala: Fichas reales por ciega chica en las mesas de consulta
+    """
+
+    def __init__(self, ruta_clase, kwargs=None, stack=200, max_subidas=2, num_buckets=10, directorio_tablas=None,
+                 procesos=None, directorio_cache="cache_explotabilidad", escala=50):
+        self.ruta_clase = ruta_clase
+        self.kwargs = dict(kwargs or {})
+        self.stack = stack
+        self.max_subidas = max_subidas
+        self.num_buckets = num_buckets
+        self.directorio_tablas = directorio_tablas
+        self.procesos = procesos or os.cpu_count() or 1
+        self.escala = escala
+        self.arbol = ArbolApuestas(stack, max_subidas)
+        self.conteos = np.zeros((self.arbol.num_decisiones * num_buckets, NUM_ACCIONES))
+
+        self.ruta_cache = None
+        if directorio_cache is not None:
+            os.makedirs(directorio_cache, exist_ok=True)
+            nombre = f"{version_estrategia(ruta_clase, self.kwargs)}_{stack}_{max_subidas}_{num_buckets}.npy"
+            self.ruta_cache = os.path.join(directorio_cache, nombre)
+            if os.path.exists(self.ruta_cache):
+                self.conteos = np.load(self.ruta_cache)
+
+    def muestrear_politica(self, muestras_por_nodo=20, semilla=0):
+        """Suma muestras_por_nodo consultas al bot en cada nodo donde actúa (en los dos asientos)."""
+        nodos = list(self.arbol.nodos_decision)
+        # Nodos intercalados para que cada proceso reciba caminos cortos y largos
+        tareas = [(self.ruta_clase, self.kwargs, self.stack, self.max_subidas, self.num_buckets,
+                   self.directorio_tablas, nodos[i::self.procesos], muestras_por_nodo, self.escala,
+                   semilla * 1_000_003 + int(self.conteos.sum()) + i)
+                  for i in range(self.procesos)]
+        with ProcessPoolExecutor(max_workers=self.procesos) as pool:
+            for conteos in pool.map(_muestrear_nodos, tareas):
+                for fila, valores in conteos.items():
+                    self.conteos[fila] += valores
+        if self.ruta_cache is not None:
+            np.save(self.ruta_cache, self.conteos)
+
+    def politica(self, suavizado=1.0):
+        """
+        Política estimada del bot. Cada fila se suaviza hacia el promedio de su nodo (sobre todos
+        los buckets), así los buckets con pocas o ninguna muestra no quedan arbitrarios.
+        """
+        mascara = np.repeat(self.arbol.mascara, self.num_buckets, axis=0)
+        por_nodo = self.conteos.reshape(self.arbol.num_decisiones, self.num_buckets, NUM_ACCIONES).sum(axis=1)
+        por_nodo = np.repeat(por_nodo + self.arbol.mascara, self.num_buckets, axis=0)
+        previa = por_nodo / por_nodo.sum(axis=1, keepdims=True)
+        sigma = (self.conteos + suavizado * previa) * mascara
+        return sigma / sigma.sum(axis=1, keepdims=True)
+
+    def repartos(self, cantidad, semilla=0):
+        por_proceso = -(-cantidad // self.procesos)
+        tareas = [(self.num_buckets, self.directorio_tablas, por_proceso, semilla * 1_000_003 + i)
+                  for i in range(self.procesos)]
+        with ProcessPoolExecutor(max_workers=self.procesos) as pool:
+            partes = list(pool.map(_repartos, tareas))
+        return np.concatenate([b for b, g in partes]), np.concatenate([g for b, g in partes])
+
+    def evaluar(self, repartos=40000, semilla=0):
+        """
+        Returns:
+            Diccionario con mbb_por_mano (promedio de los dos asientos), valor_por_asiento (ciegas
+            chicas por mano de la mejor respuesta como ciega chica y como ciega grande) y politicas
+            (acción de la mejor respuesta por nodo de decisión y bucket, para cada asiento)
+        """
+        sigma = self.politica()
+        buckets, ganador = self.repartos(repartos, semilla)
+        mitad = len(ganador) // 2
+        valores, politicas = [], []
+        for jugador in (0, 1):
+            _, politica = valor_mejor_respuesta(self.arbol, sigma, buckets[:mitad], ganador[:mitad], jugador,
+                                                self.num_buckets)
+            valor, _ = valor_mejor_respuesta(self.arbol, sigma, buckets[mitad:], ganador[mitad:], jugador,
+                                             self.num_buckets, politica_fija=politica)
+            valores.append(valor)
+            politicas.append(politica)
+        # Ciegas chicas -> ciegas grandes -> milésimas
+        return {
+            "mbb_por_mano": sum(valores) / 2 / 2 * 1000,
+            "valor_por_asiento": tuple(valores),
+            "politicas": politicas,
+        }
+
+
+if __name__ == "__main__":
+    import json
+
+    parser = argparse.ArgumentParser(description="Explotabilidad aproximada de una estrategia heads-up")
+    parser.add_argument("clase", help='Estrategia como "modulo:Clase"')
+    parser.add_argument("--kwargs", default="{}", help="Argumentos de la estrategia en JSON")
+    parser.add_argument("--stack", type=int, default=200, help="Stack en ciegas chicas")
+    parser.add_argument("--max-subidas", type=int, default=2)
+    parser.add_argument("--buckets", type=int, default=10)
+    parser.add_argument("--tablas", default=None, help="Directorio de tablas de hand_buckets")
+    parser.add_argument("--muestras", type=int, default=20, help="Consultas al bot por nodo")
+    parser.add_argument("--repartos", type=int, default=40000)
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--cache", default="cache_explotabilidad")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    evaluador = EvaluadorExplotabilidad(args.clase, json.loads(args.kwargs), args.stack, args.max_subidas,
+                                        args.buckets, args.tablas, args.procesos, args.cache)
+    if args.muestras > 0:
+        evaluador.muestrear_politica(args.muestras, args.semilla)
+    resultado = evaluador.evaluar(args.repartos, args.semilla)
+    chica, grande = resultado["valor_por_asiento"]
+    print(f"🎯 Explotabilidad: {resultado['mbb_por_mano']:,.0f} mbb/mano "
+          f"(mejor respuesta: {chica / 2:+.3f} bb como ciega chica, {grande / 2:+.3f} bb como ciega grande)")
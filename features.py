@@ -0,0 +1,253 @@
+"""
+Features de decisión compartidas y memoizadas para las estrategias.
+
+Todas las estrategias de una mesa reciben el mismo objeto de estado de pokerkit, así que el
+pipeline se asocia a ese estado: lo que calcula una estrategia lo reutilizan las demás.
+
+    from features import features_for
+
+    def make_decision(self, game_state, available_actions, player_index):
+        f = features_for(game_state, player_index, available_actions)
+        if f.pot_odds < f.hand_strength:
+            ...
+
+Las features de apuestas (pozo, a igualar, pot odds, SPR) se calculan al pedirlas y se
+memoizan en la decisión. Las que dependen de las cartas (fuerza de mano, textura de la mesa)
+se guardan por jugador y se invalidan solo cuando cambia la mesa, es decir, al cambiar de calle.
+"""
+import weakref
+
+
+STREET_NAMES = ["preflop", "flop", "turn", "river"]
+
+# Id del estado de pokerkit -> pipeline. Las entradas se borran cuando el estado se libera
+_pipelines = {}
+
+
+class FeaturePipeline:
+    """Caché de features de una mesa (un estado de pokerkit)"""
+
+    def __init__(self):
+        # jugador -> (mesa, {feature: valor})
+        self.hand_cache = {}
+        # mesa -> {feature: valor}
+        self.board_cache = {}
+        # ZobristHasher de la mano (lo crea InteractivePokerGame o, si no, la primera consulta)
+        self.hasher = None
+        # observador -> SeguidorRangos
+        self.range_trackers = {}
+
+    @staticmethod
+    def for_state(game_state):
+        """Pipeline asociado al estado, creándolo la primera vez"""
+        key = id(game_state)
+        pipeline = _pipelines.get(key)
+        if pipeline is None:
+            pipeline = _pipelines[key] = FeaturePipeline()
+            weakref.finalize(game_state, _pipelines.pop, key, None)
+        return pipeline
+
+    def hand_value(self, player_index, board_key, name, compute):
+        board, values = self.hand_cache.get(player_index, (None, None))
+        if board != board_key:
+            values = {}
+            self.hand_cache[player_index] = (board_key, values)
+        if name not in values:
+            values[name] = compute()
+        return values[name]
+
+    def board_value(self, board_key, name, compute):
+        values = self.board_cache.setdefault(board_key, {})
+        if name not in values:
+            values[name] = compute()
+        return values[name]
+
+
+def features_for(game_state, player_index, available_actions=None):
+    """Features de la decisión actual de player_index"""
+    return DecisionFeatures(game_state, player_index, available_actions,
+                            FeaturePipeline.for_state(game_state))
+
+
+class _memoized:
+    """Propiedad que se calcula una vez por decisión"""
+
+    def __init__(self, function):
+        self.function = function
+        self.name = function.__name__
+        self.__doc__ = function.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = self.function(instance)
+        instance.__dict__[self.name] = value
+        return value
+
+
+class DecisionFeatures:
+    """
+    Features de un punto de decisión, evaluadas al pedirlas
+
+    Args:
+        game_state: Estado de pokerkit
+        player_index: Jugador que decide
+        available_actions: Acciones disponibles (opcional)
+        pipeline: FeaturePipeline de la mesa
+    """
+
+    def __init__(self, game_state, player_index, available_actions, pipeline):
+        self.state = game_state
+        self.player_index = player_index
+        self.available_actions = available_actions or []
+        self.pipeline = pipeline
+
+    # --- Apuestas ---
+
+    @_memoized
+    def pot(self):
+        """Fichas en el pozo, incluidas las apuestas de la calle actual"""
+        return sum(self.state.starting_stacks) - sum(self.state.stacks)
+
+    @_memoized
+    def to_call(self):
+        """Fichas que faltan para igualar"""
+        bets = self.state.bets
+        return max(bets) - bets[self.player_index] if bets else 0
+
+    @_memoized
+    def pot_odds(self):
+        """Fracción del pozo final que hay que poner para igualar"""
+        return self.to_call / (self.pot + self.to_call) if self.to_call else 0.0
+
+    @_memoized
+    def effective_stack(self):
+        """Stack del jugador acotado por el mayor stack de los rivales activos"""
+        rivals = [stack for i, stack in enumerate(self.state.stacks)
+                  if i != self.player_index and self.state.statuses[i]]
+        return min(self.state.stacks[self.player_index], max(rivals)) if rivals else 0
+
+    @_memoized
+    def spr(self):
+        """Stack-to-pot ratio"""
+        return self.effective_stack / self.pot if self.pot else float("inf")
+
+    # --- Mesa y posición ---
+
+    @_memoized
+    def street(self):
+        """Índice de la calle (0 = pre-flop ... 3 = river)"""
+        street_index = self.state.street_index
+        return min(street_index, 3) if street_index is not None else 3
+
+    @_memoized
+    def street_name(self):
+        return STREET_NAMES[self.street]
+
+    @_memoized
+    def board_cards(self):
+        """Cartas comunitarias en formato deuces"""
+        from pokerSimulator import convert_pokerkit_to_deuces_cards
+
+        return tuple(convert_pokerkit_to_deuces_cards(
+            [card for cards in self.state.board_cards for card in cards]))
+
+    @_memoized
+    def board_card_count(self):
+        return len(self.board_cards)
+
+    @_memoized
+    def hole_cards(self):
+        """Cartas del jugador en formato deuces"""
+        from pokerSimulator import convert_pokerkit_to_deuces_cards
+
+        return tuple(convert_pokerkit_to_deuces_cards(self.state.hole_cards[self.player_index]))
+
+    @_memoized
+    def active_opponents(self):
+        return sum(1 for i, status in enumerate(self.state.statuses) if status and i != self.player_index)
+
+    @_memoized
+    def position(self):
+        """Posición post-flop entre 0 (actúa primero) y 1 (botón, actúa último)"""
+        count = self.state.player_count
+        return self.player_index / (count - 1) if count > 1 else 1.0
+
+    @_memoized
+    def info_set_hash(self):
+        """Hash Zobrist de 64 bits de lo que sabe el jugador (ver zobrist.py)"""
+        if self.pipeline.hasher is None:
+            from zobrist import ZobristHasher
+
+            self.pipeline.hasher = ZobristHasher()
+        return self.pipeline.hasher.info_set_hash(self.state, self.player_index)
+
+    @_memoized
+    def opponent_ranges(self):
+        """Rangos bayesianos de los rivales activos: {rival: pesos de los 1326 combos} (ver ranges.py)"""
+        from ranges import SeguidorRangos, fuerza_combos
+
+        tracker = self.pipeline.range_trackers.get(self.player_index)
+        if tracker is None:
+            # La fuerza de los combos depende solo de la mesa: se comparte entre observadores
+            def strengths(board):
+                return self.pipeline.board_value(board, "combo_strength", lambda: fuerza_combos(board))
+
+            tracker = SeguidorRangos(self.player_index, self.state.player_count, strengths)
+            self.pipeline.range_trackers[self.player_index] = tracker
+        tracker.sync(self.state)
+        return tracker.rangos_rivales()
+
+    # --- Cartas (caché por jugador y por mesa) ---
+
+    @_memoized
+    def hand_strength(self):
+        """
+        Probabilidad estimada de ganar contra los rivales activos con manos aleatorias.
+
+        Pre-flop usa el percentil del puntaje de Chen; en el flop, el EHS de hand_buckets; en el
+        turn y el river, la equity exacta de CLANKER (con más de dos rivales se extrapola la de uno).
+        """
+        return self.pipeline.hand_value(self.player_index, self.board_cards, "hand_strength",
+                                        self._compute_hand_strength)
+
+    def _compute_hand_strength(self):
+        hole, board = list(self.hole_cards), list(self.board_cards)
+        opponents = max(1, self.active_opponents)
+        if len(hole) != 2:
+            return 0.0
+        if not board:
+            from cfr_solver import percentil_chen
+
+            return percentil_chen(hole)
+        if len(board) == 3:
+            from hand_buckets import metricas_situacion
+
+            return metricas_situacion(hole, board)[0] ** opponents
+
+        from CLANKER import equity_exacta
+
+        if opponents <= 2:
+            return equity_exacta(hole, board, opponents)
+        return equity_exacta(hole, board, 1) ** opponents
+
+    @_memoized
+    def board_texture(self):
+        """
+        Textura de la mesa: diccionario con paired, flush_draw (máximo de cartas de un palo),
+        connectedness (máximo de rangos distintos en una ventana de escalera) y high_card (2-14)
+        """
+        return self.pipeline.board_value(self.board_cards, "board_texture", self._compute_board_texture)
+
+    def _compute_board_texture(self):
+        if not self.board_cards:
+            return {"paired": False, "flush_draw": 0, "connectedness": 0, "high_card": 0}
+        ranks = [((card >> 8) & 0xF) + 2 for card in self.board_cards]
+        suits = [(card >> 12) & 0xF for card in self.board_cards]
+        distinct = set(ranks) | ({1} if 14 in ranks else set())
+        return {
+            "paired": len(set(ranks)) < len(ranks),
+            "flush_draw": max(suits.count(suit) for suit in set(suits)),
+            "connectedness": max(sum(1 for rank in distinct if low <= rank < low + 5) for low in range(1, 11)),
+            "high_card": max(ranks),
+        }
@@ -0,0 +1,339 @@
+"""
+Tablas offline de fuerza de mano (EHS / potencial) agrupadas en buckets para el flop y el turn.
+
+El pipeline recorre todas las situaciones canónicas (mano + mesa salvo permutación de palos),
+calcula para cada una EHS, EHS², potencial positivo y potencial negativo, las agrupa con
+k-means y guarda el bucket de cada situación en un arreglo memory-mapped. Durante el juego
+una estrategia obtiene el bucket en O(1) con TablaBuckets.bucket(mano, mesa).
+
+Uso offline:
+
+    python hand_buckets.py tablas/ --calles flop turn --buckets 50
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from CLANKER import INDICE_CARTA, MAZO
+from shared_evaluator import obtener_evaluador
+
+
+CALLES = {"flop": 3, "turn": 4}
+
+# Orden de las métricas guardadas por situación canónica
+METRICAS = ("ehs", "ehs2", "ppot", "npot")
+
+# Todas las permutaciones de los 4 palos, como tabla carta -> carta permutada
+PERMUTACIONES = np.array([[rango * 4 + perm[palo] for rango in range(13) for palo in range(4)]
+                          for perm in itertools.permutations(range(4))], dtype=np.int64)
+
+# COMB[n, k] = C(n, k), para el indexado colexicográfico
+COMB = np.array([[math.comb(n, k) for k in range(6)] for n in range(53)], dtype=np.int64)
+
+
+def tamano_tabla(num_mesa: int):
+    """Cantidad de posiciones del arreglo crudo: 1326 manos por C(52, cartas en mesa) mesas."""
+    return 1326 * math.comb(52, num_mesa)
+
+
+def indice_situacion(mano, mesa):
+    """
+    Índice crudo (sin canonizar) de una situación a partir de índices de carta 0-51.
+
+    mano * C(52, k) + rango colexicográfico de la mesa ordenada.
+    """
+    a, b = sorted(mano)
+    indice_mano = b * (b - 1) // 2 + a
+    indice_mesa = sum(math.comb(carta, i + 1) for i, carta in enumerate(sorted(mesa)))
+    return indice_mano * math.comb(52, len(mesa)) + indice_mesa
+
+
+def _indices_vectorizados(situaciones, num_mesa):
+    """Versión en NumPy de indice_situacion para una matriz (N, 2 + num_mesa) de cartas."""
+    situaciones = situaciones.astype(np.int64)
+    mano = np.sort(situaciones[:, :2], axis=1)
+    mesa = np.sort(situaciones[:, 2:], axis=1)
+    indice_mano = mano[:, 1] * (mano[:, 1] - 1) // 2 + mano[:, 0]
+    indice_mesa = np.zeros(len(situaciones), dtype=np.int64)
+    for i in range(num_mesa):
+        indice_mesa += COMB[mesa[:, i], i + 1]
+    return indice_mano * math.comb(52, num_mesa) + indice_mesa
+
+
+def canonizar(mano, mesa):
+    """
+    Forma canónica de una situación: la menor (mano, mesa) ordenadas entre las 24
+    permutaciones de palos. Dos situaciones isomorfas comparten forma canónica.
+    """
+    return min((tuple(sorted(perm[c] for c in mano)), tuple(sorted(perm[c] for c in mesa)))
+               for perm in PERMUTACIONES.tolist())
+
+
+def situaciones_canonicas(num_mesa: int):
+    """
+    Genera las situaciones canónicas (mano, mesa) con num_mesa cartas en la mesa.
+
+    Una situación canónica tiene una mano que es mínima en su clase, así que basta recorrer
+    las 169 manos mínimas y, para cada una, las permutaciones que la dejan fija.
+    """
+    permutaciones = PERMUTACIONES.tolist()
+    for mano in itertools.combinations(range(52), 2):
+        imagenes = [tuple(sorted(perm[c] for c in mano)) for perm in permutaciones]
+        if min(imagenes) != mano:
+            continue
+        estabilizador = [perm for perm, imagen in zip(permutaciones, imagenes) if imagen == mano]
+        restantes = [c for c in range(52) if c not in mano]
+        for mesa in itertools.combinations(restantes, num_mesa):
+            if all(tuple(sorted(perm[c] for c in mesa)) >= mesa for perm in estabilizador):
+                yield mano, mesa
+
+
+def metricas_situacion(mano, mesa, muestras_runout: int = 32, muestras_rival: int = 16, rng=None):
+    """
+    Calcula EHS, EHS², potencial positivo y negativo de una mano (Billings et al.).
+
+    La fuerza actual se calcula exacta contra todas las manos rivales; el potencial se
+    estima sobre runouts (todos en el turn, muestreados en el flop) y rivales muestreados.
+
+    Args:
+        mano: Dos cartas en formato deuces
+        mesa: Tres o cuatro cartas comunitarias en formato deuces
+        muestras_runout: Runouts muestreados en el flop (en el turn se enumeran todos)
+        muestras_rival: Manos rivales muestreadas por runout
+        rng: random.Random para reproducibilidad
+
+    Returns:
+        Tupla (ehs, ehs2, ppot, npot)
+    """
+    rng = rng or random.Random()
+    evaluador = obtener_evaluador()
+    mano, mesa = list(mano), list(mesa)
+    usadas = set(mano) | set(mesa)
+    vivas = [carta for carta in MAZO if carta not in usadas]
+
+    # Fuerza actual: 0 = adelante, 1 = empate, 2 = atrás
+    rango_actual = evaluador.evaluate(mano, mesa)
+    combos = list(itertools.combinations(vivas, 2))
+    clase_actual = {}
+    conteo_actual = [0, 0, 0]
+    for combo in combos:
+        rango = evaluador.evaluate(list(combo), mesa)
+        clase = 0 if rango > rango_actual else (1 if rango == rango_actual else 2)
+        clase_actual[combo] = clase
+        conteo_actual[clase] += 1
+    hs = (conteo_actual[0] + conteo_actual[1] / 2) / len(combos)
+
+    if len(mesa) == 4:
+        runouts = [(carta,) for carta in vivas]
+    else:
+        runouts = [tuple(rng.sample(vivas, 5 - len(mesa))) for _ in range(muestras_runout)]
+
+    # hp[ahora][final]
+    hp = [[0, 0, 0], [0, 0, 0], [0, 0, 0]]
+    suma_hs2 = 0.0
+    for runout in runouts:
+        tablero = mesa + list(runout)
+        rango_final = evaluador.evaluate(mano, tablero)
+        puntos = 0.0
+        muestreadas = 0
+        while muestreadas < muestras_rival:
+            combo = combos[rng.randrange(len(combos))]
+            if combo[0] in runout or combo[1] in runout:
+                continue
+            muestreadas += 1
+            rango = evaluador.evaluate(list(combo), tablero)
+            final = 0 if rango > rango_final else (1 if rango == rango_final else 2)
+            hp[clase_actual[combo]][final] += 1
+            puntos += 1 if final == 0 else (0.5 if final == 1 else 0)
+        suma_hs2 += (puntos / muestras_rival) ** 2
+
+    total = [sum(fila) for fila in hp]
+    denominador_ppot = total[2] + total[1] / 2
+    denominador_npot = total[0] + total[1] / 2
+    ppot = (hp[2][0] + hp[2][1] / 2 + hp[1][0] / 2) / denominador_ppot if denominador_ppot else 0.0
+    npot = (hp[0][2] + hp[1][2] / 2 + hp[0][1] / 2) / denominador_npot if denominador_npot else 0.0
+    ehs = hs * (1 - npot) + (1 - hs) * ppot
+    return ehs, suma_hs2 / len(runouts), ppot, npot
+
+
+def _metricas_lote(tarea):
+    """Tarea de un proceso del pool: métricas de un lote de situaciones en índices 0-51."""
+    lote, muestras_runout, muestras_rival, semilla = tarea
+    resultado = np.empty((len(lote), len(METRICAS)), dtype=np.float32)
+    for i, situacion in enumerate(lote.tolist()):
+        cartas = [MAZO[c] for c in situacion]
+        rng = random.Random(semilla * 1_000_003 + indice_situacion(situacion[:2], situacion[2:]))
+        resultado[i] = metricas_situacion(cartas[:2], cartas[2:], muestras_runout, muestras_rival, rng)
+    return resultado
+
+
+def kmeans(datos, k: int, iteraciones: int = 50, muestra: int = 200_000, semilla: int = 0):
+    """
+    K-means con inicialización k-means++ sobre una muestra de los datos.
+
+    Returns:
+        Tupla (centroides, asignación de cada fila de datos)
+    """
+    rng = np.random.default_rng(semilla)
+    if len(datos) > muestra:
+        entrenamiento = datos[rng.choice(len(datos), muestra, replace=False)]
+    else:
+        entrenamiento = datos
+    k = min(k, len(entrenamiento))
+
+    centroides = [entrenamiento[rng.integers(len(entrenamiento))]]
+    distancias = ((entrenamiento - centroides[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        probabilidades = distancias / distancias.sum() if distancias.sum() > 0 else None
+        centroides.append(entrenamiento[rng.choice(len(entrenamiento), p=probabilidades)])
+        distancias = np.minimum(distancias, ((entrenamiento - centroides[-1]) ** 2).sum(axis=1))
+    centroides = np.array(centroides)
+
+    for _ in range(iteraciones):
+        asignacion = _asignar(entrenamiento, centroides)
+        nuevos = np.array([entrenamiento[asignacion == j].mean(axis=0) if np.any(asignacion == j)
+                           else centroides[j] for j in range(k)])
+        if np.allclose(nuevos, centroides):
+            break
+        centroides = nuevos
+
+    # Buckets ordenados por EHS creciente, para que el número de bucket tenga sentido
+    centroides = centroides[np.argsort(centroides[:, 0])]
+    return centroides, _asignar(datos, centroides)
+
+
+def _asignar(datos, centroides, bloque: int = 100_000):
+    asignacion = np.empty(len(datos), dtype=np.int64)
+    for inicio in range(0, len(datos), bloque):
+        parte = datos[inicio:inicio + bloque]
+        distancias = ((parte[:, None, :] - centroides[None, :, :]) ** 2).sum(axis=2)
+        asignacion[inicio:inicio + bloque] = distancias.argmin(axis=1)
+    return asignacion
+
+
+def construir_tabla(directorio, calle: str = "flop", num_buckets: int = 50, muestras_runout: int = 32,
+                    muestras_rival: int = 16, procesos=None, limite=None, semilla: int = 0, lote: int = 256):
+    """
+    Pipeline offline completo para una calle: situaciones canónicas, métricas en un pool
+    de procesos, k-means y escritura de las tablas memory-mapped.
+
+    Archivos generados en el directorio:
+        <calle>_buckets.u8: bucket + 1 por índice crudo (0 = situación no calculada)
+        <calle>_metricas.f2: métricas (float16) de cada situación canónica, en el orden de METRICAS
+        <calle>_canonicas.i8: índice crudo de cada situación canónica
+        <calle>.json: metadatos y centroides
+
+    Args:
+        directorio: Carpeta de salida
+        calle: "flop" o "turn"
+        num_buckets: Cantidad de buckets (máximo 255)
+        muestras_runout: Runouts muestreados por situación en el flop
+        muestras_rival: Rivales muestreados por runout
+        procesos: Procesos del pool (None = todos los núcleos)
+        limite: Si se indica, solo se procesan las primeras situaciones canónicas (pruebas rápidas)
+        semilla: Semilla de los muestreos y del k-means
+        lote: Situaciones por tarea del pool
+    """
+    if num_buckets > 255:
+        raise ValueError("Los buckets se guardan en un byte: máximo 255")
+    num_mesa = CALLES[calle]
+    os.makedirs(directorio, exist_ok=True)
+
+    situaciones = np.array([mano + mesa for mano, mesa in
+                            itertools.islice(situaciones_canonicas(num_mesa), limite)], dtype=np.int8)
+    tareas = [(situaciones[i:i + lote], muestras_runout, muestras_rival, semilla)
+              for i in range(0, len(situaciones), lote)]
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        metricas = np.concatenate(list(pool.map(_metricas_lote, tareas)))
+
+    centroides, asignacion = kmeans(metricas, num_buckets, semilla=semilla)
+
+    indices = _indices_vectorizados(situaciones, num_mesa)
+    buckets = np.memmap(os.path.join(directorio, f"{calle}_buckets.u8"), dtype=np.uint8,
+                        mode="w+", shape=(tamano_tabla(num_mesa),))
+    # Cada situación canónica se replica en todas sus variantes isomorfas
+    for inicio in range(0, len(situaciones), 1_000_000):
+        bloque = situaciones[inicio:inicio + 1_000_000]
+        valores = (asignacion[inicio:inicio + 1_000_000] + 1).astype(np.uint8)
+        for perm in PERMUTACIONES:
+            buckets[_indices_vectorizados(perm[bloque], num_mesa)] = valores
+    buckets.flush()
+
+    metricas.astype(np.float16).tofile(os.path.join(directorio, f"{calle}_metricas.f2"))
+    indices.tofile(os.path.join(directorio, f"{calle}_canonicas.i8"))
+    with open(os.path.join(directorio, f"{calle}.json"), "w") as archivo:
+        json.dump({
+            "calle": calle,
+            "cartas_mesa": num_mesa,
+            "num_buckets": int(len(centroides)),
+            "situaciones": int(len(situaciones)),
+            "metricas": METRICAS,
+            "centroides": centroides.tolist(),
+            "muestras_runout": muestras_runout,
+            "muestras_rival": muestras_rival,
+            "semilla": semilla,
+        }, archivo, indent=2)
+
+
+class TablaBuckets:
+    """
+    Acceso O(1) a los buckets precalculados. Los arreglos se abren memory-mapped
+    (solo lectura) la primera vez que se consulta cada calle.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self._tablas = {}
+        self._metadatos = {}
+
+    def _tabla(self, num_mesa):
+        if num_mesa not in self._tablas:
+            calle = next(nombre for nombre, cartas in CALLES.items() if cartas == num_mesa)
+            with open(os.path.join(self.directorio, f"{calle}.json")) as archivo:
+                self._metadatos[num_mesa] = json.load(archivo)
+            self._tablas[num_mesa] = np.memmap(os.path.join(self.directorio, f"{calle}_buckets.u8"),
+                                               dtype=np.uint8, mode="r", shape=(tamano_tabla(num_mesa),))
+        return self._tablas[num_mesa]
+
+    def num_buckets(self, num_mesa: int):
+        self._tabla(num_mesa)
+        return self._metadatos[num_mesa]["num_buckets"]
+
+    def bucket(self, mano, mesa):
+        """
+        Bucket (0 = más débil) de la mano en formato deuces con la mesa dada, o None si la
+        calle no tiene tabla o la situación no se calculó.
+        """
+        if len(mesa) not in CALLES.values():
+            return None
+        try:
+            tabla = self._tabla(len(mesa))
+        except FileNotFoundError:
+            return None
+        valor = int(tabla[indice_situacion([INDICE_CARTA[c] for c in mano], [INDICE_CARTA[c] for c in mesa])])
+        return valor - 1 if valor else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construye las tablas de buckets EHS/potencial")
+    parser.add_argument("directorio")
+    parser.add_argument("--calles", nargs="+", default=["flop", "turn"], choices=list(CALLES))
+    parser.add_argument("--buckets", type=int, default=50)
+    parser.add_argument("--muestras-runout", type=int, default=32)
+    parser.add_argument("--muestras-rival", type=int, default=16)
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--limite", type=int, default=None)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    for calle in args.calles:
+        print(f"🧮 Construyendo tabla de {calle}...")
+        construir_tabla(args.directorio, calle, args.buckets, args.muestras_runout, args.muestras_rival,
+                        args.procesos, args.limite, args.semilla)
+        print(f"✅ Tabla de {calle} lista en {args.directorio}")
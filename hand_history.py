@@ -0,0 +1,287 @@
+"""
+Importador en streaming de historiales de manos en texto (formato PokerStars y derivados, como
+GGPoker, "Poker Hand #...").
+
+Los archivos se leen en bloques de bytes, así que la memoria no depende del tamaño del archivo:
+solo se guarda la mano que se está armando. Cada mano se normaliza al vocabulario de acciones
+del simulador:
+
+- fold, check, call (monto que se agrega)
+- bet y raise (monto "subir a" de la calle, como en pokerkit)
+- allin cuando una apuesta o subida deja al jugador sin fichas (un call all-in sigue siendo call)
+
+Para usar varios núcleos, importar_paralelo parte cada archivo en segmentos por posición de
+bytes y mueve cada corte al comienzo de la mano siguiente, así ningún proceso ve manos partidas.
+Solo hay unos pocos segmentos en vuelo a la vez, así que la memoria tampoco crece con la entrada.
+
+    for mano in importar("historial.txt"):
+        print(mano["id"], [accion["tipo"] for accion in mano["acciones"]])
+"""
+import itertools
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+TAMANO_BLOQUE = 1 << 20
+TAMANO_SEGMENTO = 64 << 20
+
+CALLES = {"HOLE CARDS": 0, "PRE-FLOP": 0, "FLOP": 1, "TURN": 2, "RIVER": 3}
+
+# Una mano empieza en una línea como "PokerStars Hand #123:" o "Poker Hand #HD123:"
+INICIO_MANO = re.compile(rb"^[^\r\n]{0,40}Hand #[^\r\n]*?:", re.M)
+
+_ENCABEZADO = re.compile(r"Hand #(?P<id>[^:\s]+):")
+_CIEGAS = re.compile(r"\([^)\d]*?(?P<sb>[\d.,]+)/[^)\d]*?(?P<bb>[\d.,]+)")
+_BOTON = re.compile(r"Seat #(?P<asiento>\d+) is the button")
+_ASIENTO = re.compile(r"^Seat (?P<asiento>\d+): (?P<nombre>.+?) \(\D*?(?P<stack>[\d.,]+) in chips")
+_CIEGA = re.compile(r"^(?P<nombre>.+?): posts (?P<tipo>small blind|big blind|the ante|small & big blinds) "
+                    r"\D*?(?P<monto>[\d.,]+)")
+_CALLE = re.compile(r"^\*\*\* (?P<calle>[A-Z -]+?) \*\*\*(?P<cartas>.*)")
+_REPARTO = re.compile(r"^Dealt to (?P<nombre>.+?) \[(?P<cartas>[^\]]+)\]")
+_ACCION = re.compile(r"^(?P<nombre>.+?): (?P<verbo>folds|checks|calls|bets|raises)"
+                     r"(?: \D*?(?P<monto>[\d.,]+))?(?: to \D*?(?P<hasta>[\d.,]+))?(?P<allin> and is all-in)?")
+_MUESTRA = re.compile(r"^(?P<nombre>.+?): shows \[(?P<cartas>[^\]]+)\]")
+_COBRO = re.compile(r"^(?P<nombre>.+?) collected \D*?(?P<monto>[\d.,]+) from")
+_DEVOLUCION = re.compile(r"^Uncalled bet \(\D*?(?P<monto>[\d.,]+)\) returned to (?P<nombre>.+)")
+_CARTAS = re.compile(r"\[([^\]]+)\]")
+
+
+def _monto(texto):
+    valor = float(texto.replace(",", ""))
+    return int(valor) if valor.is_integer() else valor
+
+
+def textos_de_manos(archivo, inicio=0, fin=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Genera el texto de cada mano entre las posiciones inicio y fin (en bytes) de un archivo
+    abierto en modo binario. Una mano pertenece al rango si su encabezado empieza antes de fin.
+    """
+    archivo.seek(inicio)
+    posicion = inicio
+    pendiente = b""
+    while True:
+        bloque = archivo.read(tamano_bloque)
+        posicion += len(bloque)
+        pendiente += bloque
+        comienzos = [coincidencia.start() for coincidencia in INICIO_MANO.finditer(pendiente)]
+        # La última mano del buffer puede seguir en el próximo bloque
+        completas = comienzos if not bloque else comienzos[:-1]
+        for actual, siguiente in zip(completas, comienzos[1:] + [len(pendiente)]):
+            if fin is not None and posicion - len(pendiente) + actual >= fin:
+                return
+            yield pendiente[actual:siguiente].decode("utf-8-sig", errors="replace")
+        if not bloque:
+            return
+        if len(comienzos) > 1:
+            pendiente = pendiente[comienzos[-1]:]
+        elif not comienzos:
+            # Texto sin encabezado (basura o el final del segmento anterior): se descarta, salvo
+            # la última línea, que puede ser un encabezado cortado por el bloque
+            pendiente = pendiente[pendiente.rfind(b"\n") + 1:]
+
+
+def parsear_mano(texto):
+    """
+    Convierte el texto de una mano en un diccionario con id, ciegas (sb, bb), boton (asiento),
+    asientos [{asiento, nombre, stack}], ciegas_puestas [{jugador, tipo, monto}], cartas {jugador: [..]},
+    mesa [..], acciones [{calle, jugador, tipo, monto}], devoluciones {jugador: monto} y
+    cobros {jugador: monto}. Retorna None si el texto no es una mano reconocible.
+    """
+    lineas = [linea.strip() for linea in texto.splitlines() if linea.strip()]
+    if not lineas:
+        return None
+    encabezado = _ENCABEZADO.search(lineas[0])
+    if encabezado is None:
+        return None
+    ciegas = _CIEGAS.search(lineas[0])
+    mano = {
+        "id": encabezado.group("id"),
+        "ciegas": (_monto(ciegas.group("sb")), _monto(ciegas.group("bb"))) if ciegas else None,
+        "boton": None,
+        "asientos": [],
+        "ciegas_puestas": [],
+        "cartas": {},
+        "mesa": [],
+        "acciones": [],
+        "devoluciones": {},
+        "cobros": {},
+    }
+
+    calle = 0
+    resumen = False
+    # Apuesta de cada jugador en la calle actual, para pasar "raises X to Y" y "bets X" a "subir a"
+    apuestas = {}
+    for linea in lineas[1:]:
+        coincidencia = _CALLE.match(linea)
+        if coincidencia:
+            nombre_calle = coincidencia.group("calle")
+            if nombre_calle in CALLES:
+                calle = CALLES[nombre_calle]
+                if calle > 0:
+                    apuestas = {}
+                    cartas = _CARTAS.findall(coincidencia.group("cartas"))
+                    mano["mesa"] = " ".join(cartas).split()
+            resumen = nombre_calle == "SUMMARY"
+            continue
+        if resumen:
+            continue
+
+        coincidencia = _ACCION.match(linea)
+        if coincidencia:
+            nombre = coincidencia.group("nombre")
+            verbo = coincidencia.group("verbo")
+            monto = _monto(coincidencia.group("monto")) if coincidencia.group("monto") else 0
+            if verbo == "folds":
+                tipo, monto = "fold", 0
+            elif verbo == "checks":
+                tipo, monto = "check", 0
+            elif verbo == "calls":
+                tipo = "call"
+                apuestas[nombre] = apuestas.get(nombre, 0) + monto
+            else:
+                tipo = "bet" if verbo == "bets" else "raise"
+                if coincidencia.group("hasta"):
+                    monto = _monto(coincidencia.group("hasta"))
+                else:
+                    monto = apuestas.get(nombre, 0) + monto
+                apuestas[nombre] = monto
+                if coincidencia.group("allin"):
+                    tipo = "allin"
+            mano["acciones"].append({"calle": calle, "jugador": nombre, "tipo": tipo, "monto": monto})
+            continue
+
+        coincidencia = _CIEGA.match(linea)
+        if coincidencia:
+            nombre, monto = coincidencia.group("nombre"), _monto(coincidencia.group("monto"))
+            tipo = {"small blind": "sb", "big blind": "bb", "the ante": "ante"}.get(coincidencia.group("tipo"), "sb+bb")
+            mano["ciegas_puestas"].append({"jugador": nombre, "tipo": tipo, "monto": monto})
+            if tipo != "ante":
+                apuestas[nombre] = apuestas.get(nombre, 0) + (monto if tipo != "sb+bb" else mano["ciegas"][1])
+            continue
+
+        coincidencia = _ASIENTO.match(linea)
+        if coincidencia:
+            mano["asientos"].append({"asiento": int(coincidencia.group("asiento")),
+                                     "nombre": coincidencia.group("nombre"),
+                                     "stack": _monto(coincidencia.group("stack"))})
+            continue
+
+        coincidencia = _REPARTO.match(linea) or _MUESTRA.match(linea)
+        if coincidencia:
+            mano["cartas"][coincidencia.group("nombre")] = coincidencia.group("cartas").split()
+            continue
+
+        coincidencia = _COBRO.match(linea)
+        if coincidencia:
+            nombre = coincidencia.group("nombre")
+            mano["cobros"][nombre] = mano["cobros"].get(nombre, 0) + _monto(coincidencia.group("monto"))
+            continue
+
+        coincidencia = _DEVOLUCION.match(linea)
+        if coincidencia:
+            mano["devoluciones"][coincidencia.group("nombre")] = _monto(coincidencia.group("monto"))
+            continue
+
+        coincidencia = _BOTON.search(linea)
+        if coincidencia:
+            mano["boton"] = int(coincidencia.group("asiento"))
+
+    return mano
+
+
+def importar(ruta, tamano_bloque=TAMANO_BLOQUE):
+    """Genera las manos normalizadas de un archivo, leyéndolo en bloques."""
+    with open(ruta, "rb") as archivo:
+        for texto in textos_de_manos(archivo, tamano_bloque=tamano_bloque):
+            mano = parsear_mano(texto)
+            if mano is not None:
+                yield mano
+
+
+def segmentos(ruta, tamano_segmento=TAMANO_SEGMENTO):
+    """Rangos de bytes (inicio, fin) del archivo, con cada corte movido al comienzo de una mano."""
+    tamano = os.path.getsize(ruta)
+    cortes = [0]
+    with open(ruta, "rb") as archivo:
+        for aproximado in range(tamano_segmento, tamano, tamano_segmento):
+            archivo.seek(aproximado)
+            # Se busca el próximo encabezado a partir del siguiente comienzo de línea
+            archivo.readline()
+            while True:
+                posicion = archivo.tell()
+                linea = archivo.readline()
+                if not linea:
+                    posicion = tamano
+                    break
+                if INICIO_MANO.match(linea):
+                    break
+            if posicion > cortes[-1]:
+                cortes.append(posicion)
+    cortes.append(tamano)
+    return [(ruta, inicio, fin) for inicio, fin in zip(cortes, cortes[1:]) if fin > inicio]
+
+
+def _procesar_segmento(tarea):
+    ruta, inicio, fin, funcion = tarea
+    resultados = []
+    with open(ruta, "rb") as archivo:
+        for texto in textos_de_manos(archivo, inicio, fin):
+            mano = parsear_mano(texto)
+            if mano is not None:
+                resultados.append(funcion(mano) if funcion is not None else mano)
+    return resultados
+
+
+def importar_paralelo(rutas, procesos=None, funcion=None, tamano_segmento=TAMANO_SEGMENTO, en_vuelo=None):
+    """
+    Importa varios archivos en paralelo, segmento por segmento.
+
+    Args:
+        rutas: Archivo o lista de archivos
+        procesos: Procesos del pool (None = todos los núcleos)
+        funcion: Función (de nivel de módulo) que se aplica a cada mano en el proceso que la
+            parsea; conviene para reducir cada mano a lo que se necesita antes de transferirla
+        tamano_segmento: Bytes aproximados por tarea
+        en_vuelo: Segmentos encolados o con resultado sin consumir (None = dos por proceso); la
+            memoria queda acotada por en_vuelo segmentos, no por el tamaño de los archivos
+
+    Yields:
+        El resultado de funcion (o la mano) de cada mano, en el orden de los archivos
+    """
+    if isinstance(rutas, (str, os.PathLike)):
+        rutas = [rutas]
+    tareas = ((ruta, inicio, fin, funcion) for ruta in rutas for ruta, inicio, fin in segmentos(ruta, tamano_segmento))
+    procesos = procesos or os.cpu_count() or 1
+    en_vuelo = en_vuelo or 2 * procesos
+    pool = ProcessPoolExecutor(max_workers=procesos)
+    pendientes = deque(pool.submit(_procesar_segmento, tarea) for tarea in itertools.islice(tareas, en_vuelo))
+    try:
+        while pendientes:
+            resultados = pendientes.popleft().result()
+            # Se encola un segmento nuevo por cada uno que se consume
+            for tarea in itertools.islice(tareas, 1):
+                pendientes.append(pool.submit(_procesar_segmento, tarea))
+            yield from resultados
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    from collections import Counter
+
+    parser = argparse.ArgumentParser(description="Importa historiales de manos y muestra un resumen")
+    parser.add_argument("archivos", nargs="+")
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    manos = 0
+    tipos = Counter()
+    for mano in importar_paralelo(args.archivos, procesos=args.procesos):
+        manos += 1
+        tipos.update(accion["tipo"] for accion in mano["acciones"])
+    print(f"{manos} manos")
+    for tipo, cantidad in tipos.most_common():
+        print(f"  {tipo}: {cantidad}")
@@ -0,0 +1,142 @@
+"""
+Equity de torneo con el Independent Chip Model (Malmuth-Harville).
+
+En vez de enumerar los órdenes de llegada (factorial en los jugadores), se recorre una
+programación dinámica sobre subconjuntos: dp[máscara] es la probabilidad de que los jugadores
+de la máscara ocupen los primeros puestos. Cada capa (puestos ya asignados) se procesa con
+operaciones de numpy sobre todas sus máscaras y sobre un lote de vectores de stacks a la vez,
+y solo se recorren tantas capas como premios haya.
+
+Con muchos jugadores se usa Monte Carlo: el modelo de Harville equivale a ordenar a los
+jugadores por tiempos exponenciales con tasa igual a su stack.
+
+    from icm import icm
+    icm([5000, 3000, 2000], [0.5, 0.3, 0.2])
+
+Los jugadores con 0 fichas se consideran eliminados: se reparten por igual los puestos que
+quedan detrás de los que siguen en juego.
+"""
+import functools
+
+import numpy as np
+
+
+# Hasta esta cantidad de jugadores se calcula exacto (la tabla tiene 2^n entradas por vector)
+MAX_EXACTO = 16
+MUESTRAS = 20000
+
+# Peso relativo de un stack vacío: no cambia las equities de los demás pero ordena a los eliminados
+_EPSILON = 1e-12
+
+
+@functools.lru_cache(maxsize=None)
+def _capas(jugadores, puestos):
+    """Máscaras de cada capa (cantidad de puestos ya asignados) y la matriz de bits."""
+    mascaras = np.arange(1 << jugadores)
+    bits = (mascaras[:, None] >> np.arange(jugadores)) & 1
+    conteo = bits.sum(axis=1)
+    return [mascaras[conteo == capa] for capa in range(min(puestos, jugadores))], bits.astype(float)
+
+
+def _preparar(stacks_lote, premios):
+    stacks = np.atleast_2d(np.asarray(stacks_lote, dtype=float))
+    if (stacks < 0).any():
+        raise ValueError("Los stacks no pueden ser negativos")
+    totales = stacks.sum(axis=1, keepdims=True)
+    if (totales <= 0).any():
+        raise ValueError("Cada vector de stacks necesita al menos un jugador con fichas")
+    stacks = np.where(stacks > 0, stacks, _EPSILON * totales)
+    premios = np.asarray(premios, dtype=float)[:stacks.shape[1]]
+    return stacks, premios
+
+
+def icm_exacto(stacks_lote, premios):
+    """
+    Equity ICM exacta de un lote de vectores de stacks.
+
+    Args:
+        stacks_lote: Arreglo (lote, jugadores) o un solo vector de stacks
+        premios: Premio de cada puesto, del primero en adelante
+
+    Returns:
+        Arreglo (lote, jugadores) con la equity de cada jugador
+    """
+    stacks, premios = _preparar(stacks_lote, premios)
+    lote, jugadores = stacks.shape
+    if jugadores > MAX_EXACTO:
+        raise ValueError(f"icm_exacto admite hasta {MAX_EXACTO} jugadores")
+
+    capas, bits = _capas(jugadores, len(premios))
+    # Fichas de cada subconjunto de jugadores, para todo el lote
+    sumas = stacks @ bits.T
+    total = sumas[:, -1:]
+    dp = np.zeros((lote, 1 << jugadores))
+    dp[:, 0] = 1.0
+    equity = np.zeros((lote, jugadores))
+
+    for puesto, mascaras in enumerate(capas):
+        probabilidad = dp[:, mascaras]
+        restante = total - sumas[:, mascaras]
+        for jugador in range(jugadores):
+            libres = (mascaras >> jugador) & 1 == 0
+            if not libres.any():
+                continue
+            # Probabilidad de que el jugador gane el puesto entre los que quedan
+            paso = probabilidad[:, libres] * stacks[:, jugador:jugador + 1] / restante[:, libres]
+            equity[:, jugador] += premios[puesto] * paso.sum(axis=1)
+            dp[:, mascaras[libres] | (1 << jugador)] += paso
+    return equity
+
+
+def icm_montecarlo(stacks_lote, premios, muestras=MUESTRAS, rng=None):
+    """
+    Equity ICM aproximada por muestreo de órdenes de llegada, para campos grandes.
+
+    Args:
+        stacks_lote: Arreglo (lote, jugadores) o un solo vector de stacks
+        premios: Premio de cada puesto, del primero en adelante
+        muestras: Órdenes de llegada muestreados por vector
+        rng: np.random.Generator (opcional)
+
+    Returns:
+        Arreglo (lote, jugadores) con la equity de cada jugador
+    """
+    rng = rng or np.random.default_rng()
+    stacks, premios = _preparar(stacks_lote, premios)
+    lote, jugadores = stacks.shape
+    puestos = len(premios)
+    equity = np.zeros((lote, jugadores))
+
+    for fila in range(lote):
+        # El que termina primero la "carrera" exponencial gana el torneo, y así sucesivamente
+        tiempos = rng.exponential(size=(muestras, jugadores)) / stacks[fila]
+        if puestos < jugadores:
+            primeros = np.argpartition(tiempos, puestos - 1, axis=1)[:, :puestos]
+            orden = np.take_along_axis(primeros, np.argsort(
+                np.take_along_axis(tiempos, primeros, axis=1), axis=1), axis=1)
+        else:
+            orden = np.argsort(tiempos, axis=1)
+        np.add.at(equity[fila], orden, np.broadcast_to(premios, orden.shape))
+    return equity / muestras
+
+
+def icm_lote(stacks_lote, premios, muestras=MUESTRAS, rng=None):
+    """Equity ICM de un lote de vectores de stacks: exacta si hay pocos jugadores, si no Monte Carlo."""
+    jugadores = np.atleast_2d(stacks_lote).shape[1]
+    if jugadores <= MAX_EXACTO:
+        return icm_exacto(stacks_lote, premios)
+    return icm_montecarlo(stacks_lote, premios, muestras, rng)
+
+
+def icm(stacks, premios, muestras=MUESTRAS, rng=None):
+    """
+    Equity ICM de cada jugador para un vector de stacks.
+
+    Args:
+        stacks: Fichas de cada jugador (por ejemplo, las que retorna repeated_hand_simulation)
+        premios: Premio de cada puesto, del primero en adelante
+
+    Returns:
+        Lista con la equity de cada jugador, en el orden de stacks
+    """
+    return icm_lote([stacks], premios, muestras, rng)[0].tolist()
@@ -0,0 +1,327 @@
+"""
+Liga round-robin incremental entre estrategias, con resultados guardados en SQLite.
+
+Cada estrategia se registra con un nombre y la ruta "modulo:Clase". Su versión es un hash del
+código fuente de los módulos que definen la clase y sus clases base, más el de las dependencias
+que declare (atributo DEPENDENCIAS de la clase o parámetro dependencias de Liga.agregar), así que
+al ejecutar la liga solo se juegan las partidas que todavía no están en la base para las
+versiones actuales: un bot nuevo o modificado cuesta solo sus propias partidas. Una partida que falla queda guardada
+con su error y no cuenta para la tabla. La configuración de la liga (jugadores por mesa,
+repeticiones, stack, blinds y límite de manos) también queda en la base, así que otros programas
+(por ejemplo, work_queue.py) abren la misma liga solo con la ruta.
+
+Uso:
+
+    python league.py liga.sqlite --ejemplos --estrategia "Mi Bot=mi_archivo:MiEstrategia"
+"""
+import argparse
+import contextlib
+import hashlib
+import importlib
+import importlib.util
+import inspect
+import itertools
+import json
+import os
+import random
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+from playerstrategyABC import PlayerStrategy
+
+
+ELO_INICIAL = 1500
+K_ELO = 16
+
+# Configuración de una liga nueva
+CONFIGURACION = {"jugadores_por_mesa": 2, "partidas_por_asiento": 2, "stack": 10000, "blinds": (50, 100),
+                 "max_manos": 200}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS configuracion (
+    nombre TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS partidas (
+    clave TEXT PRIMARY KEY,
+    nombres TEXT NOT NULL,
+    versiones TEXT NOT NULL,
+    semilla INTEGER NOT NULL,
+    fichas_finales TEXT NOT NULL,
+    error TEXT,
+    creada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+INSERTAR = ("INSERT OR REPLACE INTO partidas (clave, nombres, versiones, semilla, fichas_finales, error) "
+            "VALUES (?, ?, ?, ?, ?, ?)")
+
+
+def cargar_clase(ruta_clase):
+    """Importa una clase a partir de "modulo:Clase"."""
+    modulo, clase = ruta_clase.split(":")
+    return getattr(importlib.import_module(modulo), clase)
+
+
+def _fuente_modulo(nombre_modulo):
+    """Código fuente del archivo de un módulo, o None si no es un módulo de Python en un archivo."""
+    spec = importlib.util.find_spec(nombre_modulo)
+    if spec is None or not spec.origin or not spec.origin.endswith(".py"):
+        return None
+    with open(spec.origin, "rb") as archivo:
+        return archivo.read()
+
+
+def version_estrategia(ruta_clase, kwargs=None, dependencias=()):
+    """
+    Hash corto de los argumentos, del código de los módulos que definen la clase y sus clases base
+    y del de sus dependencias: las que declara cada clase en el atributo DEPENDENCIAS (nombres de
+    módulos) más las que se pasan acá. El resto del repositorio no cuenta, así que cambiar un
+    módulo que una estrategia no declara no la vuelve a jugar.
+    """
+    huella = hashlib.sha1(json.dumps(kwargs or {}, sort_keys=True, default=str).encode())
+    modulos = set(dependencias)
+    for clase in inspect.getmro(cargar_clase(ruta_clase)):
+        if clase in (PlayerStrategy, object) or clase.__module__ == "abc":
+            continue
+        modulos.add(clase.__module__)
+        modulos.update(vars(clase).get("DEPENDENCIAS", ()))
+    for modulo in sorted(modulos):
+        fuente = _fuente_modulo(modulo)
+        if fuente is not None:
+            huella.update(modulo.encode() + b"\0" + fuente)
+    return huella.hexdigest()[:12]
+
+
+def _jugar_partida(tarea):
+    """
+    Tarea de un proceso del pool: juega un torneo en silencio y retorna las fichas finales,
+    o None y el error si la partida falló.
+    """
+    from pokerSimulator import InteractivePokerGame
+
+    clave, asientos, stack, blinds, max_manos, semilla = tarea
+    random.seed(semilla)
+    try:
+        estrategias = [cargar_clase(ruta)(name=nombre, **kwargs) for nombre, ruta, kwargs in asientos]
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            fichas = InteractivePokerGame.repeated_hand_simulation(
+                estrategias, [stack] * len(estrategias), blinds, max_hands=max_manos, raise_errors=True)
+    except Exception as e:
+        return clave, None, f"{type(e).__name__}: {e}"
+    return clave, fichas, None
+
+
+class Liga:
+    """
+    Liga de estrategias con partidas round-robin y permutaciones de asientos.
+
+    Los parámetros de configuración en None toman el valor guardado en la base o, en una liga
+    nueva, el de CONFIGURACION; los que se pasan reemplazan a los guardados.
+
+    Args:
+        ruta_db: Archivo SQLite donde se guardan los resultados
+        jugadores_por_mesa: Estrategias por partida (2 = heads-up)
+        partidas_por_asiento: Repeticiones de cada orden de asientos (con semillas distintas)
+        stack: Fichas iniciales de cada jugador
+        blinds: Tupla con (small blind, big blind)
+        max_manos: Límite de manos por partida
+    """
+
+    def __init__(self, ruta_db="liga.sqlite", jugadores_por_mesa=None, partidas_por_asiento=None, stack=None,
+                 blinds=None, max_manos=None):
+        self.ruta_db = ruta_db
+        self.estrategias = {}
+        pedida = {"jugadores_por_mesa": jugadores_por_mesa, "partidas_por_asiento": partidas_por_asiento,
+                  "stack": stack, "blinds": blinds, "max_manos": max_manos}
+        with self._conexion() as conexion:
+            conexion.executescript(ESQUEMA)
+            # Bases creadas antes de guardar los errores
+            columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(partidas)")}
+            if "error" not in columnas:
+                conexion.execute("ALTER TABLE partidas ADD COLUMN error TEXT")
+            guardada = {nombre: json.loads(valor) for nombre, valor in conexion.execute(
+                "SELECT nombre, valor FROM configuracion")}
+            configuracion = {nombre: valor if valor is not None else guardada.get(nombre, CONFIGURACION[nombre])
+                             for nombre, valor in pedida.items()}
+            conexion.executemany("INSERT OR REPLACE INTO configuracion (nombre, valor) VALUES (?, ?)",
+                                 [(nombre, json.dumps(valor)) for nombre, valor in configuracion.items()])
+            conexion.commit()
+        self.jugadores_por_mesa = configuracion["jugadores_por_mesa"]
+        self.partidas_por_asiento = configuracion["partidas_por_asiento"]
+        self.stack = configuracion["stack"]
+        self.blinds = tuple(configuracion["blinds"])
+        self.max_manos = configuracion["max_manos"]
+
+    def _conexion(self):
+        return contextlib.closing(sqlite3.connect(self.ruta_db))
+
+    def agregar(self, nombre, ruta_clase, dependencias=(), **kwargs):
+        """
+        Registra una estrategia. kwargs se pasan al constructor junto a name=nombre; dependencias
+        son módulos extra que entran en la versión (ver version_estrategia).
+        """
+        self.estrategias[nombre] = (ruta_clase, kwargs, version_estrategia(ruta_clase, kwargs, dependencias))
+
+    def agregar_ejemplos(self, tiempo_busqueda=None):
+        """
+        Registra las estrategias de example_custom_players. Las de búsqueda (atributo BUSQUEDA,
+        como MCTSStrategy) piensan un tiempo fijo por decisión y harían que la liga tarde horas:
+        solo se registran si se pasa tiempo_busqueda, con ese tiempo en segundos.
+        """
+        import example_custom_players
+
+        for nombre, clase in inspect.getmembers(example_custom_players, inspect.isclass):
+            if not issubclass(clase, PlayerStrategy) or clase is PlayerStrategy:
+                continue
+            if getattr(clase, "BUSQUEDA", False):
+                if tiempo_busqueda is not None:
+                    self.agregar(nombre, f"example_custom_players:{nombre}", tiempo=tiempo_busqueda)
+                continue
+            self.agregar(nombre, f"example_custom_players:{nombre}")
+
+    def partidas_programadas(self):
+        """
+        Todas las partidas de la liga con las versiones actuales: cada combinación de
+        estrategias, en cada orden de asientos, repetida partidas_por_asiento veces.
+        """
+        configuracion = f"{self.stack}|{self.blinds}|{self.max_manos}"
+        for grupo in itertools.combinations(sorted(self.estrategias), self.jugadores_por_mesa):
+            for orden in itertools.permutations(grupo):
+                for repeticion in range(self.partidas_por_asiento):
+                    versiones = [self.estrategias[nombre][2] for nombre in orden]
+                    base = "|".join(f"{n}@{v}" for n, v in zip(orden, versiones))
+                    clave = hashlib.sha1(f"{base}|{repeticion}|{configuracion}".encode()).hexdigest()
+                    semilla = int(clave[:8], 16)
+                    yield clave, orden, versiones, semilla
+
+    def pendientes(self):
+        with self._conexion() as conexion:
+            jugadas = {fila[0] for fila in conexion.execute("SELECT clave FROM partidas")}
+        return [partida for partida in self.partidas_programadas() if partida[0] not in jugadas]
+
+    def registrar(self, resultados, errores=None):
+        """
+        Guarda resultados calculados en otro lado (por ejemplo, en work_queue).
+
+        Args:
+            resultados: Diccionario clave de partida -> fichas finales
+            errores: Diccionario clave de partida -> mensaje de las partidas que fallaron
+
+        Returns:
+            Número de partidas pendientes que quedaron registradas
+        """
+        errores = errores or {}
+        registradas = 0
+        with self._conexion() as conexion:
+            for clave, orden, versiones, semilla in self.pendientes():
+                if clave in resultados or clave in errores:
+                    conexion.execute(INSERTAR, (clave, json.dumps(orden), json.dumps(versiones), semilla,
+                                                json.dumps(resultados.get(clave)), errores.get(clave)))
+                    registradas += 1
+            conexion.commit()
+        return registradas
+
+    def ejecutar(self, procesos=None):
+        """
+        Juega solo las partidas que faltan y guarda cada resultado apenas termina.
+
+        Returns:
+            Número de partidas jugadas
+        """
+        pendientes = {clave: (orden, versiones, semilla) for clave, orden, versiones, semilla in self.pendientes()}
+        if not pendientes:
+            return 0
+
+        tareas = [(clave, [(nombre, self.estrategias[nombre][0], self.estrategias[nombre][1]) for nombre in orden],
+                   self.stack, self.blinds, self.max_manos, semilla)
+                  for clave, (orden, versiones, semilla) in pendientes.items()]
+
+        with ProcessPoolExecutor(max_workers=procesos) as pool, self._conexion() as conexion:
+            for clave, fichas, error in pool.map(_jugar_partida, tareas):
+                orden, versiones, semilla = pendientes[clave]
+                conexion.execute(INSERTAR, (clave, json.dumps(orden), json.dumps(versiones), semilla,
+                                            json.dumps(fichas), error))
+                conexion.commit()
+        return len(tareas)
+
+    def ratings(self):
+        """
+        Elo de cada estrategia a partir de las partidas de sus versiones actuales. Cada partida
+        cuenta como un enfrentamiento por par de jugadores, ganado por quien terminó con más fichas.
+
+        Returns:
+            Lista de tuplas (nombre, elo, partidas, fichas promedio), de mayor a menor elo
+        """
+        actuales = {nombre: datos[2] for nombre, datos in self.estrategias.items()}
+        elo = {nombre: float(ELO_INICIAL) for nombre in actuales}
+        partidas = {nombre: 0 for nombre in actuales}
+        fichas_totales = {nombre: 0 for nombre in actuales}
+
+        with self._conexion() as conexion:
+            filas = conexion.execute("SELECT nombres, versiones, fichas_finales FROM partidas "
+                                     "WHERE error IS NULL ORDER BY clave").fetchall()
+
+        for nombres, versiones, fichas in filas:
+            nombres, versiones, fichas = json.loads(nombres), json.loads(versiones), json.loads(fichas)
+            if any(actuales.get(nombre) != version for nombre, version in zip(nombres, versiones)):
+                continue
+            for nombre, cantidad in zip(nombres, fichas):
+                partidas[nombre] += 1
+                fichas_totales[nombre] += cantidad
+            for (a, fichas_a), (b, fichas_b) in itertools.combinations(zip(nombres, fichas), 2):
+                esperado = 1 / (1 + 10 ** ((elo[b] - elo[a]) / 400))
+                resultado = 1.0 if fichas_a > fichas_b else (0.5 if fichas_a == fichas_b else 0.0)
+                elo[a] += K_ELO * (resultado - esperado)
+                elo[b] -= K_ELO * (resultado - esperado)
+
+        tabla = [(nombre, elo[nombre], partidas[nombre],
+                  fichas_totales[nombre] / partidas[nombre] if partidas[nombre] else 0.0) for nombre in actuales]
+        return sorted(tabla, key=lambda fila: fila[1], reverse=True)
+
+    def errores(self):
+        """Partidas de las versiones actuales que fallaron: lista de (nombres, error)."""
+        actuales = {nombre: datos[2] for nombre, datos in self.estrategias.items()}
+        with self._conexion() as conexion:
+            filas = conexion.execute("SELECT nombres, versiones, error FROM partidas "
+                                     "WHERE error IS NOT NULL ORDER BY clave").fetchall()
+        return [(json.loads(nombres), error) for nombres, versiones, error in filas
+                if all(actuales.get(nombre) == version
+                       for nombre, version in zip(json.loads(nombres), json.loads(versiones)))]
+
+    def imprimir_tabla(self):
+        print("\n🏆 TABLA DE LA LIGA")
+        print("-" * 60)
+        for posicion, (nombre, elo, partidas, fichas) in enumerate(self.ratings(), 1):
+            print(f"{posicion:>2}. {nombre:<28} Elo {elo:7.1f} | {partidas:>4} partidas | {fichas:>10,.0f} fichas")
+        fallidas = self.errores()
+        if fallidas:
+            print(f"\n⚠️ {len(fallidas):,} partidas fallaron (no cuentan para la tabla):")
+            for nombres, error in fallidas[:10]:
+                print(f"   {' vs '.join(nombres)}: {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Liga round-robin incremental de estrategias")
+    parser.add_argument("db", help="Archivo SQLite de resultados")
+    parser.add_argument("--ejemplos", action="store_true", help="Incluir las estrategias de example_custom_players")
+    parser.add_argument("--tiempo-busqueda", type=float, default=None,
+                        help="Con --ejemplos, incluir también los bots de búsqueda con estos segundos por decisión")
+    parser.add_argument("--estrategia", action="append", default=[], help='"Nombre=modulo:Clase"')
+    # Sin estas opciones se usa la configuración guardada en la base (o la de CONFIGURACION)
+    parser.add_argument("--jugadores", type=int, default=None, help="Jugadores por mesa")
+    parser.add_argument("--repeticiones", type=int, default=None, help="Partidas por orden de asientos")
+    parser.add_argument("--max-manos", type=int, default=None)
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    liga = Liga(args.db, args.jugadores, args.repeticiones, max_manos=args.max_manos)
+    if args.ejemplos:
+        liga.agregar_ejemplos(args.tiempo_busqueda)
+    for especificacion in args.estrategia:
+        nombre, ruta_clase = especificacion.split("=", 1)
+        liga.agregar(nombre, ruta_clase)
+
+    jugadas = liga.ejecutar(args.procesos)
+    print(f"🎮 Partidas nuevas jugadas: {jugadas:,}")
+    liga.imprimir_tabla()
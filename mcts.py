@@ -0,0 +1,298 @@
+"""
+Búsqueda Monte Carlo en árbol sobre conjuntos de información (IS-MCTS de un observador) con
+tiempo acotado por decisión.
+
+Cada iteración determiniza el punto de decisión (repartir() de rollout.py vuelve a dar las cartas
+que el jugador no ve), baja por el árbol eligiendo con UCB la acción de quien actúa, agrega un
+nodo nuevo, juega el resto de la mano con una política de rollout y suma el resultado en el
+camino. Las acciones son las del simulador, con los mismos montos, y cuando se reparte una calle
+nueva el árbol se abre en un hijo por mesa visible, así que el árbol sigue valiendo cuando la mano
+real avanza: en la siguiente decisión de la misma mano se baja por las acciones y cartas reales y
+se sigue buscando desde ahí.
+
+Las ganancias se guardan en fichas respecto de los stacks del comienzo de la mano (y no del punto
+de bifurcación), para que las muestras de decisiones anteriores sean comparables con las nuevas.
+El término de exploración del UCB se escala por la mayor ganancia o pérdida posible de la mano
+(el segundo stack inicial más grande): como en UCB1 con pagos acotados, cada acción se sigue
+visitando con una frecuencia que crece con el logaritmo de las visitas del padre, así que con más
+tiempo la búsqueda revisa todas las acciones y no se queda con la primera que salió bien.
+
+Con procesos > 1 los rollouts se reparten entre procesos en lotes: el árbol se recorre en el
+proceso principal con pérdidas virtuales (visitas provisorias) para que las hojas de un lote no
+sean todas la misma.
+
+    buscador = BuscadorMCTS(tiempo=0.5)
+    tipo, monto = buscador.decidir(game_state, player_index)
+
+Para comprobar que la búsqueda sigue explorando con más tiempo (las visitas de cada acción de la
+raíz crecen con el tiempo, no solo las de la mejor):
+
+    python mcts.py --tiempos 0.1 0.4 1.6
+"""
+import argparse
+import math
+import random
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+from rollout import bifurcar, jugar, politica_aleatoria
+
+
+class Nodo:
+    """
+    Nodo del árbol. Los hijos se indexan por acción (tipo, monto) o, después de un reparto, por
+    ("mesa", cartas visibles). visitas y suma son del camino que llega a este nodo; disponible
+    cuenta las veces que la acción que lleva acá estuvo disponible (para el UCB de IS-MCTS).
+    """
+
+    __slots__ = ("hijos", "visitas", "suma", "disponible")
+
+    def __init__(self, jugadores):
+        self.hijos = {}
+        self.visitas = 0
+        self.suma = [0.0] * jugadores
+        self.disponible = 0
+
+
+_politicas = {}
+
+
+def _politica(pesos):
+    clave = tuple(sorted((pesos or {}).items()))
+    if clave not in _politicas:
+        _politicas[clave] = politica_aleatoria(pesos)
+    return _politicas[clave]
+
+
+def _rollouts(tarea):
+    """Tarea de un proceso: juega hasta el final cada estado del lote y retorna sus pagos."""
+    estados, pesos, semilla = tarea
+    rng = random.Random(semilla)
+    politica = _politica(pesos)
+    return [jugar(estado, politica, rng) for estado in estados]
+
+
+def _mayor_variacion(estado):
+    """
+    Fichas que un jugador puede ganar o perder como máximo en la mano: el segundo stack más grande
+    al comienzo (nadie pone en juego más que lo que puede cubrir un rival). Es la misma en todas
+    las decisiones de la mano, así que el árbol reutilizado mantiene la escala.
+    """
+    iniciales = sorted((stack + aporte for stack, aporte in zip(estado.stacks, estado.aportes)), reverse=True)
+    return max(iniciales[1] if len(iniciales) > 1 else iniciales[0], estado.ciega_grande)
+
+
+class BuscadorMCTS:
+    """
+    Args:
+        tiempo: Segundos de búsqueda por decisión
+        exploracion: Constante del UCB, en unidades de la mayor ganancia o pérdida posible de la mano
+        pesos_rollout: Pesos por tipo de acción de la política de rollout (ver politica_aleatoria)
+        procesos: Procesos para los rollouts (1 = en el proceso principal)
+        lote: Hojas por lote cuando hay varios procesos
+        max_iteraciones: Tope de iteraciones por decisión (None = solo el tiempo)
+    """
+
+    def __init__(self, tiempo=1.0, exploracion=1.0, pesos_rollout=None, procesos=1, lote=32, max_iteraciones=None):
+        self.tiempo = tiempo
+        self.exploracion = exploracion
+        self.pesos_rollout = pesos_rollout
+        self.procesos = procesos
+        self.lote = lote
+        self.max_iteraciones = max_iteraciones
+        self.rng = random.Random()
+        self._pool = None
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.raiz = None
+        self.estado_real = None
+        self.procesadas = 0
+        self.iteraciones = 0
+
+    def __getstate__(self):
+        # El pool y el árbol de la mano en curso no se guardan (por ejemplo, en un checkpoint)
+        estado = {clave: valor for clave, valor in self.__dict__.items() if clave != "_pool"}
+        estado.update(raiz=None, estado_real=None, procesadas=0)
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._pool = None
+
+    def visitas_raiz(self):
+        """Visitas de cada acción de la raíz en la última búsqueda."""
+        if self.raiz is None:
+            return {}
+        return {accion: hijo.visitas for accion, hijo in self.raiz.hijos.items() if accion[0] != "mesa"}
+
+    def cerrar(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def decidir(self, game_state, player_index):
+        """Busca durante self.tiempo segundos y retorna la acción (tipo, monto) más visitada."""
+        raiz_estado = bifurcar(game_state, player_index)
+        jugadores = game_state.player_count
+        raiz = self._raiz_reutilizada(game_state, jugadores)
+        self.iteraciones = 0
+
+        # Ganancias respecto del comienzo de la mano: se descuenta lo ya aportado al bifurcar
+        aportes = list(raiz_estado.aportes)
+        escala = self.exploracion * _mayor_variacion(raiz_estado)
+        limite = time.monotonic() + self.tiempo
+        # Aunque se acabe el tiempo, cada acción de la raíz recibe al menos una visita
+        minimo = len(raiz_estado.acciones())
+        while self.iteraciones < minimo or time.monotonic() < limite:
+            if self.max_iteraciones is not None and self.iteraciones >= self.max_iteraciones:
+                break
+            if self.procesos > 1:
+                self._iterar_lote(raiz, raiz_estado, aportes, escala)
+            else:
+                camino, estado = self._seleccionar(raiz, raiz_estado.repartir(self.rng), escala)
+                self._propagar(camino, jugar(estado, _politica(self.pesos_rollout), self.rng), aportes)
+                self.iteraciones += 1
+
+        acciones = raiz_estado.acciones()
+        mejor = max(acciones, key=lambda accion: raiz.hijos[accion].visitas if accion in raiz.hijos else -1)
+        self.raiz = raiz
+        self.estado_real = weakref.ref(game_state)
+        self.procesadas = len(game_state.operations)
+        return mejor
+
+    def _raiz_reutilizada(self, game_state, jugadores):
+        """Nodo del árbol anterior que corresponde a la situación actual, o uno nuevo."""
+        from pokerSimulator import convert_pokerkit_to_deuces_cards
+
+        nodo = self.raiz
+        if nodo is None or self.estado_real is None or self.estado_real() is not game_state:
+            self._reiniciar()
+            return Nodo(jugadores)
+
+        for operacion in game_state.operations[self.procesadas:]:
+            nombre = type(operacion).__name__
+            if nombre == "BoardDealing":
+                mesa = convert_pokerkit_to_deuces_cards([carta for cartas in game_state.board_cards
+                                                         for carta in cartas])
+                clave = ("mesa", tuple(mesa))
+            elif nombre == "Folding":
+                clave = ("fold", 0)
+            elif nombre == "CheckingOrCalling":
+                clave = ("call", operacion.amount) if operacion.amount else ("check", 0)
+            elif nombre == "CompletionBettingOrRaisingTo":
+                clave = next((accion for accion in nodo.hijos if accion[0] in ("bet", "raise", "allin")
+                              and accion[1] == operacion.amount), None)
+            else:
+                continue
+            nodo = nodo.hijos.get(clave)
+            if nodo is None:
+                # Se jugó algo que el árbol no exploró (por ejemplo, una subida de otro tamaño)
+                self._reiniciar()
+                return Nodo(jugadores)
+        return nodo
+
+    def _seleccionar(self, raiz, estado, escala):
+        """Baja por el árbol con UCB hasta agregar un nodo. Retorna el camino y el estado de la hoja."""
+        nodo = raiz
+        camino = [raiz]
+        jugadores = len(estado.stacks)
+        while not estado.terminada:
+            actor = estado.actor
+            acciones = estado.acciones()
+            nuevas = [accion for accion in acciones if accion not in nodo.hijos]
+            for accion in acciones:
+                if accion in nodo.hijos:
+                    nodo.hijos[accion].disponible += 1
+            if nuevas:
+                accion = self.rng.choice(nuevas)
+                hijo = nodo.hijos[accion] = Nodo(jugadores)
+                hijo.disponible = 1
+            else:
+                def ucb(accion):
+                    hijo = nodo.hijos[accion]
+                    if hijo.visitas == 0:
+                        return float("inf")
+                    media = hijo.suma[actor] / hijo.visitas
+                    return media + escala * math.sqrt(math.log(hijo.disponible) / hijo.visitas)
+
+                accion = max(acciones, key=ucb)
+                hijo = nodo.hijos[accion]
+            calle = estado.calle
+            estado.aplicar(*accion)
+            camino.append(hijo)
+            nodo = hijo
+            if not estado.terminada and estado.calle != calle:
+                nodo = nodo.hijos.setdefault(("mesa", tuple(estado.mesa_visible())), Nodo(jugadores))
+                camino.append(nodo)
+            if nuevas:
+                break
+        return camino, estado
+
+    @staticmethod
+    def _propagar(camino, pagos, aportes, provisoria=False):
+        valores = [pago - aporte for pago, aporte in zip(pagos, aportes)]
+        for nodo in camino:
+            if not provisoria:
+                nodo.visitas += 1
+            for jugador, valor in enumerate(valores):
+                nodo.suma[jugador] += valor
+
+    def _iterar_lote(self, raiz, raiz_estado, aportes, escala):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.procesos)
+        caminos, hojas = [], []
+        for _ in range(self.lote):
+            camino, hoja = self._seleccionar(raiz, raiz_estado.repartir(self.rng), escala)
+            # Pérdida virtual: la visita se cuenta ya, así el resto del lote prefiere otros caminos
+            for nodo in camino:
+                nodo.visitas += 1
+            caminos.append(camino)
+            hojas.append(hoja)
+        partes = [hojas[i::self.procesos] for i in range(self.procesos)]
+        tareas = [(parte, self.pesos_rollout, self.rng.getrandbits(64)) for parte in partes if parte]
+        resultados = [pagos for lote in self._pool.map(_rollouts, tareas) for pagos in lote]
+        # Se deshace el reparto intercalado de partes
+        orden = [indice for i in range(self.procesos) for indice in range(i, len(hojas), self.procesos)]
+        for indice, pagos in zip(orden, resultados):
+            self._propagar(caminos[indice], pagos, aportes, provisoria=True)
+        self.iteraciones += len(hojas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Visitas de la raíz de IS-MCTS según el tiempo de búsqueda")
+    parser.add_argument("--tiempos", type=float, nargs="+", default=[0.1, 0.4, 1.6])
+    parser.add_argument("--jugadores", type=int, default=3)
+    parser.add_argument("--exploracion", type=float, default=1.0)
+    parser.add_argument("--semilla", type=int, default=11)
+    args = parser.parse_args()
+
+    from example_custom_players import SimpleAIStrategy
+    from pokerSimulator import InteractivePokerGame
+
+    # Primera decisión pre-flop de una mesa fija
+    random.seed(args.semilla)
+    mesa = InteractivePokerGame([SimpleAIStrategy(f"Bot {i}") for i in range(args.jugadores)],
+                                [10000] * args.jugadores, (50, 100))
+    jugador = mesa.state.actor_indices[0]
+
+    anteriores = None
+    crecen = True
+    for tiempo in sorted(args.tiempos):
+        buscador = BuscadorMCTS(tiempo=tiempo, exploracion=args.exploracion)
+        buscador.rng.seed(args.semilla)
+        mejor = buscador.decidir(mesa.state, jugador)
+        visitas = buscador.visitas_raiz()
+        print(f"⏱️ {tiempo:g}s: {buscador.iteraciones:,} iteraciones, elige {mejor[0]} | "
+              + " ".join(f"{accion[0]}={cantidad:,}" for accion, cantidad in
+                         sorted(visitas.items(), key=lambda item: item[1], reverse=True)))
+        if anteriores is not None:
+            crecen &= all(cantidad > anteriores.get(accion, 0) for accion, cantidad in visitas.items())
+        anteriores = visitas
+
+    if crecen:
+        print("✅ Todas las acciones de la raíz ganan visitas con más tiempo")
+    else:
+        print("⚠️ Alguna acción de la raíz no ganó visitas con más tiempo")
+        raise SystemExit(1)
@@ -1,21 +1,29 @@
 
-from pokerkit import Automation, Mode, NoLimitTexasHoldem
-from abc import ABC, abstractmethod
-from deuces import Card
+import contextlib
+
+# pokerkit, deuces y los jugadores de ejemplo se importan dentro de las funciones que los
+# usan: importar este módulo (por ejemplo en cada proceso de un pool) queda casi gratis
 from playerstrategyABC import PlayerStrategy
-from example_custom_players import SimpleAIStrategy, AggressiveAIStrategy, ConservativeAIStrategy
-import traceback
 
 
 def convert_pokerkit_to_deuces_cards(pokerkit_cards):
     """
     Convierte cartas de pokerkit a formato deuces para pretty printing
     """
+    from deuces import Card
+    from console_renderer import deuces_card
+
     if not pokerkit_cards:
         return []
 
     deuces_cards = []
     for card in pokerkit_cards:
+        # Camino rápido: tabla precalculada de las 52 cartas
+        card_int = deuces_card(card)
+        if card_int is not None:
+            deuces_cards.append(card_int)
+            continue
+
         try:
             # Intentar convertir usando la representación string de la carta
             card_str = str(card)
@@ -64,80 +72,14 @@ def safe_print_pretty_cards(cards, prefix=""):
     """
     Imprime cartas de manera segura con pretty printing o fallback
     """
+    from console_renderer import format_cards
+
     if not cards:
         print(f"{prefix}(Sin cartas)")
         return
 
-    try:
-        # Intentar usar deuces para pretty printing
-        deuces_cards = convert_pokerkit_to_deuces_cards(cards)
-
-        # Verificar si tenemos cartas válidas para deuces
-        valid_deuces_cards = [c for c in deuces_cards if isinstance(c, int)]
-
-        if len(valid_deuces_cards) > 0:
-            # Usar pretty printing de deuces
-            import io
-            import sys
-
-            old_stdout = sys.stdout
-            sys.stdout = buffer = io.StringIO()
-            Card.print_pretty_cards(valid_deuces_cards)
-            cards_output = buffer.getvalue()
-            sys.stdout = old_stdout
-
-            # Añadir prefijo a cada línea si hay salida válida
-            lines = cards_output.strip().split('\n')
-            if lines and any(line.strip() for line in lines):
-                for line in lines:
-                    if line.strip():
-                        print(f"{prefix}{line}")
-            else:
-                # Fallback si no hay salida válida
-                card_strings = []
-                for card in cards:
-                    card_str = str(card)
-                    if '(' in card_str and ')' in card_str:
-                        start = card_str.find('(')
-                        end = card_str.find(')', start)
-                        if start != -1 and end != -1:
-                            card_strings.append(card_str[start+1:end])
-                        else:
-                            card_strings.append(card_str)
-                    else:
-                        card_strings.append(card_str)
-                print(f"{prefix}{' '.join(card_strings)}")
-        else:
-            # Fallback: usar representación string simple
-            card_strings = []
-            for card in cards:
-                card_str = str(card)
-                if '(' in card_str and ')' in card_str:
-                    start = card_str.find('(')
-                    end = card_str.find(')', start)
-                    if start != -1 and end != -1:
-                        card_strings.append(card_str[start+1:end])
-                    else:
-                        card_strings.append(card_str)
-                else:
-                    card_strings.append(card_str)
-            print(f"{prefix}{' '.join(card_strings)}")
-
-    except Exception as e:
-        # Fallback final: representación string simple
-        card_strings = []
-        for card in cards:
-            card_str = str(card)
-            if '(' in card_str and ')' in card_str:
-                start = card_str.find('(')
-                end = card_str.find(')', start)
-                if start != -1 and end != -1:
-                    card_strings.append(card_str[start+1:end])
-                else:
-                    card_strings.append(card_str)
-            else:
-                card_strings.append(card_str)
-        print(f"{prefix}{' '.join(card_strings)}")
+    # Los textos de las cartas están precalculados: no hace falta capturar sys.stdout
+    print(f"{prefix}{format_cards(cards)}")
 
 
 class HumanPlayerStrategy(PlayerStrategy):
@@ -205,7 +147,8 @@ class HumanPlayerStrategy(PlayerStrategy):
 
 
 class InteractivePokerGame:
-    def __init__(self, player_strategies=None, starting_stacks=None, blinds=(200, 400)):
+    def __init__(self, player_strategies=None, starting_stacks=None, blinds=(200, 400), renderer=None,
+                 recorder=None, aggregator=None, raise_errors=False):
         """
         Inicializa una simulación interactiva de Texas Hold'em No Limit
 
@@ -213,9 +156,17 @@ class InteractivePokerGame:
             player_strategies: Lista de estrategias PlayerStrategy para cada jugador
             starting_stacks: Lista con fichas iniciales para cada jugador
             blinds: Tupla con (small blind, big blind)
+            renderer: ConsoleRenderer para el modo en vivo (None = impresión normal)
+            recorder: DatasetWriter que guarda cada decisión para entrenamiento (ver dataset.py)
+            aggregator: ResultsAggregator que acumula el resultado de la mano (ver aggregation.py)
+            raise_errors: Propagar los errores de la mano (y cortarla si no termina) en vez de imprimirlos
         """
+        from pokerkit import Automation, Mode, NoLimitTexasHoldem
+
         # Configuración por defecto si no se proporcionan estrategias
         if player_strategies is None:
+            from example_custom_players import SimpleAIStrategy, AggressiveAIStrategy, ConservativeAIStrategy
+
             player_strategies = [
                 ConservativeAIStrategy("Bot 0"),
                 SimpleAIStrategy("Bot 1"),
@@ -225,6 +176,10 @@ class InteractivePokerGame:
             ]
 
         self.player_strategies = player_strategies
+        self.renderer = renderer
+        self.recorder = recorder
+        self.aggregator = aggregator
+        self.raise_errors = raise_errors
         num_players = len(player_strategies)
 
         if starting_stacks is None:
@@ -264,62 +219,22 @@ class InteractivePokerGame:
             mode=Mode.TOURNAMENT,
         )
 
+        # Hash Zobrist de la mano, compartido con las estrategias a través de features
+        from features import FeaturePipeline
+        from zobrist import ZobristHasher
+
+        self.hasher = ZobristHasher()
+        self.hasher.sync(self.state)
+        FeaturePipeline.for_state(self.state).hasher = self.hasher
+
     def print_game_state(self, show_all_cards=False, compact=False):
         """Imprime el estado actual del juego"""
         if compact:
-            # Versión compacta para turnos entre acciones
-            street_names = ["Pre-flop", "Flop", "Turn", "River"]
-            try:
-                current_street = street_names[min(
-                    self.state.street_index if self.state.street_index is not None else 0, 3)]
-            except (TypeError, AttributeError):
-                current_street = "Pre-flop"
-
-            total_pot = sum(self.state.bets) if self.state.bets else 0
-
-            # Cartas comunitarias con pretty printing
-            community_cards = []
-            try:
-                for cards in self.state.board_cards:
-                    community_cards.extend(cards)
-            except (TypeError, AttributeError):
-                pass
-
-            print(f"\n{current_street} | Bote: {total_pot:,}")
-            if community_cards:
-                print("🃏 Mesa:")
-                safe_print_pretty_cards(community_cards)
+            lines = self.compact_state_lines(show_all_cards)
+            if self.renderer is not None:
+                self.renderer.render(lines)
             else:
-                print("🃏 Mesa: (Sin cartas)")
-
-            # Información compacta de jugadores
-            for i in range(self.state.player_count):
-                name = self.player_names[i]
-                stack = self.state.stacks[i]
-                bet = self.state.bets[i] if self.state.bets else 0
-
-                # Indicador de turno
-                turn_indicator = "👉" if (
-                    self.state.actor_indices and i == self.state.actor_indices[0]) else "  "
-
-                # Cartas del jugador - mostrar para todos si no hay jugador humano, o según condiciones
-                should_show_cards = (show_all_cards or
-                                     # No hay jugador humano, mostrar todas
-                                     (self.human_player < 0) or
-                                     # Es el jugador humano
-                                     (i == self.human_player))
-
-                if should_show_cards:
-                    if self.state.hole_cards[i]:
-                        print(
-                            f"{turn_indicator} {name}: {stack:,} (apuesta: {bet:,})")
-                        safe_print_pretty_cards(
-                            self.state.hole_cards[i], "       ")
-                    else:
-                        print(
-                            f"{turn_indicator} {name}: {stack:,} (apuesta: {bet:,}) [Fold]")
-                else:
-                    print(f"{turn_indicator} {name}: {stack:,} (apuesta: {bet:,})")
+                print("\n".join(lines))
         else:
             # Versión completa original
             print("\n" + "="*60)
@@ -373,6 +288,64 @@ class InteractivePokerGame:
             else:
                 print("🏁 Ronda terminada")
 
+    def compact_state_lines(self, show_all_cards=False):
+        """Líneas de la versión compacta del estado (una por stack, apuesta, mesa, etc.)"""
+        from console_renderer import format_cards
+
+        # Versión compacta para turnos entre acciones
+        street_names = ["Pre-flop", "Flop", "Turn", "River"]
+        try:
+            current_street = street_names[min(
+                self.state.street_index if self.state.street_index is not None else 0, 3)]
+        except (TypeError, AttributeError):
+            current_street = "Pre-flop"
+
+        total_pot = sum(self.state.bets) if self.state.bets else 0
+
+        # Cartas comunitarias con pretty printing
+        community_cards = []
+        try:
+            for cards in self.state.board_cards:
+                community_cards.extend(cards)
+        except (TypeError, AttributeError):
+            pass
+
+        lines = ["", f"{current_street} | Bote: {total_pot:,}"]
+        if community_cards:
+            lines.append("🃏 Mesa:")
+            lines.append(format_cards(community_cards))
+        else:
+            lines.append("🃏 Mesa: (Sin cartas)")
+
+        # Información compacta de jugadores
+        for i in range(self.state.player_count):
+            name = self.player_names[i]
+            stack = self.state.stacks[i]
+            bet = self.state.bets[i] if self.state.bets else 0
+
+            # Indicador de turno
+            turn_indicator = "👉" if (
+                self.state.actor_indices and i == self.state.actor_indices[0]) else "  "
+
+            # Cartas del jugador - mostrar para todos si no hay jugador humano, o según condiciones
+            should_show_cards = (show_all_cards or
+                                 # No hay jugador humano, mostrar todas
+                                 (self.human_player < 0) or
+                                 # Es el jugador humano
+                                 (i == self.human_player))
+
+            if should_show_cards:
+                if self.state.hole_cards[i]:
+                    lines.append(
+                        f"{turn_indicator} {name}: {stack:,} (apuesta: {bet:,})")
+                    lines.append("       " + format_cards(self.state.hole_cards[i]))
+                else:
+                    lines.append(
+                        f"{turn_indicator} {name}: {stack:,} (apuesta: {bet:,}) [Fold]")
+            else:
+                lines.append(f"{turn_indicator} {name}: {stack:,} (apuesta: {bet:,})")
+        return lines
+
     def get_available_actions(self):
         """Obtiene las acciones disponibles para el jugador actual"""
         if not self.state.actor_indices:
@@ -422,7 +395,14 @@ class InteractivePokerGame:
             return None
 
         strategy = self.player_strategies[player_index]
-        return strategy.make_decision(self.state, actions, player_index)
+        decision = strategy.make_decision(self.state, actions, player_index)
+        if self.recorder is not None:
+            self.recorder.record(self.state, actions, player_index, decision)
+        return decision
+
+    def info_set_hash(self, player_index):
+        """Hash Zobrist de 64 bits de lo que sabe el jugador en este momento"""
+        return self.hasher.info_set_hash(self.state, player_index)
 
     def get_human_action(self):
         """Método legacy - ahora redirige a get_player_action"""
@@ -446,6 +426,13 @@ class InteractivePokerGame:
             elif action_type in ["bet", "raise", "allin"]:
                 self.state.complete_bet_or_raise_to(amount)
 
+            # La acción y las cartas que se repartieron después entran al hash
+            self.hasher.sync(self.state)
+
+            # La fila de la decisión se confirma solo si la acción se pudo ejecutar
+            if self.recorder is not None:
+                self.recorder.commit()
+
             # Notificar a la estrategia sobre la acción tomada
             if player_index is not None and 0 <= player_index < len(self.player_strategies):
                 strategy = self.player_strategies[player_index]
@@ -537,45 +524,92 @@ class InteractivePokerGame:
         max_actions = 1000
         action_count = 0
 
+        # En vivo, lo que impriman las estrategias va al registro del cuadro (salvo con un humano,
+        # que necesita ver sus opciones en el momento)
+        live_output = contextlib.nullcontext()
+        if self.renderer is not None:
+            self.renderer.reset()
+            if self.human_player < 0:
+                live_output = self.renderer.capture()
+
         # Loop principal del juego
         try:
-            while not self.is_hand_over() and action_count < max_actions:
-                if not self.state.actor_indices:
-                    break
+            with live_output:
+                while not self.is_hand_over() and action_count < max_actions:
+                    if not self.state.actor_indices:
+                        break
 
-                current_player = self.state.actor_indices[0]
+                    current_player = self.state.actor_indices[0]
 
-                # Obtener acción del jugador actual usando su estrategia
-                action = self.get_player_action(current_player)
-                if action is None:
-                    break
+                    # Obtener acción del jugador actual usando su estrategia
+                    action = self.get_player_action(current_player)
+                    if action is None:
+                        break
 
-                action_type, amount = action
-                if not self.execute_action(action_type, amount, current_player):
-                    continue
+                    action_type, amount = action
+                    if not self.execute_action(action_type, amount, current_player):
+                        continue
 
-                action_count += 1
+                    action_count += 1
 
-                # Mostrar estado actualizado en formato compacto
-                self.print_game_state(compact=True)
+                    # Mostrar estado actualizado en formato compacto
+                    self.print_game_state(compact=True)
 
             if action_count >= max_actions:
                 print(
                     "⚠️ Se alcanzó el límite máximo de acciones. Terminando la mano...")
 
         except Exception as e:
+            if self.raise_errors:
+                raise
             print(f"⚠️ Error durante el juego: {e}")
             print("Terminando la mano...")
 
+        if self.raise_errors and self.state.status:
+            raise RuntimeError(f"La mano se cortó sin terminar después de {action_count} acciones")
+
+        # Con la mano terminada se conoce el resultado de cada decisión registrada. Una mano cortada
+        # (error, estrategia sin acción o límite de acciones) no tiene resultado y no se cuenta
+        if not self.state.status:
+            if self.recorder is not None:
+                self.recorder.finish_hand(self.state)
+            if self.aggregator is not None:
+                self.aggregator.record_hand(self.player_names, self.state.starting_stacks, self.state.stacks,
+                                            max(self.state.blinds_or_straddles))
+        elif self.recorder is not None:
+            self.recorder.discard_hand()
+
         # Mostrar resultados
         self.show_results()
 
     @staticmethod
-    def repeated_hand_simulation(player_strategies=None, starting_stacks=None, blinds=(50, 100)):
-        """Función principal para ejecutar la simulación"""
+    def repeated_hand_simulation(player_strategies=None, starting_stacks=None, blinds=(50, 100), max_hands=None,
+                                 checkpoint_path=None, checkpoint_every=1, renderer=None, recorder=None,
+                                 aggregator=None, raise_errors=False):
+        """
+        Función principal para ejecutar la simulación
+
+        Args:
+            player_strategies: Lista de estrategias PlayerStrategy para cada jugador
+            starting_stacks: Lista con fichas iniciales para cada jugador
+            blinds: Tupla con (small blind, big blind)
+            max_hands: Límite de manos a jugar (None = hasta que quede un jugador)
+            checkpoint_path: Archivo de checkpoint. Si existe, la simulación se retoma desde ahí
+            checkpoint_every: Cada cuántas manos se guarda el checkpoint
+            renderer: ConsoleRenderer para ver la partida en vivo con redibujado diferencial
+            recorder: DatasetWriter que exporta las decisiones de todas las manos (ver dataset.py)
+            aggregator: ResultsAggregator con las estadísticas por estrategia de todas las manos (ver aggregation.py)
+            raise_errors: Propagar los errores (de una mano o de la corrida) en vez de imprimirlos, para que
+                quien guarda los resultados no tome como válida una corrida que falló
+
+        Returns:
+            Lista con las fichas finales de cada jugador, en el orden de player_strategies
+        """
 
         # Configuración por defecto si no se proporcionan estrategias
         if player_strategies is None:
+            from example_custom_players import SimpleAIStrategy, AggressiveAIStrategy, ConservativeAIStrategy
+
             player_strategies = [
                 SimpleAIStrategy("SimpleBot 1"),
                 AggressiveAIStrategy("AggressiveBot"),
@@ -587,22 +621,74 @@ class InteractivePokerGame:
         # Configuración por defecto para stacks
         if starting_stacks is None:
             starting_stacks = [10000] * len(player_strategies)
+
+        # Fichas de cada jugador original y qué jugador original ocupa cada asiento de la mesa actual
+        final_stacks = list(starting_stacks)
+        seats = list(range(len(player_strategies)))
+        table_stacks = list(starting_stacks)
+        hands_played = 0
+
+        if checkpoint_path is not None:
+            from checkpoint import clear_checkpoint, load_checkpoint, save_checkpoint
+
+            checkpoint = load_checkpoint(checkpoint_path, player_strategies)
+            if checkpoint is not None:
+                player_strategies = checkpoint["strategies"]
+                final_stacks = checkpoint["final_stacks"]
+                seats = checkpoint["seats"]
+                table_stacks = checkpoint["table_stacks"]
+                hands_played = checkpoint["hands_played"]
+                if aggregator is not None and checkpoint["aggregator"] is not None:
+                    from aggregation import ResultsAggregator
+
+                    # Se reemplaza el contenido del agregador recibido, que es el que lee quien llama
+                    aggregator.results.clear()
+                    aggregator.hands = 0
+                    aggregator.merge(ResultsAggregator.from_dict(checkpoint["aggregator"]))
+                if recorder is not None and checkpoint["dataset_rows"] is not None:
+                    # Las manos posteriores al checkpoint se vuelven a jugar: sus filas se descartan
+                    recorder.rewind(checkpoint["dataset_rows"])
+                print(f"💾 Retomando desde el checkpoint ({hands_played:,} manos jugadas)")
+
+        def start_hand(strategies, stacks):
+            # El checkpoint se toma antes de crear la mesa, porque pokerkit baraja al crearla
+            if checkpoint_path is not None and hands_played % checkpoint_every == 0:
+                save_checkpoint(checkpoint_path, player_strategies, final_stacks, seats, stacks,
+                                hands_played, blinds, aggregator,
+                                recorder.committed_rows if recorder is not None else None)
+            hand = InteractivePokerGame(
+                player_strategies=strategies,
+                starting_stacks=stacks,
+                blinds=blinds,
+                renderer=renderer,
+                recorder=recorder,
+                aggregator=aggregator,
+                raise_errors=raise_errors
+            )
+            hand.play_hand()
+            return hand
+
         print("🎰" * 20)
         print("No Limit Texas Hold'em!")
         print("🎰" * 20)
         try:
-            # Crear y ejecutar el juego
-            game = InteractivePokerGame(
-                starting_stacks=starting_stacks,
-                blinds=blinds,
-                player_strategies=player_strategies
-            )
-
-            game.play_hand()
+            # Crear y ejecutar el juego (salvo que el límite ya se haya alcanzado, por ejemplo max_hands=0)
+            if max_hands is not None and hands_played >= max_hands:
+                print(f"⏱️ Se alcanzó el límite de {max_hands:,} manos")
+                game = None
+            else:
+                game = start_hand([player_strategies[i] for i in seats], table_stacks)
+                hands_played += 1
 
-            while True:
+            while game is not None:
                 # Crear nuevo juego con stacks actualizados
                 new_stacks = list(game.state.stacks)
+                for seat, stack in zip(seats, new_stacks):
+                    final_stacks[seat] = stack
+
+                if max_hands is not None and hands_played >= max_hands:
+                    print(f"⏱️ Se alcanzó el límite de {max_hands:,} manos")
+                    break
 
                 # Contar jugadores con fichas suficientes para al menos el small blind
                 players_with_chips = sum(
@@ -630,14 +716,10 @@ class InteractivePokerGame:
                         # Crear nuevas estrategias para los jugadores activos
                         active_strategies = [game.player_strategies[i]
                                              for i in active_players]
+                        seats = [seats[i] for i in active_players]
 
-                        game = InteractivePokerGame(
-                            player_strategies=active_strategies,
-                            starting_stacks=adjusted_stacks,
-                            blinds=blinds
-                        )
-
-                        game.play_hand()
+                        game = start_hand(active_strategies, adjusted_stacks)
+                        hands_played += 1
                     else:
 
                         print("🏁 Solo queda un jugador. ¡Juego terminado!")
@@ -664,13 +746,25 @@ class InteractivePokerGame:
                         print("🚫 No hay suficientes jugadores para continuar")
                         break
 
+            # La corrida terminó: el próximo llamado con el mismo archivo empieza de cero
+            if checkpoint_path is not None:
+                clear_checkpoint(checkpoint_path)
+
         except KeyboardInterrupt:
             print("\n👋 Juego cancelado. ¡Hasta la próxima!")
+            if checkpoint_path is not None:
+                print(f"💾 Se puede retomar desde {checkpoint_path}")
         except Exception as e:
+            if raise_errors:
+                raise
+            import traceback
+
             print(f"❌ Error inesperado: {e}")
             print("Línea del error:")
             traceback.print_exc()
 
+        return final_stacks
+
 
 if __name__ == "__main__":
     InteractivePokerGame.repeated_hand_simulation()
@@ -0,0 +1,362 @@
+"""
+Tablas de push/fold de equilibrio para finales con stacks cortos.
+
+Con pocas ciegas de stack casi todas las decisiones pre-flop son ir all-in o retirarse. Este
+módulo resuelve offline, para mesas de 2 a 9 jugadores y stacks de 1 a 20 ciegas grandes, los
+rangos de equilibrio de:
+
+- push: ir all-in cuando todos los anteriores se retiraron
+- call: pagar el all-in de un jugador anterior cuando nadie más entró
+
+Las 169 clases de manos iniciales se guardan como máscaras de bits (3 palabras de 64 bits por
+rango), así que consultar una decisión es indexar un arreglo y probar un bit.
+
+El modelo usa equity de fichas, stacks iguales y a lo sumo un jugador que paga el all-in. Se
+resuelve con fictitious play sobre la matriz de equity 169x169 (Monte Carlo, con los conteos
+exactos de combos compatibles para el efecto de bloqueo).
+
+Uso:
+
+    python push_fold.py tablas_push_fold/
+
+    class MiBot(PushFoldMixin, SimpleAIStrategy):
+        push_fold_tablas = "tablas_push_fold"
+"""
+import argparse
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from CLANKER import COMBOS, MAZO
+from shared_evaluator import obtener_evaluador
+
+
+MAX_JUGADORES = 9
+PROFUNDIDADES = tuple(range(1, 21))
+NUM_CLASES = 169
+PALABRAS = 3
+
+_tablas = {}
+
+
+def clase_mano(mano):
+    """
+    Clase (0-168) de una mano inicial en formato deuces, como celda de la grilla 13x13:
+    pares en la diagonal, suited con la carta alta en la fila y offsuit con la alta en la columna.
+    """
+    alto, bajo = sorted(((carta >> 8) & 0xF for carta in mano), reverse=True)
+    if alto != bajo and not mano[0] & mano[1] & 0xF000:
+        return bajo * 13 + alto
+    return alto * 13 + bajo
+
+
+def nombre_clase(clase):
+    """Nombre de la clase ("AKs", "T9o", "77")."""
+    rangos = "23456789TJQKA"
+    fila, columna = divmod(clase, 13)
+    if fila == columna:
+        return rangos[fila] * 2
+    if fila > columna:
+        return f"{rangos[fila]}{rangos[columna]}s"
+    return f"{rangos[columna]}{rangos[fila]}o"
+
+
+CLASE_COMBO = np.array([clase_mano((MAZO[a], MAZO[b])) for a, b in COMBOS], dtype=np.int64)
+
+
+def compatibles():
+    """
+    Matriz 169x169 con, para cada combo de la clase a, cuántos combos de la clase b no comparten
+    cartas con él (en promedio). Normalizada por fila es la distribución del rival dada la mano.
+    """
+    cartas = np.array(COMBOS)
+    disjuntos = ~((cartas[:, None, 0] == cartas[None, :, 0]) | (cartas[:, None, 0] == cartas[None, :, 1]) |
+                  (cartas[:, None, 1] == cartas[None, :, 0]) | (cartas[:, None, 1] == cartas[None, :, 1]))
+    pertenencia = np.zeros((len(COMBOS), NUM_CLASES))
+    pertenencia[np.arange(len(COMBOS)), CLASE_COMBO] = 1
+    conteo = pertenencia.T @ disjuntos @ pertenencia
+    return conteo / pertenencia.sum(axis=0)[:, None]
+
+
+def _fila_equity(tarea):
+    """Tarea de un proceso del pool: equity de la clase a contra cada clase b >= a."""
+    a, muestras, semilla = tarea
+    rng = random.Random(semilla)
+    evaluador = obtener_evaluador()
+    combos_por_clase = [[] for _ in range(NUM_CLASES)]
+    for combo, clase in zip(COMBOS, CLASE_COMBO):
+        combos_por_clase[clase].append((MAZO[combo[0]], MAZO[combo[1]]))
+
+    fila = np.full(NUM_CLASES, np.nan)
+    for b in range(a, NUM_CLASES):
+        pares = [(x, y) for x in combos_por_clase[a] for y in combos_por_clase[b] if not set(x) & set(y)]
+        puntos = 0.0
+        for _ in range(muestras):
+            mano_a, mano_b = rng.choice(pares)
+            resto = [carta for carta in MAZO if carta not in mano_a and carta not in mano_b]
+            mesa = rng.sample(resto, 5)
+            rango_a, rango_b = evaluador.evaluate(list(mano_a), mesa), evaluador.evaluate(list(mano_b), mesa)
+            puntos += 1.0 if rango_a < rango_b else (0.5 if rango_a == rango_b else 0.0)
+        fila[b] = puntos / muestras
+    return a, fila
+
+
+def matriz_equity(muestras=300, procesos=None, semilla=0):
+    """Equity all-in pre-flop de cada clase contra cada clase (Monte Carlo)."""
+    equity = np.zeros((NUM_CLASES, NUM_CLASES))
+    tareas = [(a, muestras, semilla * 1000 + a) for a in range(NUM_CLASES)]
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        for a, fila in pool.map(_fila_equity, tareas):
+            equity[a, a:] = fila[a:]
+    # La parte inferior se completa por simetría
+    inferior = np.tril_indices(NUM_CLASES, -1)
+    equity[inferior] = 1 - equity.T[inferior]
+    return equity
+
+
+def a_mascara(rango):
+    """Vector booleano de 169 clases -> 3 palabras de 64 bits."""
+    palabras = np.zeros(PALABRAS, dtype=np.uint64)
+    for clase in np.flatnonzero(rango):
+        palabras[clase >> 6] |= np.uint64(1) << np.uint64(clase & 63)
+    return palabras
+
+
+def ciegas_por_posicion(jugadores, ciega_chica=0.5):
+    """Ciega puesta (en ciegas grandes) por cada posición en orden de acción pre-flop."""
+    ciegas = np.zeros(jugadores)
+    ciegas[-2:] = (ciega_chica, 1.0)
+    return ciegas
+
+
+def resolver(equity, compat, jugadores, stack, iteraciones=300):
+    """
+    Rangos de equilibrio de push/fold con fictitious play.
+
+    Args:
+        equity: Matriz de equity 169x169
+        compat: Matriz de combos compatibles (ver compatibles)
+        jugadores: Jugadores en la mesa
+        stack: Stack efectivo en ciegas grandes
+
+    Returns:
+        (push, call): push[p] es el rango de all-in de la posición p y call[p, c] el rango con
+        el que la posición c paga el all-in de p (vectores de probabilidad por clase)
+    """
+    ciegas = ciegas_por_posicion(jugadores)
+    push = np.full((jugadores, NUM_CLASES), 0.5)
+    call = np.full((jugadores, jugadores, NUM_CLASES), 0.5)
+    push[-1] = 0
+    pozo_muerto = ciegas.sum()
+    # Con estas dos matrices, la probabilidad y la equity contra un rango son productos matriz-vector
+    compat_equity = compat * equity
+    compat_total = compat.sum(axis=1)
+
+    def contra(rango):
+        peso = compat @ rango
+        return peso, np.divide(compat_equity @ rango, peso, out=np.zeros(NUM_CLASES), where=peso > 0)
+
+    for iteracion in range(1, iteraciones + 1):
+        nuevo_push = np.zeros_like(push)
+        nuevo_call = np.zeros_like(call)
+
+        for p in range(jugadores - 1):
+            # Pusher: cada rival de atrás paga con su rango, el primero que paga va al showdown
+            sigue_sin_pagar = np.ones(NUM_CLASES)
+            ganancia = np.zeros(NUM_CLASES)
+            for c in range(p + 1, jugadores):
+                peso, equity_contra = contra(call[p, c])
+                prob_paga = peso / compat_total
+                muertas = pozo_muerto - ciegas[p] - ciegas[c]
+                showdown = equity_contra * (2 * stack + muertas) - (stack - ciegas[p])
+                ganancia += sigue_sin_pagar * prob_paga * showdown
+                sigue_sin_pagar = sigue_sin_pagar * (1 - prob_paga)
+            ganancia += sigue_sin_pagar * pozo_muerto
+            nuevo_push[p] = ganancia > 0
+
+            # Quien paga: equity contra el rango de all-in de p
+            _, equity_contra = contra(push[p])
+            for c in range(p + 1, jugadores):
+                muertas = pozo_muerto - ciegas[p] - ciegas[c]
+                nuevo_call[p, c] = equity_contra * (2 * stack + muertas) - (stack - ciegas[c]) > 0
+
+        push += (nuevo_push - push) / (iteracion + 1)
+        call += (nuevo_call - call) / (iteracion + 1)
+
+    return push, call
+
+
+def construir_tablas(directorio, muestras=300, iteraciones=300, procesos=None, semilla=0):
+    """
+    Resuelve todas las mesas (2-9 jugadores) y profundidades y guarda las máscaras en directorio:
+    push.npy [jugadores, profundidad, posición, palabra], call.npy [jugadores, profundidad,
+    posición del all-in, posición que paga, palabra] y meta.json.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    ruta_equity = os.path.join(directorio, "equity_169.npy")
+    if os.path.exists(ruta_equity):
+        equity = np.load(ruta_equity)
+    else:
+        equity = matriz_equity(muestras, procesos, semilla)
+        np.save(ruta_equity, equity)
+    compat = compatibles()
+
+    tabla_push = np.zeros((MAX_JUGADORES + 1, len(PROFUNDIDADES), MAX_JUGADORES, PALABRAS), dtype=np.uint64)
+    tabla_call = np.zeros((MAX_JUGADORES + 1, len(PROFUNDIDADES), MAX_JUGADORES, MAX_JUGADORES, PALABRAS),
+                          dtype=np.uint64)
+    for jugadores in range(2, MAX_JUGADORES + 1):
+        for d, stack in enumerate(PROFUNDIDADES):
+            push, call = resolver(equity, compat, jugadores, stack, iteraciones)
+            for p in range(jugadores):
+                tabla_push[jugadores, d, p] = a_mascara(push[p] > 0.5)
+                for c in range(p + 1, jugadores):
+                    tabla_call[jugadores, d, p, c] = a_mascara(call[p, c] > 0.5)
+        print(f"✅ Mesas de {jugadores} jugadores resueltas")
+
+    np.save(os.path.join(directorio, "push.npy"), tabla_push)
+    np.save(os.path.join(directorio, "call.npy"), tabla_call)
+    with open(os.path.join(directorio, "meta.json"), "w") as archivo:
+        json.dump({"profundidades": PROFUNDIDADES, "muestras": muestras, "iteraciones": iteraciones}, archivo)
+
+
+class TablaPushFold:
+    """Consultas O(1) a las tablas de construir_tablas."""
+
+    def __init__(self, directorio):
+        self.push = np.load(os.path.join(directorio, "push.npy"))
+        self.call = np.load(os.path.join(directorio, "call.npy"))
+        with open(os.path.join(directorio, "meta.json")) as archivo:
+            self.profundidades = json.load(archivo)["profundidades"]
+
+    def _profundidad(self, stack_bb):
+        if stack_bb > self.profundidades[-1] + 0.5:
+            return None
+        return min(len(self.profundidades) - 1, max(0, round(stack_bb) - self.profundidades[0]))
+
+    @staticmethod
+    def _contiene(palabras, clase):
+        return bool(int(palabras[clase >> 6]) >> (clase & 63) & 1)
+
+    def debe_pushear(self, clase, jugadores, posicion, stack_bb):
+        """True/False, o None si el stack es demasiado profundo para push/fold."""
+        d = self._profundidad(stack_bb)
+        return None if d is None else self._contiene(self.push[jugadores, d, posicion], clase)
+
+    def debe_pagar(self, clase, jugadores, posicion_push, posicion, stack_bb):
+        d = self._profundidad(stack_bb)
+        return None if d is None else self._contiene(self.call[jugadores, d, posicion_push, posicion], clase)
+
+    def rango(self, jugadores, posicion, stack_bb, posicion_que_paga=None):
+        """
+        Nombres de las clases del rango de push (o de call si se indica quien paga). Lanza
+        ValueError si el stack es demasiado profundo para las tablas.
+        """
+        d = self._profundidad(stack_bb)
+        if d is None:
+            raise ValueError(f"Stack de {stack_bb} ciegas fuera de las tablas (máximo {self.profundidades[-1]})")
+        if posicion_que_paga is None:
+            palabras = self.push[jugadores, d, posicion]
+        else:
+            palabras = self.call[jugadores, d, posicion, posicion_que_paga]
+        return [nombre_clase(clase) for clase in range(NUM_CLASES) if self._contiene(palabras, clase)]
+
+
+def obtener_tabla(directorio):
+    """TablaPushFold compartida por proceso para cada directorio."""
+    if directorio not in _tablas:
+        _tablas[directorio] = TablaPushFold(directorio)
+    return _tablas[directorio]
+
+
+class PushFoldMixin:
+    """
+    Mixin para estrategias: pre-flop, con stack corto, decide push/fold con las tablas y en
+    otro caso delega en la estrategia siguiente en el MRO.
+
+        class MiBot(PushFoldMixin, SimpleAIStrategy):
+            push_fold_tablas = "tablas_push_fold"
+    """
+
+    push_fold_tablas = "tablas_push_fold"
+
+    def make_decision(self, game_state, available_actions, player_index):
+        decision = self.push_fold_decision(game_state, available_actions, player_index)
+        if decision is not None:
+            return decision
+        return super().make_decision(game_state, available_actions, player_index)
+
+    def push_fold_decision(self, game_state, available_actions, player_index):
+        """Acción de las tablas, o None si la situación no es de push/fold."""
+        if not available_actions or game_state.street_index != 0:
+            return None
+        jugadores = game_state.player_count
+        if not 2 <= jugadores <= MAX_JUGADORES:
+            return None
+
+        # Posición en orden de acción pre-flop: la ciega chica es jugadores - 2 y la grande jugadores - 1.
+        # En pokerkit la ciega chica es el jugador 0 (el 1 en heads-up) y la grande el 1 (el 0)
+        def posicion(jugador):
+            return 1 - jugador if jugadores == 2 else (jugador - 2) % jugadores
+
+        ciega_grande = max(game_state.blinds_or_straddles)
+        ciegas = ciegas_por_posicion(jugadores, min(b for b in game_state.blinds_or_straddles if b) / ciega_grande)
+        total = [stack + bet for stack, bet in zip(game_state.stacks, game_state.bets)]
+        mi_posicion = posicion(player_index)
+
+        all_ins = []
+        for jugador, activo in enumerate(game_state.statuses):
+            if jugador == player_index or not activo:
+                continue
+            if posicion(jugador) < mi_posicion:
+                # Los anteriores tienen que haberse retirado, salvo a lo sumo uno que fue all-in
+                if game_state.stacks[jugador] != 0:
+                    return None
+                all_ins.append(jugador)
+            elif game_state.bets[jugador] != ciegas[posicion(jugador)] * ciega_grande:
+                return None
+        if len(all_ins) > 1:
+            return None
+
+        from features import features_for
+
+        clase = clase_mano(features_for(game_state, player_index).hole_cards)
+        acciones = {action_type: amount for action_type, description, amount in available_actions}
+        tabla = obtener_tabla(self.push_fold_tablas)
+
+        if not all_ins:
+            rivales = [total[j] for j, activo in enumerate(game_state.statuses) if activo and j != player_index]
+            stack_bb = min(total[player_index], max(rivales)) / ciega_grande
+            pushear = tabla.debe_pushear(clase, jugadores, mi_posicion, stack_bb)
+            if pushear is None:
+                return None
+            if pushear:
+                for tipo in ("allin", "raise", "bet", "call"):
+                    if tipo in acciones:
+                        return tipo, acciones[tipo]
+            return ("check", 0) if "check" in acciones else ("fold", 0)
+
+        rival = all_ins[0]
+        stack_bb = min(total[player_index], total[rival]) / ciega_grande
+        pagar = tabla.debe_pagar(clase, jugadores, posicion(rival), mi_posicion, stack_bb)
+        if pagar is None:
+            return None
+        if pagar and "call" in acciones:
+            return "call", acciones["call"]
+        return ("check", 0) if "check" in acciones else ("fold", 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construye las tablas de push/fold de equilibrio")
+    parser.add_argument("directorio")
+    parser.add_argument("--muestras", type=int, default=300, help="Muestras Monte Carlo por par de clases")
+    parser.add_argument("--iteraciones", type=int, default=300, help="Iteraciones de fictitious play")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    construir_tablas(args.directorio, args.muestras, args.iteraciones, args.procesos, args.semilla)
+    tabla = TablaPushFold(args.directorio)
+    print("Push heads-up con 10 ciegas:", " ".join(tabla.rango(2, 0, 10)))
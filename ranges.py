@@ -0,0 +1,170 @@
+"""
+Seguimiento bayesiano de los rangos de los rivales sobre los 1326 combos.
+
+Cada rival tiene un vector de pesos de numpy en el orden de CLANKER.COMBOS. Al repartirse cartas
+que el observador ve (las suyas y las de la mesa) se anulan de una vez todos los combos que las
+contienen, y cada acción observada multiplica el vector por una verosimilitud que depende de la
+fuerza de cada combo en la mesa de ese momento:
+
+- pasar descuenta un poco las manos más fuertes (que suelen apostar)
+- igualar descuenta las manos débiles
+- apostar o subir favorece las manos fuertes, tanto más cuanto mayor es la apuesta frente al pozo,
+  dejando un piso de faroles
+
+La fuerza es el percentil del combo entre los 1326: pre-flop por puntaje de Chen y después por el
+rango de deuces de su mejor mano con la mesa. Las equities de CLANKER aceptan estos rangos
+(equity_rangos, y el parámetro rangos de valor_esperado y elegir_jugada).
+
+    rangos = features_for(game_state, player_index).opponent_ranges  # {rival: pesos}
+"""
+import numpy as np
+
+from CLANKER import COMBOS, MAZO
+from shared_evaluator import obtener_evaluador
+
+
+NUM_COMBOS = len(COMBOS)
+COMBOS_ARRAY = np.array(COMBOS, dtype=np.int64)
+
+# BLOQUEO[carta] es True en los combos que contienen la carta (índice 0-51 de CLANKER.MAZO)
+BLOQUEO = np.zeros((52, NUM_COMBOS), dtype=bool)
+BLOQUEO[COMBOS_ARRAY[:, 0], np.arange(NUM_COMBOS)] = True
+BLOQUEO[COMBOS_ARRAY[:, 1], np.arange(NUM_COMBOS)] = True
+
+# Parámetros del modelo de verosimilitud (percentiles de fuerza y escalas de las logísticas)
+VEROSIMILITUD = {
+    "pasar_umbral": 0.85, "pasar_descuento": 0.5,
+    "igualar_umbral": 0.35, "igualar_piso": 0.2,
+    "apostar_umbral": 0.55, "apostar_umbral_extra": 0.3, "apostar_piso": 0.08,
+    "escala": 0.08,
+}
+
+
+def _logistica(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def fuerza_combos(mesa):
+    """
+    Percentil de fuerza (0 = peor, 1 = mejor) de cada uno de los 1326 combos con la mesa dada
+    (cartas deuces). Los combos que chocan con la mesa quedan con fuerza 0.
+    """
+    if not mesa:
+        from cfr_solver import percentil_chen
+
+        return np.array([percentil_chen((MAZO[a], MAZO[b])) for a, b in COMBOS])
+
+    evaluador = obtener_evaluador()
+    mesa = list(mesa)
+    en_mesa = set(mesa)
+    rangos = np.full(NUM_COMBOS, 7463)
+    for indice, (a, b) in enumerate(COMBOS):
+        if MAZO[a] not in en_mesa and MAZO[b] not in en_mesa:
+            rangos[indice] = evaluador.evaluate([MAZO[a], MAZO[b]], mesa)
+    # Rango de deuces más bajo = mejor mano: se pasa a percentil ordenando
+    orden = np.argsort(-rangos, kind="stable")
+    fuerza = np.empty(NUM_COMBOS)
+    fuerza[orden] = np.arange(NUM_COMBOS) / (NUM_COMBOS - 1)
+    fuerza[rangos == 7463] = 0.0
+    return fuerza
+
+
+def verosimilitud(accion, fuerza, tamano=0.0):
+    """
+    Probabilidad relativa de observar la acción con cada combo.
+
+    Args:
+        accion: "check", "call", "bet", "raise" o "allin"
+        fuerza: Vector de fuerza de fuerza_combos
+        tamano: Subida sobre la apuesta anterior dividida por el pozo (solo para apuestas)
+    """
+    p = VEROSIMILITUD
+    if accion == "check":
+        return 1 - p["pasar_descuento"] * _logistica((fuerza - p["pasar_umbral"]) / p["escala"])
+    if accion == "call":
+        return p["igualar_piso"] + (1 - p["igualar_piso"]) * _logistica((fuerza - p["igualar_umbral"]) / p["escala"])
+    umbral = p["apostar_umbral"] + p["apostar_umbral_extra"] * min(tamano, 2.0) / 2
+    return p["apostar_piso"] + (1 - p["apostar_piso"]) * _logistica((fuerza - umbral) / p["escala"])
+
+
+class SeguidorRangos:
+    """
+    Rangos de todos los rivales desde el punto de vista de un jugador.
+
+    sync() consume las operaciones nuevas del estado de pokerkit (cartas repartidas y acciones),
+    así que cuesta O(1) operaciones de numpy por acción.
+
+    Args:
+        observador: Índice del jugador que observa
+        jugadores: Jugadores en la mesa
+        fuerzas: Función mesa (tupla de cartas deuces) -> vector de fuerza (por defecto
+            fuerza_combos; features la cachea por mesa)
+    """
+
+    def __init__(self, observador, jugadores, fuerzas=None):
+        self.observador = observador
+        self.pesos = np.ones((jugadores, NUM_COMBOS))
+        self.pesos[observador] = 0
+        self.activos = [True] * jugadores
+        self.fuerzas = fuerzas or (lambda mesa: fuerza_combos(mesa))
+        self.mesa = ()
+        self.apuestas = [0] * jugadores
+        self.pozo = 0
+        self.procesadas = 0
+
+    def bloquear(self, cartas):
+        """Anula en todos los rangos los combos que contienen alguna de las cartas (índices 0-51)."""
+        self.pesos[:, BLOQUEO[list(cartas)].any(axis=0)] = 0
+
+    def observar(self, jugador, accion, tamano=0.0):
+        """Actualiza el rango del jugador con una acción observada en la mesa actual."""
+        if jugador == self.observador:
+            return
+        self.pesos[jugador] *= verosimilitud(accion, self.fuerzas(self.mesa), tamano)
+        total = self.pesos[jugador].sum()
+        if total > 0:
+            # Se normaliza para que los pesos no se vayan a cero tras muchas acciones
+            self.pesos[jugador] *= NUM_COMBOS / total
+
+    def sync(self, game_state):
+        from zobrist import card_index
+
+        operaciones = game_state.operations
+        for operacion in operaciones[self.procesadas:]:
+            nombre = type(operacion).__name__
+            if nombre == "HoleDealing" and operacion.player_index == self.observador:
+                self.bloquear(card_index(carta) for carta in operacion.cards)
+            elif nombre == "BoardDealing":
+                indices = [card_index(carta) for carta in operacion.cards]
+                self.bloquear(indices)
+                self.mesa = self.mesa + tuple(MAZO[indice] for indice in indices)
+            elif nombre == "BetCollection":
+                self.apuestas = [0] * len(self.apuestas)
+            elif nombre == "BlindOrStraddlePosting":
+                self.apuestas[operacion.player_index] += operacion.amount
+                self.pozo += operacion.amount
+            elif nombre == "Folding":
+                self.activos[operacion.player_index] = False
+            elif nombre == "CheckingOrCalling":
+                jugador = operacion.player_index
+                self.observar(jugador, "call" if operacion.amount else "check")
+                self.apuestas[jugador] += operacion.amount
+                self.pozo += operacion.amount
+            elif nombre == "CompletionBettingOrRaisingTo":
+                jugador = operacion.player_index
+                anterior = max(self.apuestas)
+                tamano = (operacion.amount - anterior) / max(self.pozo, 1)
+                self.observar(jugador, "raise", tamano)
+                self.pozo += operacion.amount - self.apuestas[jugador]
+                self.apuestas[jugador] = operacion.amount
+        self.procesadas = len(operaciones)
+
+    def rango(self, jugador):
+        """Pesos normalizados (suman 1) del rango del jugador."""
+        total = self.pesos[jugador].sum()
+        return self.pesos[jugador] / total if total > 0 else self.pesos[jugador]
+
+    def rangos_rivales(self):
+        """Diccionario rival activo -> pesos normalizados."""
+        return {jugador: self.rango(jugador) for jugador, activo in enumerate(self.activos)
+                if activo and jugador != self.observador}
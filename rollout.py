@@ -0,0 +1,263 @@
+"""
+Simulación liviana de manos para estrategias con búsqueda (rollouts).
+
+bifurcar(game_state, player_index) copia el punto de decisión que recibe make_decision a un
+EstadoSimulado: listas de enteros con stacks, apuestas, aportes y cartas en formato deuces.
+Clonarlo es copiar esas listas, así que se pueden jugar miles de continuaciones por segundo sin
+tocar el estado de pokerkit.
+
+    from rollout import bifurcar, politica_aleatoria, valor_acciones
+
+    raiz = bifurcar(game_state, player_index)
+    valores = valor_acciones(raiz, politica_aleatoria(), rollouts=500)
+    # {("call", 200): 35.2, ("fold", 0): -100.0, ...}
+
+Antes de jugar una continuación, repartir() vuelve a dar las cartas que el jugador no conoce
+(las de los rivales que siguen en la mano y las de la mesa que faltan), sin repetir las que sí
+conoce. Las acciones tienen el mismo formato que las del simulador: ("fold", 0), ("check", 0),
+("call", monto), ("bet"/"raise", mínimo a subir) y ("allin", máximo), con montos "subir a".
+"""
+import random
+
+from CLANKER import MAZO
+from shared_evaluator import obtener_evaluador
+
+
+CARTAS_POR_CALLE = (0, 3, 4, 5)
+
+
+class EstadoSimulado:
+    """
+    Mano de No Limit Hold'em en listas. Los jugadores se indexan igual que en pokerkit.
+
+    Atributos principales: stacks, apuestas (de la calle), aportes (de toda la mano),
+    activos (no se retiraron), mesa, manos, calle, actor, pendientes (quienes todavía deben
+    actuar en la calle), incremento (última subida) y ciega_grande.
+    """
+
+    __slots__ = ("stacks", "apuestas", "aportes", "activos", "mesa", "manos", "calle", "actor",
+                 "pendientes", "incremento", "ciega_grande", "jugador", "stacks_iniciales", "mazo")
+
+    def clonar(self):
+        copia = EstadoSimulado.__new__(EstadoSimulado)
+        copia.stacks = self.stacks[:]
+        copia.apuestas = self.apuestas[:]
+        copia.aportes = self.aportes[:]
+        copia.activos = self.activos[:]
+        copia.mesa = self.mesa[:]
+        copia.manos = self.manos[:]
+        copia.pendientes = self.pendientes[:]
+        copia.calle = self.calle
+        copia.actor = self.actor
+        copia.incremento = self.incremento
+        copia.ciega_grande = self.ciega_grande
+        copia.jugador = self.jugador
+        copia.stacks_iniciales = self.stacks_iniciales
+        copia.mazo = self.mazo
+        return copia
+
+    @property
+    def terminada(self):
+        return self.actor is None
+
+    def repartir(self, rng=random):
+        """
+        Copia con las cartas desconocidas para self.jugador vueltas a repartir: las de los rivales
+        activos y las de la mesa que faltan. Las de los rivales retirados no se reparten.
+        """
+        copia = self.clonar()
+        cartas = rng.sample(self.mazo, 2 * (sum(copia.activos) - 1) + 5 - len(copia.mesa))
+        siguiente = 0
+        for jugador, activo in enumerate(copia.activos):
+            if activo and jugador != self.jugador:
+                copia.manos[jugador] = tuple(cartas[siguiente:siguiente + 2])
+                siguiente += 2
+        # La mesa completa queda reservada; se muestra de a una calle en mesa_visible
+        copia.mesa = copia.mesa + cartas[siguiente:]
+        return copia
+
+    def mesa_visible(self):
+        return self.mesa[:CARTAS_POR_CALLE[self.calle]]
+
+    def acciones(self):
+        """Acciones disponibles para el actor, en el formato del simulador."""
+        if self.actor is None:
+            return []
+        jugador = self.actor
+        maxima = max(self.apuestas)
+        a_igualar = maxima - self.apuestas[jugador]
+        tope = self.stacks[jugador] + self.apuestas[jugador]
+        acciones = []
+        if a_igualar > 0:
+            acciones.append(("fold", 0))
+            acciones.append(("call", min(a_igualar, self.stacks[jugador])))
+        else:
+            acciones.append(("check", 0))
+        # Solo se puede subir si algún rival activo puede pagar más que la apuesta máxima
+        rival_puede_pagar = any(activo and i != jugador and self.stacks[i] + self.apuestas[i] > maxima
+                                for i, activo in enumerate(self.activos))
+        if rival_puede_pagar and tope > maxima:
+            minima = min(tope, maxima + max(self.incremento, self.ciega_grande))
+            acciones.append(("bet" if maxima == 0 else "raise", minima))
+            if tope > minima:
+                acciones.append(("allin", tope))
+        return acciones
+
+    def aplicar(self, tipo, monto=0):
+        """Ejecuta una acción del actor y avanza la mano (calles, showdown)."""
+        jugador = self.actor
+        self.pendientes[jugador] = False
+        if tipo == "fold":
+            self.activos[jugador] = False
+        elif tipo in ("check", "call"):
+            self._poner(jugador, min(max(self.apuestas) - self.apuestas[jugador], self.stacks[jugador]))
+        else:
+            maxima = max(self.apuestas)
+            monto = min(monto, self.stacks[jugador] + self.apuestas[jugador])
+            self.incremento = max(self.incremento, monto - maxima)
+            self._poner(jugador, monto - self.apuestas[jugador])
+            for otro, activo in enumerate(self.activos):
+                if activo and otro != jugador and self.stacks[otro] > 0:
+                    self.pendientes[otro] = True
+        self._avanzar(jugador)
+
+    def _poner(self, jugador, fichas):
+        self.stacks[jugador] -= fichas
+        self.apuestas[jugador] += fichas
+        self.aportes[jugador] += fichas
+
+    def _avanzar(self, ultimo):
+        if sum(self.activos) == 1:
+            self.actor = None
+            return
+        jugadores = len(self.stacks)
+        for paso in range(1, jugadores + 1):
+            candidato = (ultimo + paso) % jugadores
+            if self.pendientes[candidato] and self.activos[candidato] and self.stacks[candidato] > 0:
+                self.actor = candidato
+                return
+
+        # Terminó la calle: si quedan al menos dos con fichas para apostar se juega la siguiente
+        self.apuestas = [0] * jugadores
+        self.incremento = 0
+        con_fichas = [i for i, activo in enumerate(self.activos) if activo and self.stacks[i] > 0]
+        if self.calle == 3 or len(con_fichas) < 2:
+            self.calle = 3
+            self.actor = None
+            return
+        self.calle += 1
+        self.pendientes = [i in con_fichas for i in range(jugadores)]
+        self.actor = con_fichas[0]
+
+    def pagos(self):
+        """
+        Fichas que gana o pierde cada jugador desde el punto de bifurcación, con botes laterales.
+        Requiere una mano terminada y repartida.
+        """
+        premios = [0] * len(self.stacks)
+        en_juego = [i for i, activo in enumerate(self.activos) if activo]
+        if len(en_juego) == 1:
+            premios[en_juego[0]] = sum(self.aportes)
+        else:
+            evaluador = obtener_evaluador()
+            mesa = self.mesa[:5]
+            rangos = {i: evaluador.evaluate(list(self.manos[i]), mesa) for i in en_juego}
+            niveles = sorted(set(self.aportes[i] for i in en_juego))
+            anterior = 0
+            for nivel in niveles:
+                # Bote de este nivel: lo que cada jugador aportó entre el nivel anterior y este
+                bote = sum(min(aporte, nivel) - min(aporte, anterior) for aporte in self.aportes)
+                candidatos = [i for i in en_juego if self.aportes[i] >= nivel]
+                mejor = min(rangos[i] for i in candidatos)
+                ganadores = [i for i in candidatos if rangos[i] == mejor]
+                for orden, ganador in enumerate(ganadores):
+                    premios[ganador] += bote // len(ganadores) + (1 if orden < bote % len(ganadores) else 0)
+                anterior = nivel
+        return [self.stacks[i] + premios[i] - self.stacks_iniciales[i] for i in range(len(self.stacks))]
+
+
+def bifurcar(game_state, player_index):
+    """
+    EstadoSimulado a partir del estado de pokerkit en un punto de decisión de player_index.
+    Las cartas de los rivales no se copian: hay que llamar a repartir() antes de jugar.
+    """
+    from pokerSimulator import convert_pokerkit_to_deuces_cards
+
+    estado = EstadoSimulado.__new__(EstadoSimulado)
+    jugadores = game_state.player_count
+    estado.stacks = list(game_state.stacks)
+    estado.apuestas = list(game_state.bets)
+    estado.aportes = [inicial - stack for inicial, stack in zip(game_state.starting_stacks, game_state.stacks)]
+    estado.activos = [bool(status) for status in game_state.statuses]
+    estado.mesa = convert_pokerkit_to_deuces_cards([carta for cartas in game_state.board_cards for carta in cartas])
+    estado.manos = [()] * jugadores
+    estado.manos[player_index] = tuple(convert_pokerkit_to_deuces_cards(game_state.hole_cards[player_index]))
+    estado.calle = min(game_state.street_index or 0, 3)
+    estado.actor = player_index
+    estado.ciega_grande = max(game_state.blinds_or_straddles)
+    minima = game_state.min_completion_betting_or_raising_to_amount
+    estado.incremento = minima - max(estado.apuestas) if minima is not None else estado.ciega_grande
+    estado.pendientes = [i in game_state.actor_indices for i in range(jugadores)]
+    estado.jugador = player_index
+    estado.stacks_iniciales = tuple(estado.stacks)
+    conocidas = set(estado.mesa) | set(estado.manos[player_index])
+    estado.mazo = [carta for carta in MAZO if carta not in conocidas]
+    return estado
+
+
+def politica_pasiva(estado, rng=random):
+    """Pasa o iguala siempre."""
+    for tipo, monto in estado.acciones():
+        if tipo in ("check", "call"):
+            return tipo, monto
+
+
+def politica_aleatoria(pesos=None):
+    """
+    Política que elige al azar con pesos por tipo de acción, como los bots de ejemplo
+    (por defecto, los de SimpleAIStrategy).
+    """
+    from example_custom_players import SimpleAIStrategy, action_weight
+
+    pesos = dict(SimpleAIStrategy.DEFAULT_WEIGHTS, **(pesos or {}))
+
+    def politica(estado, rng=random):
+        acciones = estado.acciones()
+        return rng.choices(acciones, weights=[action_weight(tipo, pesos) for tipo, monto in acciones])[0]
+
+    return politica
+
+
+def jugar(estado, politicas, rng=random):
+    """
+    Juega el estado (ya repartido) hasta el final y retorna los pagos de cada jugador.
+
+    Args:
+        estado: EstadoSimulado (se modifica)
+        politicas: Una política para todos o una lista con una por jugador. Una política recibe
+            (estado, rng) y retorna (tipo, monto)
+    """
+    while estado.actor is not None:
+        politica = politicas[estado.actor] if isinstance(politicas, (list, tuple)) else politicas
+        estado.aplicar(*politica(estado, rng))
+    return estado.pagos()
+
+
+def valor_acciones(raiz, politicas, rollouts=200, rng=None):
+    """
+    Valor esperado (en fichas, para el jugador de la raíz) de cada acción disponible, con
+    rollouts que comparten las mismas cartas entre acciones.
+
+    Returns:
+        Diccionario (tipo, monto) -> ganancia media
+    """
+    rng = rng or random.Random()
+    acciones = raiz.acciones()
+    totales = dict.fromkeys(acciones, 0.0)
+    for _ in range(rollouts):
+        repartido = raiz.repartir(rng)
+        for accion in acciones:
+            estado = repartido.clonar()
+            estado.aplicar(*accion)
+            totales[accion] += jugar(estado, politicas, rng)[raiz.jugador]
+    return {accion: total / rollouts for accion, total in totales.items()}
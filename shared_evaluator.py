@@ -0,0 +1,73 @@
+"""
+Evaluador de deuces compartido por todo el proceso.
+
+Construir un deuces.Evaluator regenera sus tablas de búsqueda cada vez. Aquí se construye
+una sola vez por proceso y, la primera vez en la máquina, las tablas se guardan en disco;
+los arranques siguientes (incluidos los procesos de un pool) solo las cargan.
+
+La ubicación del archivo se puede cambiar con la variable de entorno CLANKER_EVALUADOR_CACHE.
+"""
+import marshal
+import os
+
+
+RUTA_CACHE = os.environ.get(
+    "CLANKER_EVALUADOR_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "clanker_poker", "deuces_tablas.marshal"))
+
+_evaluador = None
+
+
+def obtener_evaluador():
+    """Retorna el evaluador del proceso, cargándolo desde disco o construyéndolo la primera vez."""
+    global _evaluador
+    if _evaluador is None:
+        _evaluador = _cargar() or _construir_y_guardar()
+    return _evaluador
+
+
+def _version_deuces():
+    # Identifica la instalación de deuces para invalidar la caché si cambia
+    import deuces.lookup
+
+    datos = os.stat(deuces.lookup.__file__)
+    return f"{datos.st_size}-{datos.st_mtime_ns}"
+
+
+def _cargar():
+    from deuces import Evaluator
+    from deuces.lookup import LookupTable
+
+    try:
+        with open(RUTA_CACHE, "rb") as archivo:
+            version, flush_lookup, unsuited_lookup = marshal.load(archivo)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if version != _version_deuces():
+        return None
+
+    # Se arma el evaluador sin pasar por su __init__, que reconstruiría las tablas
+    tabla = LookupTable.__new__(LookupTable)
+    tabla.flush_lookup = flush_lookup
+    tabla.unsuited_lookup = unsuited_lookup
+    evaluador = Evaluator.__new__(Evaluator)
+    evaluador.table = tabla
+    evaluador.hand_size_map = {5: evaluador._five, 6: evaluador._six, 7: evaluador._seven}
+    return evaluador
+
+
+def _construir_y_guardar():
+    from deuces import Evaluator
+
+    evaluador = Evaluator()
+    try:
+        os.makedirs(os.path.dirname(RUTA_CACHE), exist_ok=True)
+        temporal = f"{RUTA_CACHE}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as archivo:
+            marshal.dump((_version_deuces(), evaluador.table.flush_lookup, evaluador.table.unsuited_lookup),
+                         archivo)
+        os.replace(temporal, RUTA_CACHE)
+    except OSError:
+        # Sin permisos de escritura se sigue con el evaluador en memoria
+        pass
+    return evaluador
@@ -0,0 +1,211 @@
+"""
+Ajuste de hiperparámetros de estrategias paramétricas con successive halving.
+
+Cada candidato es un conjunto de parámetros de una estrategia (umbrales de CLANKER, pesos de
+acciones de los bots de ejemplo). Se evalúa en manos heads-up contra un grupo fijo de rivales,
+jugando cada mano en los dos asientos. Todos los candidatos usan las mismas semillas, y
+pokerkit baraja al crear la mesa, así que reciben las mismas cartas (números aleatorios comunes):
+las diferencias entre candidatos se deben a sus decisiones y no a la suerte.
+
+En cada ronda se descarta la peor fracción de los candidatos y los que siguen juegan eta veces
+más manos, reutilizando las que ya jugaron. Así casi todo el cómputo se gasta en los mejores.
+
+Uso:
+
+    python tuner.py clanker --candidatos 27 --manos 24 --eta 3
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from league import cargar_clase
+
+
+# Rivales por defecto: los bots de ejemplo con sus parámetros originales
+OPONENTES = [
+    ("example_custom_players:SimpleAIStrategy", {}),
+    ("example_custom_players:AggressiveAIStrategy", {}),
+    ("example_custom_players:ConservativeAIStrategy", {}),
+    ("example_custom_players:BluffingStrategy", {}),
+    ("example_custom_players:CardCountingStrategy", {}),
+]
+
+_PESOS = {"fold": (0.01, 1.0), "check_call": (0.01, 1.0), "bet_raise": (0.01, 1.0), "all_in": (0.0, 0.5)}
+
+
+def _kwargs_pesos(valores):
+    return {"weights": {nombre: valores[nombre] for nombre in _PESOS}}
+
+
+def _kwargs_bluffer(valores):
+    return dict(_kwargs_pesos(valores), bluff_frequency=valores["bluff_frequency"])
+
+
+def _kwargs_clanker(valores):
+    # Los umbrales tienen que quedar de mayor a menor: apostar todo, apostar el pozo, igualar
+    return {"umbrales": tuple(sorted((valores["umbral_todo"], valores["umbral_pozo"],
+                                      valores["umbral_igualar"]), reverse=True))}
+
+
+# Nombre -> (clase, rangos de cada parámetro, valores originales, función parámetros -> kwargs)
+ESPACIOS = {
+    "clanker": ("CLANKER:ClankerStrategy",
+                {"umbral_todo": (1.2, 3.0), "umbral_pozo": (1.0, 2.5), "umbral_igualar": (0.5, 2.0)},
+                {"umbral_todo": 1.8, "umbral_pozo": 1.4, "umbral_igualar": 1.1},
+                _kwargs_clanker),
+    "simple": ("example_custom_players:SimpleAIStrategy", _PESOS,
+               {"fold": 0.2, "check_call": 0.6, "bet_raise": 0.15, "all_in": 0.05},
+               _kwargs_pesos),
+    "agresivo": ("example_custom_players:AggressiveAIStrategy", _PESOS,
+                 {"fold": 0.1, "check_call": 0.3, "bet_raise": 0.5, "all_in": 0.1},
+                 _kwargs_pesos),
+    "bluffer": ("example_custom_players:BluffingStrategy", dict(_PESOS, bluff_frequency=(0.0, 0.6)),
+                {"fold": 0.15, "check_call": 0.5, "bet_raise": 0.3, "all_in": 0.05, "bluff_frequency": 0.2},
+                _kwargs_bluffer),
+}
+
+
+def _jugar_manos(tarea):
+    """
+    Tarea de un proceso del pool: juega las manos de un bloque de semillas contra un rival,
+    en ambos asientos, y retorna la ganancia total del candidato en big blinds.
+    """
+    from pokerSimulator import InteractivePokerGame
+
+    indice, bloque, ruta_clase, kwargs, ruta_rival, kwargs_rival, semillas, stack, blinds = tarea
+    candidato = cargar_clase(ruta_clase)(name="Candidato", **kwargs)
+    rival = cargar_clase(ruta_rival)(name="Rival", **kwargs_rival)
+
+    ganancia = 0
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        for semilla in semillas:
+            for asiento in (0, 1):
+                random.seed(semilla)
+                jugadores = [candidato, rival] if asiento == 0 else [rival, candidato]
+                mesa = InteractivePokerGame(jugadores, [stack, stack], blinds)
+                mesa.play_hand()
+                ganancia += mesa.state.stacks[asiento] - stack
+    return indice, bloque, ganancia / blinds[1]
+
+
+class Sintonizador:
+    """
+    Busca los mejores parámetros de una estrategia con successive halving.
+
+    Args:
+        espacio: Nombre de un espacio de ESPACIOS
+        oponentes: Lista de (ruta "modulo:Clase", kwargs) de los rivales fijos
+        stack: Fichas de cada jugador al comienzo de cada mano
+        blinds: Tupla con (small blind, big blind)
+        manos_por_bloque: Semillas por tarea del pool (cada semilla se juega en los dos asientos)
+        procesos: Procesos del pool (None = todos los núcleos)
+        semilla: Semilla de la búsqueda y de las manos
+    """
+
+    def __init__(self, espacio, oponentes=None, stack=10000, blinds=(50, 100), manos_por_bloque=4,
+                 procesos=None, semilla=0):
+        self.ruta_clase, self.rangos, self.originales, self.a_kwargs = ESPACIOS[espacio]
+        self.oponentes = list(oponentes or OPONENTES)
+        self.stack = stack
+        self.blinds = tuple(blinds)
+        self.manos_por_bloque = manos_por_bloque
+        self.procesos = procesos
+        self.rng = random.Random(semilla)
+        self.semilla = semilla
+        # Ganancia (en big blinds) de cada candidato en cada bloque ya jugado
+        self.resultados = {}
+
+    def muestrear(self):
+        """Parámetros al azar dentro de los rangos del espacio."""
+        return {nombre: self.rng.uniform(bajo, alto) for nombre, (bajo, alto) in self.rangos.items()}
+
+    def semillas_bloque(self, bloque):
+        inicio = self.semilla * 1_000_003 + bloque * self.manos_por_bloque
+        return list(range(inicio, inicio + self.manos_por_bloque))
+
+    def _evaluar(self, pool, candidatos, bloques):
+        """Juega los bloques que falten a cada candidato, contra cada rival."""
+        tareas = []
+        for indice in candidatos:
+            kwargs = self.a_kwargs(self.candidatos[indice])
+            for bloque in range(bloques):
+                if (indice, bloque) in self.resultados:
+                    continue
+                # Cada bloque enfrenta a un rival distinto, rotando, con las mismas semillas para todos
+                ruta_rival, kwargs_rival = self.oponentes[bloque % len(self.oponentes)]
+                tareas.append((indice, bloque, self.ruta_clase, kwargs, ruta_rival, kwargs_rival,
+                               self.semillas_bloque(bloque), self.stack, self.blinds))
+        for indice, bloque, ganancia in pool.map(_jugar_manos, tareas):
+            self.resultados[indice, bloque] = ganancia
+
+    def estadisticas(self, indice, bloques):
+        """Media de big blinds por mano del candidato y su error estándar."""
+        manos = 2 * self.manos_por_bloque
+        valores = [self.resultados[indice, bloque] / manos for bloque in range(bloques)]
+        media = sum(valores) / len(valores)
+        if len(valores) < 2:
+            return media, float("inf")
+        varianza = sum((valor - media) ** 2 for valor in valores) / (len(valores) - 1)
+        return media, math.sqrt(varianza / len(valores))
+
+    def ejecutar(self, num_candidatos=27, bloques_iniciales=None, eta=3, verbose=True):
+        """
+        Corre successive halving. El primer candidato tiene siempre los parámetros originales.
+
+        Args:
+            num_candidatos: Candidatos de la primera ronda
+            bloques_iniciales: Bloques de manos por candidato en la primera ronda
+                (por defecto, uno por rival)
+            eta: Factor de descarte: sigue 1/eta de los candidatos con eta veces más manos
+
+        Returns:
+            Tupla (parámetros, kwargs, bb por mano, error estándar) del mejor candidato
+        """
+        if eta < 2:
+            raise ValueError("eta tiene que ser al menos 2: con eta = 1 nunca se descartan candidatos")
+        bloques = bloques_iniciales or len(self.oponentes)
+        self.candidatos = [dict(self.originales)] + [self.muestrear() for _ in range(num_candidatos - 1)]
+        vivos = list(range(len(self.candidatos)))
+
+        with ProcessPoolExecutor(max_workers=self.procesos) as pool:
+            ronda = 0
+            while True:
+                self._evaluar(pool, vivos, bloques)
+                vivos.sort(key=lambda indice: self.estadisticas(indice, bloques)[0], reverse=True)
+                if verbose:
+                    media, error = self.estadisticas(vivos[0], bloques)
+                    print(f"🔎 Ronda {ronda}: {len(vivos)} candidatos, {2 * bloques * self.manos_por_bloque:,} "
+                          f"manos cada uno | mejor {media:+.3f} ± {error:.3f} bb/mano")
+                if len(vivos) == 1:
+                    break
+                vivos = vivos[:max(1, len(vivos) // eta)]
+                bloques *= eta
+                ronda += 1
+
+        mejor = vivos[0]
+        media, error = self.estadisticas(mejor, bloques)
+        return self.candidatos[mejor], self.a_kwargs(self.candidatos[mejor]), media, error
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ajuste de parámetros de estrategias con successive halving")
+    parser.add_argument("espacio", choices=sorted(ESPACIOS))
+    parser.add_argument("--candidatos", type=int, default=27)
+    parser.add_argument("--bloques", type=int, default=None, help="Bloques de manos por candidato en la primera ronda")
+    parser.add_argument("--manos-por-bloque", type=int, default=4)
+    parser.add_argument("--eta", type=int, default=3, help="Factor de descarte (al menos 2)")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+    if args.eta < 2:
+        parser.error("--eta tiene que ser al menos 2")
+
+    sintonizador = Sintonizador(args.espacio, manos_por_bloque=args.manos_por_bloque, procesos=args.procesos,
+                                semilla=args.semilla)
+    parametros, kwargs, media, error = sintonizador.ejecutar(args.candidatos, args.bloques, args.eta)
+    print(f"🏁 Mejor: {media:+.3f} ± {error:.3f} bb/mano")
+    print(json.dumps(kwargs, indent=2))
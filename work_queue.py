@@ -0,0 +1,388 @@
+"""
+Cola de trabajos para repartir simulaciones entre procesos de una misma máquina.
+
+Los trabajos (torneos o enfrentamientos de manos sueltas) se guardan en una base SQLite. Cualquier
+cantidad de trabajadores toma un trabajo a la vez con un préstamo (lease) que renueva mientras lo
+ejecuta. Si un trabajador muere, el préstamo vence y otro retoma el trabajo; si el trabajo falla,
+vuelve a la cola hasta agotar los intentos y queda fallido con su error. Los resultados se guardan
+por clave: encolar o completar dos veces el mismo trabajo no lo duplica, y el primer resultado que
+llega es el que queda.
+
+Los trabajadores solo usan la interfaz ColaTrabajos (encolar, tomar con préstamo, renovar,
+completar, fallar). ColaSQLite la implementa con un archivo SQLite en modo WAL, que necesita
+memoria compartida entre los procesos: todos los trabajadores tienen que correr en la máquina que
+tiene el archivo en un disco local (sobre NFS o SMB el bloqueo de SQLite no es confiable y la base
+se puede corromper). Para repartir entre varias máquinas alcanza con otra implementación de
+ColaTrabajos sobre un almacén compartido (por ejemplo, un servidor de base de datos) y pasarla a
+trabajar en lugar de la ruta.
+
+    python work_queue.py cola.sqlite liga --db liga.sqlite --ejemplos   # encola las partidas pendientes
+    python work_queue.py cola.sqlite trabajar --procesos 4
+    python work_queue.py cola.sqlite liga --db liga.sqlite --ejemplos --importar
+"""
+import argparse
+import contextlib
+from abc import ABC, abstractmethod
+import hashlib
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from league import cargar_clase
+
+
+LEASE = 300
+MAX_INTENTOS = 3
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabajos (
+    clave TEXT PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    parametros TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    intentos INTEGER NOT NULL DEFAULT 0,
+    trabajador TEXT,
+    vence REAL,
+    resultado TEXT,
+    error TEXT,
+    creado TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    terminado TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS trabajos_estado ON trabajos (estado, vence);
+"""
+
+
+def ejecutar_torneo(parametros):
+    """Torneo con repeated_hand_simulation. Retorna las fichas finales en el orden de los asientos."""
+    from pokerSimulator import InteractivePokerGame
+
+    random.seed(parametros["semilla"])
+    estrategias = [cargar_clase(ruta)(name=nombre, **kwargs) for nombre, ruta, kwargs in parametros["asientos"]]
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        return InteractivePokerGame.repeated_hand_simulation(
+            estrategias, [parametros["stack"]] * len(estrategias), tuple(parametros["blinds"]),
+            max_hands=parametros.get("max_manos"), raise_errors=True)
+
+
+def ejecutar_enfrentamiento(parametros):
+    """
+    Manos sueltas desde stacks iguales, una por semilla (semilla, semilla + 1, ...).
+    Retorna la ganancia total de cada asiento.
+    """
+    from pokerSimulator import InteractivePokerGame
+
+    estrategias = [cargar_clase(ruta)(name=nombre, **kwargs) for nombre, ruta, kwargs in parametros["asientos"]]
+    stack = parametros["stack"]
+    ganancias = [0] * len(estrategias)
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        for semilla in range(parametros["semilla"], parametros["semilla"] + parametros["manos"]):
+            random.seed(semilla)
+            mesa = InteractivePokerGame(estrategias, [stack] * len(estrategias), tuple(parametros["blinds"]),
+                                        raise_errors=True)
+            mesa.play_hand()
+            for asiento, fichas in enumerate(mesa.state.stacks):
+                ganancias[asiento] += fichas - stack
+    return ganancias
+
+
+TIPOS = {
+    "torneo": ejecutar_torneo,
+    "enfrentamiento": ejecutar_enfrentamiento,
+}
+
+
+def clave_trabajo(tipo, parametros):
+    return hashlib.sha1(f"{tipo}|{json.dumps(parametros, sort_keys=True)}".encode()).hexdigest()
+
+
+class ColaTrabajos(ABC):
+    """
+    Interfaz de una cola de trabajos con préstamos. Una implementación tiene que garantizar:
+
+    - encolar es idempotente por clave
+    - tomar entrega cada trabajo pendiente (o con el préstamo vencido) a un solo trabajador por
+      vez, suma un intento y marca fallidos los que vencen habiendo agotado max_intentos
+    - completar guarda solo el primer resultado de cada clave
+    - fallar devuelve el trabajo a la cola o lo marca fallido si agotó los intentos
+
+    Las implementaciones tienen que poder pasarse a otros procesos (pickle), porque cada
+    trabajador de trabajar corre en su propio proceso.
+
+    Attributes:
+        lease: Segundos que dura el préstamo de un trabajo sin renovarlo
+        max_intentos: Intentos antes de marcar un trabajo como fallido
+    """
+
+    lease = LEASE
+    max_intentos = MAX_INTENTOS
+
+    @abstractmethod
+    def encolar(self, tipo, parametros, clave=None):
+        """Agrega un trabajo si su clave no existe. Retorna la clave."""
+
+    @abstractmethod
+    def tomar(self, trabajador):
+        """Toma un trabajo. Retorna (clave, tipo, parametros) o None si no hay trabajos disponibles."""
+
+    @abstractmethod
+    def renovar(self, clave, trabajador):
+        """Extiende el préstamo (latido). Retorna False si el trabajo ya no es de este trabajador."""
+
+    @abstractmethod
+    def completar(self, clave, trabajador, resultado):
+        """Guarda el resultado (serializable en JSON) si el trabajo no estaba hecho."""
+
+    @abstractmethod
+    def fallar(self, clave, trabajador, error):
+        """Devuelve el trabajo a la cola, o lo marca fallido si agotó los intentos."""
+
+    @abstractmethod
+    def resultados(self, tipo=None):
+        """Diccionario clave -> resultado de los trabajos hechos."""
+
+    @abstractmethod
+    def errores(self, tipo=None):
+        """Diccionario clave -> error de los trabajos fallidos."""
+
+    @abstractmethod
+    def resumen(self):
+        """Cantidad de trabajos en cada estado."""
+
+
+class ColaSQLite(ColaTrabajos):
+    """
+    ColaTrabajos en un archivo SQLite, segura entre procesos de la máquina que tiene el archivo.
+
+    Args:
+        ruta_db: Archivo SQLite de la cola
+        lease: Segundos que dura el préstamo de un trabajo sin renovarlo
+        max_intentos: Intentos antes de marcar un trabajo como fallido
+    """
+
+    def __init__(self, ruta_db="cola.sqlite", lease=LEASE, max_intentos=MAX_INTENTOS):
+        self.ruta_db = ruta_db
+        self.lease = lease
+        self.max_intentos = max_intentos
+        with self._conexion() as conexion:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.executescript(ESQUEMA)
+
+    def _conexion(self):
+        # isolation_level=None: las transacciones se abren explícitamente con BEGIN IMMEDIATE
+        return contextlib.closing(sqlite3.connect(self.ruta_db, timeout=60, isolation_level=None))
+
+    def encolar(self, tipo, parametros, clave=None):
+        """Agrega un trabajo si su clave no existe. Retorna la clave."""
+        if tipo not in TIPOS:
+            raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+        clave = clave or clave_trabajo(tipo, parametros)
+        with self._conexion() as conexion:
+            conexion.execute("INSERT OR IGNORE INTO trabajos (clave, tipo, parametros) VALUES (?, ?, ?)",
+                             (clave, tipo, json.dumps(parametros)))
+        return clave
+
+    def tomar(self, trabajador):
+        """
+        Toma un trabajo pendiente o con el préstamo vencido.
+
+        Returns:
+            Tupla (clave, tipo, parametros) o None si no hay trabajos disponibles
+        """
+        ahora = time.time()
+        with self._conexion() as conexion:
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                # Los que agotaron los intentos con el préstamo vencido no se vuelven a tomar
+                conexion.execute(
+                    "UPDATE trabajos SET estado = 'fallido' "
+                    "WHERE estado = 'tomado' AND vence < ? AND intentos >= ?", (ahora, self.max_intentos))
+                fila = conexion.execute(
+                    "SELECT clave, tipo, parametros FROM trabajos "
+                    "WHERE estado = 'pendiente' OR (estado = 'tomado' AND vence < ?) "
+                    "ORDER BY intentos, rowid LIMIT 1", (ahora,)).fetchone()
+                if fila is not None:
+                    conexion.execute(
+                        "UPDATE trabajos SET estado = 'tomado', trabajador = ?, vence = ?, intentos = intentos + 1 "
+                        "WHERE clave = ?", (trabajador, ahora + self.lease, fila[0]))
+                conexion.execute("COMMIT")
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+        if fila is None:
+            return None
+        return fila[0], fila[1], json.loads(fila[2])
+
+    def renovar(self, clave, trabajador):
+        """Extiende el préstamo. Retorna False si el trabajo ya no es de este trabajador."""
+        with self._conexion() as conexion:
+            cursor = conexion.execute(
+                "UPDATE trabajos SET vence = ? WHERE clave = ? AND trabajador = ? AND estado = 'tomado'",
+                (time.time() + self.lease, clave, trabajador))
+            return cursor.rowcount == 1
+
+    def completar(self, clave, trabajador, resultado):
+        """Guarda el resultado si el trabajo no estaba hecho (aunque el préstamo haya vencido)."""
+        with self._conexion() as conexion:
+            conexion.execute(
+                "UPDATE trabajos SET estado = 'hecho', trabajador = ?, resultado = ?, error = NULL, "
+                "terminado = CURRENT_TIMESTAMP WHERE clave = ? AND estado != 'hecho'",
+                (trabajador, json.dumps(resultado), clave))
+
+    def fallar(self, clave, trabajador, error):
+        """Devuelve el trabajo a la cola, o lo marca fallido si agotó los intentos."""
+        with self._conexion() as conexion:
+            conexion.execute(
+                "UPDATE trabajos SET estado = CASE WHEN intentos >= ? THEN 'fallido' ELSE 'pendiente' END, "
+                "error = ?, vence = NULL WHERE clave = ? AND trabajador = ? AND estado = 'tomado'",
+                (self.max_intentos, error, clave, trabajador))
+
+    def resultados(self, tipo=None):
+        """Diccionario clave -> resultado de los trabajos hechos."""
+        consulta = "SELECT clave, resultado FROM trabajos WHERE estado = 'hecho'"
+        argumentos = ()
+        if tipo is not None:
+            consulta += " AND tipo = ?"
+            argumentos = (tipo,)
+        with self._conexion() as conexion:
+            return {clave: json.loads(resultado) for clave, resultado in conexion.execute(consulta, argumentos)}
+
+    def errores(self, tipo=None):
+        """Diccionario clave -> error de los trabajos fallidos."""
+        # Un trabajo que agotó los intentos por préstamos vencidos no tiene mensaje de error
+        consulta = ("SELECT clave, COALESCE(error, 'Préstamo vencido en todos los intentos') "
+                    "FROM trabajos WHERE estado = 'fallido'")
+        argumentos = ()
+        if tipo is not None:
+            consulta += " AND tipo = ?"
+            argumentos = (tipo,)
+        with self._conexion() as conexion:
+            return dict(conexion.execute(consulta, argumentos).fetchall())
+
+    def resumen(self):
+        """Cantidad de trabajos en cada estado."""
+        with self._conexion() as conexion:
+            return dict(conexion.execute("SELECT estado, COUNT(*) FROM trabajos GROUP BY estado").fetchall())
+
+
+def abrir_cola(cola, lease=LEASE):
+    """Un ColaTrabajos tal cual o, si es una ruta, la ColaSQLite de ese archivo."""
+    if isinstance(cola, ColaTrabajos):
+        return cola
+    return ColaSQLite(cola, lease)
+
+
+def trabajar(cola, nombre=None, lease=LEASE, espera=2.0, salir_si_vacia=True):
+    """
+    Bucle de un trabajador: toma trabajos, los ejecuta renovando el préstamo y guarda el resultado.
+
+    Args:
+        cola: ColaTrabajos, o ruta del archivo SQLite de una ColaSQLite
+        nombre: Identificador del trabajador (por defecto host:pid)
+        lease: Segundos de préstamo si cola es una ruta (si no, se usa el de la cola)
+        espera: Segundos entre consultas cuando la cola está vacía
+        salir_si_vacia: Terminar cuando no quedan trabajos disponibles
+
+    Returns:
+        Número de trabajos completados
+    """
+    nombre = nombre or f"{socket.gethostname()}:{os.getpid()}"
+    cola = abrir_cola(cola, lease)
+    completados = 0
+
+    while True:
+        trabajo = cola.tomar(nombre)
+        if trabajo is None:
+            if salir_si_vacia:
+                return completados
+            time.sleep(espera)
+            continue
+
+        clave, tipo, parametros = trabajo
+        terminado = threading.Event()
+
+        def latido():
+            while not terminado.wait(cola.lease / 3):
+                if not cola.renovar(clave, nombre):
+                    return
+
+        hilo = threading.Thread(target=latido, daemon=True)
+        hilo.start()
+        try:
+            resultado = TIPOS[tipo](parametros)
+        except Exception as e:
+            cola.fallar(clave, nombre, f"{type(e).__name__}: {e}")
+        else:
+            cola.completar(clave, nombre, resultado)
+            completados += 1
+        finally:
+            terminado.set()
+            hilo.join()
+
+
+def encolar_liga(cola, liga):
+    """Encola como torneos las partidas pendientes de una Liga, con la misma clave que usa la liga."""
+    for clave, orden, versiones, semilla in liga.pendientes():
+        cola.encolar("torneo", {
+            "asientos": [(nombre, liga.estrategias[nombre][0], liga.estrategias[nombre][1]) for nombre in orden],
+            "stack": liga.stack, "blinds": liga.blinds, "max_manos": liga.max_manos, "semilla": semilla,
+        }, clave=clave)
+
+
+def importar_liga(cola, liga):
+    """
+    Guarda en la base de la Liga los torneos terminados en la cola, y los fallidos con su error.
+    Retorna cuántos se importaron.
+    """
+    return liga.registrar(cola.resultados("torneo"), cola.errores("torneo"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cola de trabajos de simulación")
+    parser.add_argument("cola", help="Archivo SQLite de la cola")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    parser_trabajar = subparsers.add_parser("trabajar", help="Ejecutar trabajos")
+    parser_trabajar.add_argument("--procesos", type=int, default=1)
+    parser_trabajar.add_argument("--lease", type=int, default=LEASE)
+    parser_trabajar.add_argument("--esperar", action="store_true", help="Seguir esperando trabajos nuevos")
+
+    parser_liga = subparsers.add_parser("liga", help="Encolar o importar las partidas de una liga")
+    parser_liga.add_argument("--db", required=True, help="Archivo SQLite de la liga")
+    parser_liga.add_argument("--ejemplos", action="store_true")
+    parser_liga.add_argument("--tiempo-busqueda", type=float, default=None,
+                             help="Con --ejemplos, incluir también los bots de búsqueda con estos segundos por decisión")
+    parser_liga.add_argument("--estrategia", action="append", default=[], help='"Nombre=modulo:Clase"')
+    parser_liga.add_argument("--importar", action="store_true", help="Importar resultados en vez de encolar")
+
+    subparsers.add_parser("estado", help="Mostrar cuántos trabajos hay en cada estado")
+    args = parser.parse_args()
+
+    if args.comando == "trabajar":
+        with ProcessPoolExecutor(max_workers=args.procesos) as pool:
+            futuros = [pool.submit(trabajar, args.cola, None, args.lease, 2.0, not args.esperar)
+                       for _ in range(args.procesos)]
+            print(f"🎮 Trabajos completados: {sum(futuro.result() for futuro in futuros):,}")
+    elif args.comando == "liga":
+        from league import Liga
+
+        # Jugadores por mesa, repeticiones, stack, blinds y límite de manos salen de la base de la liga
+        liga = Liga(args.db)
+        if args.ejemplos:
+            liga.agregar_ejemplos(args.tiempo_busqueda)
+        for especificacion in args.estrategia:
+            nombre, ruta_clase = especificacion.split("=", 1)
+            liga.agregar(nombre, ruta_clase)
+        cola = ColaSQLite(args.cola)
+        if args.importar:
+            print(f"📥 Partidas importadas: {importar_liga(cola, liga):,}")
+            liga.imprimir_tabla()
+        else:
+            encolar_liga(cola, liga)
+            print(f"📤 Cola: {cola.resumen()}")
+    else:
+        print(ColaSQLite(args.cola).resumen())
@@ -0,0 +1,98 @@
+"""
+Hash Zobrist de 64 bits del conjunto de información de cada jugador.
+
+ZobristHasher recorre las operaciones nuevas del estado de pokerkit (state.operations) y combina
+con XOR una clave por cada acción pública (jugador, tipo, monto y número de acción), por cada
+carta de la mesa (según la calle en que salió: flop, turn o river) y por los stacks iniciales.
+El hash de un jugador en su punto de decisión agrega sus dos cartas y su índice, en O(1). Dos decisiones con la misma historia pública, la misma mesa
+y las mismas cartas propias tienen el mismo hash, así que sirve de clave para tablas de
+transposición y memos de decisiones.
+
+InteractivePokerGame mantiene un hasher por mano y lo actualiza en execute_action; las
+estrategias lo leen desde features:
+
+    info_set = features_for(game_state, player_index).info_set_hash
+
+Las claves se derivan con splitmix64, así que el hash es el mismo en todos los procesos y corridas.
+"""
+MASK = (1 << 64) - 1
+RANKS = "23456789TJQKA"
+SUITS = "shdc"
+MAX_PLAYERS = 10
+
+# Tipos de operación pública de pokerkit -> código para la clave
+_ACTION_CODES = {
+    "BlindOrStraddlePosting": 1,
+    "CheckingOrCalling": 2,
+    "CompletionBettingOrRaisingTo": 3,
+    "Folding": 4,
+    "AntePosting": 5,
+}
+
+
+def splitmix64(value):
+    value = (value + 0x9E3779B97F4A7C15) & MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+    return value ^ (value >> 31)
+
+
+def card_index(card):
+    """Índice 0-51 (rango * 4 + palo, como en CLANKER.MAZO) de una carta de pokerkit"""
+    from console_renderer import card_short_form
+
+    short_form = card_short_form(card)
+    return RANKS.index(short_form[0]) * 4 + SUITS.index(short_form[1])
+
+
+# Una tabla por calle de la mesa (flop, turn, river): "flop A B C, turn D" != "flop A B D, turn C".
+# Las tres cartas del flop comparten tabla porque su orden no cambia lo que se sabe
+BOARD_KEYS = [[splitmix64(0x1000 + street * 64 + index) for index in range(52)] for street in range(3)]
+# Cartas de la mesa ya repartidas -> calle de la próxima carta
+_BOARD_STREET = (0, 0, 0, 1, 2)
+HOLE_KEYS = [[splitmix64(0x2000 + player * 64 + index) for index in range(52)] for player in range(MAX_PLAYERS)]
+PLAYER_KEYS = [splitmix64(0x3000 + player) for player in range(MAX_PLAYERS)]
+
+
+def action_key(ply, player_index, code, amount):
+    """Clave de la acción número ply: el orden importa, así que "A sube, B iguala" != "B iguala, A sube"."""
+    return splitmix64((((ply * MAX_PLAYERS + player_index) * 8 + code) << 40) ^ (amount or 0))
+
+
+class ZobristHasher:
+    """Hash incremental de la historia pública de una mano"""
+
+    def __init__(self):
+        self.public_hash = 0
+        self.ply = 0
+        self.board_cards = 0
+        self.processed = 0
+        self.started = False
+
+    def sync(self, game_state):
+        """Incorpora las operaciones que el estado agregó desde la última llamada. O(1) por operación."""
+        if not self.started:
+            self.started = True
+            for player_index, stack in enumerate(game_state.starting_stacks):
+                self.public_hash ^= splitmix64(((0x4000 + player_index) << 40) ^ stack)
+        operations = game_state.operations
+        for operation in operations[self.processed:]:
+            name = type(operation).__name__
+            if name == "BoardDealing":
+                for card in operation.cards:
+                    self.public_hash ^= BOARD_KEYS[_BOARD_STREET[self.board_cards]][card_index(card)]
+                    self.board_cards += 1
+            elif name in _ACTION_CODES:
+                self.public_hash ^= action_key(self.ply, operation.player_index, _ACTION_CODES[name],
+                                               getattr(operation, "amount", 0))
+                self.ply += 1
+        self.processed = len(operations)
+        return self.public_hash
+
+    def info_set_hash(self, game_state, player_index):
+        """Hash de lo que sabe player_index: historia pública, mesa, sus cartas y su asiento"""
+        self.sync(game_state)
+        value = self.public_hash ^ PLAYER_KEYS[player_index]
+        for card in game_state.hole_cards[player_index]:
+            value ^= HOLE_KEYS[player_index][card_index(card)]
+        return value